@@ -3,7 +3,8 @@ from datetime import datetime, timedelta
 import uuid
 import logging
 from models import *
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, get_analytics_database, register_indexes
 from ai_service import ai_service
 
 logger = logging.getLogger(__name__)
@@ -11,11 +12,13 @@ logger = logging.getLogger(__name__)
 class AdvancedAnalyticsService:
     def __init__(self):
         self.db = None
+        self.analytics_db = None
     
     async def initialize(self):
         """Initialize database connection"""
         if not self.db:
             self.db = get_database()
+            self.analytics_db = get_analytics_database()
     
     async def create_performance_record(self, user_id: str, generation_result_id: str,
                                       platform: Platform, post_url: Optional[str] = None) -> ContentPerformance:
@@ -88,7 +91,7 @@ class AdvancedAnalyticsService:
             "posted_at": {"$gte": start_date, "$lte": end_date}
         }
         
-        cursor = self.db.content_performance.find(query)
+        cursor = self.analytics_db.content_performance.find(query)
         performances = []
         async for doc in cursor:
             performances.append(ContentPerformance(**doc))
@@ -106,11 +109,18 @@ class AdvancedAnalyticsService:
         category_performance = {}
         platform_performance = {}
         
-        # Get generation results to find categories
+        # Get generation results to find categories, in one query for every performance
+        categories = {}
+        gen_cursor = self.analytics_db.generation_results.find(
+            {"id": {"$in": list({p.generation_result_id for p in performances})}},
+            {"_id": 0, "id": 1, "category": 1}
+        )
+        async for gen_doc in gen_cursor:
+            categories[gen_doc["id"]] = gen_doc["category"]
+        
         for performance in performances:
-            gen_result = await self.db.generation_results.find_one({"id": performance.generation_result_id})
-            if gen_result:
-                category = gen_result["category"]
+            category = categories.get(performance.generation_result_id)
+            if category:
                 platform = performance.platform.value
                 
                 # Track category performance
@@ -150,7 +160,7 @@ class AdvancedAnalyticsService:
             "posted_at": {"$gte": previous_start, "$lte": start_date}
         }
         
-        previous_cursor = self.db.content_performance.find(previous_query)
+        previous_cursor = self.analytics_db.content_performance.find(previous_query)
         previous_performances = []
         async for doc in previous_cursor:
             previous_performances.append(ContentPerformance(**doc))
@@ -205,12 +215,23 @@ class AdvancedAnalyticsService:
             "created_at": {"$gte": start_date, "$lte": end_date}
         }
         
-        cursor = self.db.generation_results.find(gen_query)
-        provider_stats = {}
+        cursor = self.analytics_db.generation_results.find(
+            gen_query, {"_id": 0, "id": 1, "ai_responses.provider": 1}
+        )
+        gen_docs = await cursor.to_list(length=None)
+        
+        # Performance data for all of these generations in one query (first document per generation)
+        performance_by_generation = {}
+        perf_cursor = self.analytics_db.content_performance.find(
+            {"generation_result_id": {"$in": [gen_doc["id"] for gen_doc in gen_docs]}},
+            {"_id": 0, "generation_result_id": 1, "likes": 1, "comments": 1, "shares": 1, "views": 1}
+        )
+        async for perf_doc in perf_cursor:
+            performance_by_generation.setdefault(perf_doc["generation_result_id"], perf_doc)
         
-        async for gen_doc in cursor:
-            # Get performance data for this generation
-            perf_doc = await self.db.content_performance.find_one({"generation_result_id": gen_doc["id"]})
+        provider_stats = {}
+        for gen_doc in gen_docs:
+            perf_doc = performance_by_generation.get(gen_doc["id"])
             
             if perf_doc and gen_doc.get("ai_responses"):
                 for ai_response in gen_doc["ai_responses"]:
@@ -249,7 +270,7 @@ class AdvancedAnalyticsService:
             "posted_at": {"$gte": thirty_days_ago}
         }
         
-        cursor = self.db.content_performance.find(query).sort("engagement_rate", -1).limit(limit)
+        cursor = self.analytics_db.content_performance.find(query).sort("engagement_rate", -1).limit(limit)
         top_performances = []
         async for doc in cursor:
             top_performances.append(ContentPerformance(**doc))
@@ -326,18 +347,25 @@ class AdvancedAnalyticsService:
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         
         # Get user's performance in same category/platform
-        user_performances = []
-        cursor = self.db.content_performance.find({
+        cursor = self.analytics_db.content_performance.find({
             "user_id": user_id,
             "platform": platform.value,
             "posted_at": {"$gte": thirty_days_ago}
         })
         
-        async for perf_doc in cursor:
-            # Check if this performance matches the category
-            gen_result = await self.db.generation_results.find_one({"id": perf_doc["generation_result_id"]})
-            if gen_result and gen_result.get("category") == category.value:
-                user_performances.append(ContentPerformance(**perf_doc))
+        perf_docs = await cursor.to_list(length=None)
+        
+        # Keep the performances whose generation is in this category, checked in one query
+        in_category = set()
+        gen_cursor = self.analytics_db.generation_results.find(
+            {"id": {"$in": list({doc["generation_result_id"] for doc in perf_docs})}, "category": category.value},
+            {"_id": 0, "id": 1}
+        )
+        async for gen_doc in gen_cursor:
+            in_category.add(gen_doc["id"])
+        user_performances = [
+            ContentPerformance(**perf_doc) for perf_doc in perf_docs if perf_doc["generation_result_id"] in in_category
+        ]
         
         user_avg_engagement = 0.0
         if user_performances:
@@ -371,5 +399,18 @@ class AdvancedAnalyticsService:
         await self.db.competitor_benchmarks.insert_one(benchmark.dict())
         return benchmark
 
+register_indexes("content_performance", [
+    IndexModel([("user_id", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("posted_at", DESCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("platform", ASCENDING), ("posted_at", DESCENDING)]),
+    IndexModel([("generation_result_id", ASCENDING)]),
+    IndexModel([("platform", ASCENDING)]),
+    IndexModel([("created_at", DESCENDING)]),
+])
+
+register_indexes("analytics_dashboards", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+])
+
 # Global service instance
 advanced_analytics_service = AdvancedAnalyticsService()
\ No newline at end of file
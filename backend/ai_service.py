@@ -1,12 +1,21 @@
 from emergentintegrations.llm.chat import LlmChat, UserMessage
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 import asyncio
+import json
 import time
 import os
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
 from models import AIProvider, ContentCategory, Platform, AIResponse
+from llm_client_pool import llm_client_pool
+from generation_cache import generation_cache
+from provider_resilience import circuit_breakers, CircuitOpenError
+from rate_limiter import rate_limiters, estimate_tokens, RateLimitExceeded
+from single_flight import SingleFlight
+from provider_telemetry import provider_telemetry
+from provider_router import provider_router, AUTO_PROVIDER
+from llm_backend import create_llm_chat, is_stub_backend
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -14,6 +23,9 @@ load_dotenv(ROOT_DIR / '.env')
 
 logger = logging.getLogger(__name__)
 
+# Identical generate_content prompts in flight at the same time share one upstream call
+content_flights = SingleFlight("generate_content")
+
 class AIService:
     def __init__(self):
         self.openai_key = os.environ.get('OPENAI_API_KEY')
@@ -21,6 +33,18 @@ class AIService:
         self.gemini_key = os.environ.get('GEMINI_API_KEY')
         self.perplexity_key = os.environ.get('PERPLEXITY_API_KEY')  # Will be added when ready
         
+        # Deadlines (seconds) for multi-provider generation
+        self.provider_timeout = float(os.environ.get('AI_PROVIDER_TIMEOUT', '30'))
+        self.request_budget = float(os.environ.get('AI_REQUEST_BUDGET', '45'))
+        # Per-provider deadline for packed (several items in one prompt) generation
+        self.packed_timeout = float(os.environ.get('AI_PACKED_TIMEOUT', '90'))
+        
+        # Fire a backup request to another provider when the primary is slower than its p90
+        self.hedging_enabled = os.environ.get('AI_HEDGING_ENABLED', 'false').lower() == 'true'
+        
+        # Provider used by generate_content when the caller doesn't name one ("auto" routes by live telemetry)
+        self.default_provider = os.environ.get('AI_DEFAULT_PROVIDER', 'openai').lower()
+        
         # Advanced AI Models - Latest and Most Powerful
         self.model_versions = {
             AIProvider.OPENAI: "gpt-4o",  # Latest OpenAI multimodal model
@@ -78,57 +102,153 @@ class AIService:
             Platform.FACEBOOK: "Focus on community engagement and conversations. Great for longer-form content and storytelling. Encourage comments and shares."
         }
 
-    async def create_ai_chat(self, provider: AIProvider, category: ContentCategory) -> LlmChat:
-        """Create a new AI chat instance for the given provider and category"""
-        session_id = f"{provider.value}_{category.value}_{int(time.time())}"
+    def _get_api_key(self, provider: AIProvider) -> Optional[str]:
+        """Get the configured API key for a provider"""
+        return {
+            AIProvider.OPENAI: self.openai_key,
+            AIProvider.ANTHROPIC: self.anthropic_key,
+            AIProvider.GEMINI: self.gemini_key,
+            AIProvider.PERPLEXITY: self.perplexity_key
+        }.get(provider)
+
+    def _is_configured(self, provider: AIProvider) -> bool:
+        """Whether calls to the provider can be made (the offline stub backend needs no key)"""
+        return bool(self._get_api_key(provider)) or is_stub_backend()
+
+    def select_providers(self, category: Optional[str] = None, top_k: int = 1,
+                         latency_sla: Optional[float] = None,
+                         candidates: Optional[List[AIProvider]] = None) -> List[AIProvider]:
+        """Pick the best ``top_k`` configured providers right now by latency, error rate and quality"""
+        candidates = [p for p in (candidates or list(AIProvider)) if self._is_configured(p)]
+        chosen = provider_router.select(candidates, top_k, category, latency_sla)
+        if not chosen:
+            # Every circuit is open: fall back to the first configured candidate rather than failing outright
+            chosen = candidates[:1] or [AIProvider.OPENAI]
+        return chosen
+
+    def resolve_providers(self, ai_providers: List[AIProvider], auto_providers: Optional[int] = None,
+                          category: Optional[str] = None,
+                          latency_sla: Optional[float] = None) -> List[AIProvider]:
+        """The providers a request should use: its explicit list, or the ``auto_providers`` best ones"""
+        if not auto_providers:
+            return list(ai_providers)
+        return self.select_providers(category, auto_providers, latency_sla)
+
+    def _category_system_message(self, provider: AIProvider, category: ContentCategory) -> str:
+        """System message for caption/hashtag chats"""
         system_message = self.system_messages.get(category, "You are a helpful social media expert.")
-        
-        if provider == AIProvider.OPENAI:
-            chat = LlmChat(
-                api_key=self.openai_key,
-                session_id=session_id,
-                system_message=system_message
-            ).with_model("openai", "gpt-4o").with_max_tokens(400)  # Latest GPT-4o
-            
-        elif provider == AIProvider.ANTHROPIC:
-            chat = LlmChat(
-                api_key=self.anthropic_key,
-                session_id=session_id,
-                system_message=system_message
-            ).with_model("anthropic", "claude-3-5-sonnet-20241022").with_max_tokens(400)  # Latest Claude 3.5 Sonnet
-            
-        elif provider == AIProvider.GEMINI:
-            chat = LlmChat(
-                api_key=self.gemini_key,
-                session_id=session_id,
-                system_message=system_message
-            ).with_model("gemini", "gemini-2.0-flash-exp").with_max_tokens(400)  # Latest Gemini 2.0 Flash Experimental
-            
-        elif provider == AIProvider.PERPLEXITY:
-            if not self.perplexity_key:
-                raise ValueError("Perplexity API key not configured")
-            chat = LlmChat(
-                api_key=self.perplexity_key,
-                session_id=session_id,
-                system_message=system_message + " Use current web data for trending and relevant content."
-            ).with_model("perplexity", "sonar-pro").with_max_tokens(400)  # Real-time web search
-            
-        else:
+        if provider == AIProvider.PERPLEXITY:
+            system_message += " Use current web data for trending and relevant content."
+        return system_message
+
+    def _generic_system_message(self, provider: AIProvider) -> str:
+        """System message for generic (non-caption) generation"""
+        system_message = "You are a helpful AI assistant that provides detailed, accurate, and actionable insights."
+        if provider == AIProvider.PERPLEXITY:
+            system_message += " Use current web data and real-time information for accurate insights."
+        return system_message
+
+    def _resolve_chat_config(self, provider: AIProvider):
+        """Get the (api_key, model) pair used to build chats for a provider"""
+        if provider not in self.model_versions:
             raise ValueError(f"Unsupported AI provider: {provider}")
-        
-        return chat
+        api_key = self._get_api_key(provider)
+        if provider == AIProvider.PERPLEXITY and not api_key and not is_stub_backend():
+            raise ValueError("Perplexity API key not configured")
+        return api_key, self.model_versions[provider]
 
-    async def generate_caption(self, provider: AIProvider, category: ContentCategory, 
-                             platform: Platform, content_description: str) -> AIResponse:
-        """Generate a caption using the specified AI provider"""
-        start_time = time.time()
+    def chat_session(self, provider: AIProvider, system_message: str, max_tokens: int = 400):
+        """Check out a pooled chat client; use as ``async with ai_service.chat_session(...) as chat``"""
+        api_key, model = self._resolve_chat_config(provider)
+        return llm_client_pool.client(provider, api_key, provider.value, model, system_message, max_tokens)
+
+    async def _send_message(self, provider: AIProvider, system_message: str, prompt: str,
+                            max_tokens: int = 400):
+        """Send one prompt to a provider through its rate limiter, circuit breaker and the client pool"""
+        session = self.chat_session(provider, system_message, max_tokens)
+        # Checked first, so calls the breaker rejects don't spend rate limit tokens
+        breaker = circuit_breakers.get(provider)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{provider.value} is temporarily unavailable (circuit open)")
+        try:
+            await rate_limiters.get(provider).acquire(estimate_tokens(prompt, max_tokens))
+        except BaseException:
+            # The provider was never called: hand back a half-open probe slot
+            breaker.record_abandoned(0.0)
+            raise
         
+        start_time = time.time()
         try:
-            chat = await self.create_ai_chat(provider, category)
+            async with session as chat:
+                response = await chat.send_message(UserMessage(text=prompt))
+        except asyncio.CancelledError:
+            breaker.record_abandoned(time.time() - start_time)
+            raise
+        except Exception:
+            breaker.record_failure(time.time() - start_time)
+            provider_telemetry.record(provider, time.time() - start_time, success=False)
+            raise
+        breaker.record_success(time.time() - start_time)
+        provider_telemetry.record(provider, time.time() - start_time, success=True)
+        return response
+
+    def _pick_backup_provider(self, primary: AIProvider) -> Optional[AIProvider]:
+        """Pick the fastest other configured provider whose circuit isn't open"""
+        candidates = []
+        for order, provider in enumerate(AIProvider):
+            if provider == primary or not self._is_configured(provider) or circuit_breakers.get(provider).is_open():
+                continue
+            median_latency = provider_telemetry.get(provider).latency_percentile(0.5)
+            candidates.append((median_latency if median_latency is not None else float('inf'), order, provider))
+        return min(candidates)[2] if candidates else None
+
+    async def _send_hedged(self, primary: AIProvider, backup: AIProvider, prompt: str, max_tokens: int):
+        """Send to the primary provider, adding a backup request if it is slow or fails
+
+        The backup fires once the primary has run past its observed p90 latency
+        (or straight away if the primary fails). Whichever succeeds first wins
+        and the other call is cancelled.
+        """
+        primary_task = asyncio.create_task(
+            self._send_message(primary, self._generic_system_message(primary), prompt, max_tokens)
+        )
+        hedge_delay = provider_telemetry.get(primary).latency_percentile(0.9)
+        pending = {primary_task}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done and primary_task.exception() is None:
+                return primary_task.result()
             
-            # Create platform-specific prompt
-            platform_guide = self.platform_guidelines.get(platform, "")
-            prompt = f"""
+            logger.info(f"Hedging {primary.value} request with {backup.value}")
+            backup_task = asyncio.create_task(
+                self._send_message(backup, self._generic_system_message(backup), prompt, max_tokens)
+            )
+            pending.add(backup_task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            raise primary_task.exception() or backup_task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def create_ai_chat(self, provider: AIProvider, category: ContentCategory) -> LlmChat:
+        """Create a new, unpooled AI chat instance for the given provider and category"""
+        api_key, model = self._resolve_chat_config(provider)
+        session_id = f"{provider.value}_{category.value}_{int(time.time())}"
+        
+        return create_llm_chat(
+            api_key=api_key,
+            session_id=session_id,
+            system_message=self._category_system_message(provider, category)
+        ).with_model(provider.value, model).with_max_tokens(400)
+
+    def _caption_prompt(self, category: ContentCategory, platform: Platform, content_description: str) -> str:
+        """Platform-specific caption prompt"""
+        platform_guide = self.platform_guidelines.get(platform, "")
+        return f"""
 Create an engaging social media caption for {platform.value} based on this content:
 
 Content Description: {content_description}
@@ -145,10 +265,54 @@ Requirements:
 
 Caption:"""
 
-            message = UserMessage(text=prompt)
-            response = await chat.send_message(message)
+    def _hashtag_prompt(self, category: ContentCategory, platform: Platform, content_description: str) -> str:
+        return f"""
+Generate 15 relevant hashtags for this {category.value} content on {platform.value}:
+
+Content: {content_description}
+
+Requirements:
+- Mix of popular and niche hashtags
+- Relevant to {category.value} and {platform.value}
+- Include trending hashtags when appropriate
+- Format: #hashtag (one per line)
+- Make them discoverable and engaging
+
+Hashtags:"""
+
+    async def generate_caption(self, provider: AIProvider, category: ContentCategory, 
+                             platform: Platform, content_description: str,
+                             use_cache: bool = True) -> AIResponse:
+        """Generate a caption using the specified AI provider
+
+        Errors come back as a failed AIResponse, except RateLimitExceeded,
+        which is raised so the request can be answered with 503 and Retry-After.
+        """
+        start_time = time.time()
+        cache_key = generation_cache.make_key(
+            "caption", provider.value, category.value, platform.value, content_description
+        )
+        
+        try:
+            if use_cache:
+                cached_caption = await generation_cache.get(cache_key)
+                if cached_caption is not None:
+                    return AIResponse(
+                        provider=provider,
+                        caption=cached_caption,
+                        generation_time=time.time() - start_time,
+                        success=True,
+                        cached=True
+                    )
+            else:
+                generation_cache.record_bypass()
+            
+            prompt = self._caption_prompt(category, platform, content_description)
+            system_message = self._category_system_message(provider, category)
+            response = await self._send_message(provider, system_message, prompt)
             
             generation_time = time.time() - start_time
+            await generation_cache.set(cache_key, response.strip())
             
             return AIResponse(
                 provider=provider,
@@ -157,6 +321,8 @@ Caption:"""
                 success=True
             )
             
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             generation_time = time.time() - start_time
             logger.error(f"Error generating caption with {provider.value}: {e}")
@@ -170,28 +336,25 @@ Caption:"""
             )
 
     async def generate_hashtags(self, category: ContentCategory, platform: Platform, 
-                              content_description: str) -> List[str]:
+                              content_description: str, use_cache: bool = True) -> List[str]:
         """Generate relevant hashtags for the content"""
+        cache_key = generation_cache.make_key(
+            "hashtags", AIProvider.OPENAI.value, category.value, platform.value, content_description
+        )
+        
         try:
-            # Use OpenAI for hashtag generation
-            chat = await self.create_ai_chat(AIProvider.OPENAI, category)
+            if use_cache:
+                cached_hashtags = await generation_cache.get(cache_key)
+                if cached_hashtags is not None:
+                    return list(cached_hashtags)
+            else:
+                generation_cache.record_bypass()
             
-            prompt = f"""
-Generate 15 relevant hashtags for this {category.value} content on {platform.value}:
-
-Content: {content_description}
-
-Requirements:
-- Mix of popular and niche hashtags
-- Relevant to {category.value} and {platform.value}
-- Include trending hashtags when appropriate
-- Format: #hashtag (one per line)
-- Make them discoverable and engaging
-
-Hashtags:"""
+            prompt = self._hashtag_prompt(category, platform, content_description)
 
-            message = UserMessage(text=prompt)
-            response = await chat.send_message(message)
+            # Use OpenAI for hashtag generation
+            system_message = self._category_system_message(AIProvider.OPENAI, category)
+            response = await self._send_message(AIProvider.OPENAI, system_message, prompt)
             
             # Parse hashtags from response
             hashtags = []
@@ -202,7 +365,9 @@ Hashtags:"""
                 elif line and not line.startswith('#'):
                     hashtags.append(f"#{line}")
             
-            return hashtags[:15]  # Limit to 15 hashtags
+            hashtags = hashtags[:15]  # Limit to 15 hashtags
+            await generation_cache.set(cache_key, hashtags)
+            return hashtags
             
         except Exception as e:
             logger.error(f"Error generating hashtags: {e}")
@@ -235,35 +400,108 @@ Hashtags:"""
         
         return hashtags[:15]
 
-    async def generate_combined_content(self, category: ContentCategory, platform: Platform,
-                                      content_description: str, selected_providers: List[str]) -> Dict:
-        """Generate content using multiple AI providers and return combined results"""
-        ai_responses = []
-        captions = {}
-        
-        # Generate content from each provider
-        for provider_name in selected_providers:
-            try:
-                provider = AIProvider(provider_name)
-                response = await self.generate_caption(provider, category, platform, content_description)
-                ai_responses.append(response)
-                captions[provider_name] = response.caption
-            except Exception as e:
-                logger.error(f"Error generating content with {provider_name}: {e}")
-                error_response = AIResponse(
-                    provider=AIProvider(provider_name),
-                    caption=f"Error: {str(e)}",
-                    generation_time=0,
-                    success=False,
-                    error=str(e)
+    async def stream_combined_content(self, category: ContentCategory, platform: Platform,
+                                      content_description: str, selected_providers: List[str],
+                                      provider_timeout: Optional[float] = None,
+                                      request_budget: Optional[float] = None,
+                                      use_cache: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """Generate content from multiple AI providers, yielding results as they finish
+
+        All providers and the hashtag call run concurrently. Each provider gets
+        ``provider_timeout`` seconds and the whole fan-out gets ``request_budget``
+        seconds; anything still running after that is reported as timed out.
+        Yields ``("caption", AIResponse)`` per provider and ``("hashtags", list)``
+        in completion order, then ``("result", dict)`` with the combined result.
+        A provider's RateLimitExceeded is raised rather than reported as a
+        failed caption.
+        """
+        provider_timeout = provider_timeout or self.provider_timeout
+        request_budget = request_budget or self.request_budget
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        deadline = start_time + request_budget
+
+        providers = [AIProvider(provider_name) for provider_name in selected_providers]
+        caption_tasks = {
+            asyncio.create_task(asyncio.wait_for(
+                self.generate_caption(provider, category, platform, content_description, use_cache),
+                timeout=provider_timeout
+            )): provider
+            for provider in providers
+        }
+        hashtag_task = asyncio.create_task(asyncio.wait_for(
+            self.generate_hashtags(category, platform, content_description, use_cache),
+            timeout=provider_timeout
+        ))
+
+        def failed_response(provider: AIProvider, error: str) -> AIResponse:
+            logger.error(f"Error generating content with {provider.value}: {error}")
+            return AIResponse(
+                provider=provider,
+                caption=f"Error: {error}",
+                generation_time=loop.time() - start_time,
+                success=False,
+                error=error
+            )
+
+        responses: Dict[AIProvider, AIResponse] = {}
+        hashtags = None
+        pending = {*caption_tasks, hashtag_task}
+        try:
+            # Hand out results as they finish, but never past the overall request budget
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(deadline - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
                 )
-                ai_responses.append(error_response)
-                captions[provider_name] = f"Error: {str(e)}"
-        
-        # Generate hashtags
-        hashtags = await self.generate_hashtags(category, platform, content_description)
+                if not done:
+                    break
+                for task in done:
+                    if task is hashtag_task:
+                        if task.exception() is None:
+                            hashtags = task.result()
+                        else:
+                            logger.error("Hashtag generation timed out, using default hashtags")
+                            hashtags = self.get_default_hashtags(category, platform)
+                        yield "hashtags", hashtags
+                        continue
+
+                    provider = caption_tasks[task]
+                    if isinstance(task.exception(), RateLimitExceeded):
+                        raise task.exception()
+                    if isinstance(task.exception(), asyncio.TimeoutError):
+                        responses[provider] = failed_response(provider, f"Timed out after {provider_timeout:.0f}s")
+                    elif task.exception() is not None:
+                        responses[provider] = failed_response(provider, str(task.exception()))
+                    else:
+                        responses[provider] = task.result()
+                    yield "caption", responses[provider]
+
+            # Whatever is left missed the request budget
+            for task in pending:
+                task.cancel()
+                if task is hashtag_task:
+                    logger.error("Hashtag generation timed out, using default hashtags")
+                    hashtags = self.get_default_hashtags(category, platform)
+                    yield "hashtags", hashtags
+                else:
+                    provider = caption_tasks[task]
+                    responses[provider] = failed_response(
+                        provider, f"Timed out after {request_budget:.0f}s request budget"
+                    )
+                    yield "caption", responses[provider]
+            pending = set()
+        finally:
+            # The consumer went away early; don't leave provider calls running
+            for task in pending:
+                task.cancel()
+
+        ai_responses = [responses[provider] for provider in caption_tasks.values()]
+        yield "result", self._combine_responses(ai_responses, hashtags)
+
+    def _combine_responses(self, ai_responses: List[AIResponse], hashtags: List[str]) -> Dict:
+        """Combined result from successful responses"""
+        captions = {response.provider.value: response.caption for response in ai_responses}
         
-        # Create combined result from successful responses
         successful_captions = [resp.caption for resp in ai_responses if resp.success and resp.caption]
         if successful_captions:
             combined_result = f"🎯 AI-Generated Content Suite:\n\n" + "\n\n".join(successful_captions)
@@ -276,6 +514,184 @@ Hashtags:"""
             "hashtags": hashtags,
             "combined_result": combined_result
         }
+
+    async def generate_combined_content(self, category: ContentCategory, platform: Platform,
+                                      content_description: str, selected_providers: List[str],
+                                      provider_timeout: Optional[float] = None,
+                                      request_budget: Optional[float] = None,
+                                      use_cache: bool = True) -> Dict:
+        """Generate content using multiple AI providers and return combined results
+
+        Providers run concurrently under the deadlines described in
+        ``stream_combined_content``. Pass ``use_cache=False`` to skip the
+        generation cache for this request.
+        """
+        result = None
+        async for event, payload in self.stream_combined_content(
+            category, platform, content_description, selected_providers,
+            provider_timeout=provider_timeout, request_budget=request_budget, use_cache=use_cache
+        ):
+            if event == "result":
+                result = payload
+        return result
+
+    def _packed_prompt(self, category: ContentCategory, platform: Platform, content_descriptions: List[str]) -> str:
+        """One prompt asking for a caption and hashtags for each of several descriptions"""
+        platform_guide = self.platform_guidelines.get(platform, "")
+        numbered = "\n".join(
+            f"{number}. {' '.join(description.split())}" for number, description in enumerate(content_descriptions, 1)
+        )
+        shape = json.dumps([
+            {"index": number, "caption": "<caption>", "hashtags": ["#hashtag"]}
+            for number in range(1, len(content_descriptions) + 1)
+        ])
+        return f"""
+Create an engaging social media caption for {platform.value} and 15 relevant hashtags for each of these {len(content_descriptions)} pieces of content:
+
+{numbered}
+
+Platform Guidelines: {platform_guide}
+
+Requirements:
+- Make each caption engaging and shareable
+- Include appropriate emojis
+- Write in a conversational tone
+- Focus on the {category.value} niche
+- Mix popular and niche hashtags relevant to {category.value} and {platform.value}
+- Write every caption independently; never refer to the other items
+
+Respond with only a JSON array, one object per content item, in this exact shape:
+{shape}"""
+
+    @staticmethod
+    def _packed_max_tokens(count: int) -> int:
+        """Completion budget for a packed prompt of ``count`` descriptions"""
+        return 250 * count + 200
+
+    @staticmethod
+    def _parse_packed_response(response: str, count: int) -> Dict[int, Tuple[str, List[str]]]:
+        """Caption and hashtags by 0-based position from a packed JSON response; unusable entries are skipped"""
+        start, end = response.find("["), response.rfind("]")
+        if start < 0 or end < start:
+            raise ValueError("Packed response contains no JSON array")
+        entries = json.loads(response[start:end + 1])
+        
+        parsed = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                position = int(entry.get("index")) - 1
+            except (TypeError, ValueError):
+                continue
+            caption = entry.get("caption")
+            if not 0 <= position < count or not isinstance(caption, str) or not caption.strip():
+                continue
+            tags = [str(tag).strip() for tag in entry.get("hashtags") or [] if str(tag).strip()]
+            parsed[position] = (caption.strip(), [tag if tag.startswith("#") else f"#{tag}" for tag in tags][:15])
+        return parsed
+
+    async def generate_packed_content(self, category: ContentCategory, platform: Platform,
+                                      content_descriptions: List[str], selected_providers: List[str],
+                                      provider_timeout: Optional[float] = None,
+                                      use_cache: bool = True) -> List[Optional[Dict]]:
+        """Generate content for several short descriptions with one prompt per provider
+
+        Each provider is asked for a JSON array holding a caption and hashtags
+        per description, so N items cost one round trip per provider instead
+        of N caption calls plus N hashtag calls. Returns one result per
+        description shaped like ``generate_combined_content``'s, or None where
+        no provider answered for that description; callers should generate
+        those on their own.
+        """
+        provider_timeout = provider_timeout or self.packed_timeout
+        providers = [AIProvider(provider_name) for provider_name in selected_providers]
+        count = len(content_descriptions)
+        captions: Dict[AIProvider, Dict[int, str]] = {provider: {} for provider in providers}
+        cached: Dict[AIProvider, Set[int]] = {provider: set() for provider in providers}
+        hashtags: Dict[int, List[str]] = {}
+        errors: Dict[AIProvider, str] = {}
+        call_times: Dict[AIProvider, float] = {}
+        
+        def cache_key(kind: str, provider: AIProvider, position: int) -> str:
+            return generation_cache.make_key(
+                kind, provider.value, category.value, platform.value, content_descriptions[position]
+            )
+        
+        if use_cache:
+            for position in range(count):
+                for provider in providers:
+                    cached_caption = await generation_cache.get(cache_key("caption", provider, position))
+                    if cached_caption is not None:
+                        captions[provider][position] = cached_caption
+                        cached[provider].add(position)
+                cached_hashtags = await generation_cache.get(cache_key("hashtags", AIProvider.OPENAI, position))
+                if cached_hashtags is not None:
+                    hashtags[position] = list(cached_hashtags)
+        else:
+            generation_cache.record_bypass()
+        
+        async def generate(provider: AIProvider):
+            positions = [position for position in range(count) if position not in captions[provider]]
+            if not positions:
+                return
+            start_time = time.time()
+            prompt = self._packed_prompt(category, platform, [content_descriptions[p] for p in positions])
+            try:
+                response = await asyncio.wait_for(
+                    self._send_message(
+                        provider, self._category_system_message(provider, category), prompt,
+                        max_tokens=self._packed_max_tokens(len(positions))
+                    ),
+                    timeout=provider_timeout
+                )
+                parsed = self._parse_packed_response(response, len(positions))
+            except asyncio.TimeoutError:
+                errors[provider] = f"Timed out after {provider_timeout:.0f}s"
+            except Exception as e:
+                logger.error(f"Error generating packed content with {provider.value}: {e}")
+                errors[provider] = str(e)
+            else:
+                for offset, (caption, tags) in parsed.items():
+                    position = positions[offset]
+                    captions[provider][position] = caption
+                    await generation_cache.set(cache_key("caption", provider, position), caption)
+                    if tags and position not in hashtags:
+                        hashtags[position] = tags
+                        await generation_cache.set(cache_key("hashtags", AIProvider.OPENAI, position), tags)
+            call_times[provider] = time.time() - start_time
+        
+        await asyncio.gather(*(generate(provider) for provider in providers))
+        
+        results: List[Optional[Dict]] = []
+        for position in range(count):
+            if not any(position in captions[provider] for provider in providers):
+                results.append(None)
+                continue
+            ai_responses = []
+            for provider in providers:
+                if position in captions[provider]:
+                    from_cache = position in cached[provider]
+                    ai_responses.append(AIResponse(
+                        provider=provider,
+                        caption=captions[provider][position],
+                        generation_time=0.0 if from_cache else call_times.get(provider, 0.0),
+                        success=True,
+                        cached=from_cache
+                    ))
+                else:
+                    error = errors.get(provider, "Missing from packed response")
+                    ai_responses.append(AIResponse(
+                        provider=provider,
+                        caption=f"Error: {error}",
+                        generation_time=call_times.get(provider, 0.0),
+                        success=False,
+                        error=error
+                    ))
+            results.append(self._combine_responses(
+                ai_responses, hashtags.get(position) or self.get_default_hashtags(category, platform)
+            ))
+        return results
     
     def get_provider_info(self, provider: AIProvider = None) -> Dict:
         """Get information about AI providers"""
@@ -288,7 +704,7 @@ Hashtags:"""
         available = []
         
         for provider in AIProvider:
-            # Check if API key is available
+            # Check if API key is available (the offline stub backend needs none)
             is_available = True
             if provider == AIProvider.OPENAI and not self.openai_key:
                 is_available = False
@@ -298,20 +714,75 @@ Hashtags:"""
                 is_available = False
             elif provider == AIProvider.PERPLEXITY and not self.perplexity_key:
                 is_available = False
+            if is_stub_backend():
+                is_available = True
             
             provider_info = self.provider_capabilities.get(provider, {})
             available.append({
                 "provider": provider.value,
                 "available": is_available,
                 "model": self.model_versions.get(provider, ""),
+                "circuit_breaker": self.get_circuit_status(provider),
+                "telemetry": provider_telemetry.get_summary(provider),
                 **provider_info
             })
         
         return available
     
-    async def generate_content(self, prompt: str, provider: str = "openai", max_tokens: int = 2000) -> str:
-        """Generic content generation method for competitor analysis and other services"""
+    def get_circuit_status(self, provider: AIProvider) -> Dict:
+        """Get circuit breaker state and trip counts for a provider"""
+        return circuit_breakers.get(provider).get_status()
+    
+    def get_telemetry(self, provider: AIProvider) -> Dict:
+        """Get live latency percentiles, success rate and throughput for a provider"""
+        return provider_telemetry.get_summary(provider)
+    
+    def is_accepting_requests(self, provider: AIProvider) -> bool:
+        """Whether the provider's circuit is not currently open (an open one due a probe counts as accepting)"""
+        return not circuit_breakers.get(provider).is_open()
+    
+    def check_admission(self, providers: List[str]):
+        """Raise RateLimitExceeded if any of the providers' wait queues is already full"""
+        for provider_name in providers:
+            rate_limiters.get(AIProvider(provider_name)).check_admission()
+    
+    def get_rate_limit_status(self) -> List[Dict]:
+        """Get rate limiter queue depth and admission counters per provider"""
+        return rate_limiters.get_status()
+    
+    def get_coalescing_stats(self) -> Dict:
+        """Get single-flight counters for generate_content"""
+        return content_flights.get_stats()
+    
+    def get_routing_stats(self) -> Dict:
+        """Get how often auto routing picked each provider"""
+        return provider_router.get_stats()
+    
+    def get_client_pool_stats(self) -> List[Dict]:
+        """Get LLM client pool hit/miss metrics per provider"""
+        return llm_client_pool.get_stats()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get generation cache hit/miss metrics"""
+        return generation_cache.get_stats()
+    
+    async def generate_content(self, prompt: str, provider: Optional[str] = None, max_tokens: int = 2000,
+                               hedge: Optional[bool] = None, category: Optional[str] = None,
+                               latency_sla: Optional[float] = None) -> str:
+        """Generic content generation method for competitor analysis and other services
+
+        ``provider="auto"`` (or AI_DEFAULT_PROVIDER=auto when no provider is
+        given) routes to the best provider right now for ``category`` within
+        ``latency_sla`` seconds. With hedging on (``hedge`` or
+        AI_HEDGING_ENABLED), a slow or failing provider is backed up by the
+        fastest other available provider. RateLimitExceeded is raised; other
+        errors are returned as an error string.
+        """
+        provider = provider or self.default_provider
         try:
+            if provider == AUTO_PROVIDER:
+                provider = self.select_providers(category, latency_sla=latency_sla)[0].value
+            
             # Map provider names to AIProvider enum
             provider_map = {
                 "openai": AIProvider.OPENAI,
@@ -325,42 +796,16 @@ Hashtags:"""
             
             ai_provider = provider_map[provider]
             
-            # Create a generic chat instance
-            session_id = f"{provider}_generic_{int(time.time())}"
-            system_message = "You are a helpful AI assistant that provides detailed, accurate, and actionable insights."
-            
-            if ai_provider == AIProvider.OPENAI:
-                chat = LlmChat(
-                    api_key=self.openai_key,
-                    session_id=session_id,
-                    system_message=system_message
-                ).with_model("openai", "gpt-4o").with_max_tokens(max_tokens)  # Latest GPT-4o
-                
-            elif ai_provider == AIProvider.ANTHROPIC:
-                chat = LlmChat(
-                    api_key=self.anthropic_key,
-                    session_id=session_id,
-                    system_message=system_message
-                ).with_model("anthropic", "claude-3-5-sonnet-20241022").with_max_tokens(max_tokens)  # Latest Claude 3.5 Sonnet
-                
-            elif ai_provider == AIProvider.GEMINI:
-                chat = LlmChat(
-                    api_key=self.gemini_key,
-                    session_id=session_id,
-                    system_message=system_message
-                ).with_model("gemini", "gemini-2.0-flash-exp").with_max_tokens(max_tokens)  # Latest Gemini 2.0 Flash Experimental
-                
-            elif ai_provider == AIProvider.PERPLEXITY:
-                if not self.perplexity_key:
-                    raise ValueError("Perplexity API key not configured")
-                chat = LlmChat(
-                    api_key=self.perplexity_key,
-                    session_id=session_id,
-                    system_message=system_message + " Use current web data and real-time information for accurate insights."
-                ).with_model("perplexity", "sonar-pro").with_max_tokens(max_tokens)  # Real-time web search
+            hedge = self.hedging_enabled if hedge is None else hedge
+            backup = self._pick_backup_provider(ai_provider) if hedge else None
             
-            message = UserMessage(text=prompt)
-            response = await chat.send_message(message)
+            if backup:
+                send = lambda: self._send_hedged(ai_provider, backup, prompt, max_tokens)
+            else:
+                send = lambda: self._send_message(
+                    ai_provider, self._generic_system_message(ai_provider), prompt, max_tokens
+                )
+            response = await content_flights.do((ai_provider, max_tokens, backup, prompt), send)
             
             # Handle different response types
             if hasattr(response, 'text'):
@@ -370,6 +815,8 @@ Hashtags:"""
             else:
                 return str(response)
             
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating content with {provider}: {e}")
             return f"Error generating content: {str(e)}"
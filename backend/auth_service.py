@@ -5,7 +5,9 @@ import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ASCENDING
 from models import User, UserCreate, LoginRequest, SignupRequest, TeamSignupRequest, GoogleLoginRequest, TeamCode, UserTier, AuthProvider
+from database import register_indexes
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -327,5 +329,10 @@ class AuthService:
             for member in team_members
         ]
 
+register_indexes("team_codes", [
+    IndexModel([("code", ASCENDING), ("is_active", ASCENDING)]),
+    IndexModel([("created_by", ASCENDING)]),
+])
+
 # Create global auth service instance
 auth_service = AuthService()
\ No newline at end of file
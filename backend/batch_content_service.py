@@ -1,179 +1,1150 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Optional, Set, Tuple
 import asyncio
+import base64
+import codecs
+import csv
+import io
+import json
+import os
+import socket
+import time
+from collections import deque, OrderedDict
 from datetime import datetime, timedelta
 import uuid
 import logging
+from pymongo import IndexModel, ReplaceOne, ReturnDocument, ASCENDING, DESCENDING
+from fastapi.encoders import jsonable_encoder
 from models import *
 from ai_service import ai_service
-from database import get_database
+from rate_limiter import request_priority, RequestPriority
+from batch_job_queue import batch_job_queue
+from batch_scheduler import batch_scheduler
+from batch_estimator import batch_estimator
+from batch_events import batch_event_bus, webhook_sender
+from database import get_database, register_indexes
+from pagination import KEYSET_SORT, keyset_query
 
 logger = logging.getLogger(__name__)
 
+# Status polls return the small fixed-size batch document: no job parameters or legacy embedded results
+BATCH_STATUS_PROJECTION = {"_id": 0, "job": 0, "results": 0}
+
+# Upper bound on descriptions per packed prompt, whatever the request asks for
+MAX_PACK_SIZE = 25
+
+def encode_results_cursor(batch_index: int) -> str:
+    """Opaque cursor pointing just past one batch result"""
+    return base64.urlsafe_b64encode(json.dumps({"i": batch_index}).encode()).decode()
+
+def decode_results_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid results cursor")
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 and yield it line by line"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_ndjson_descriptions(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Content descriptions from NDJSON: one JSON string, or object with content_description/description, per line"""
+    line_number = 0
+    async for line in iter_lines(chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            raise ValueError(f"Line {line_number} is not valid JSON")
+        if isinstance(value, dict):
+            value = value.get("content_description") or value.get("description")
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Line {line_number} has no content description")
+        yield value
+
+async def iter_csv_descriptions(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Content descriptions from CSV: the content_description or description column, else the first column"""
+    column = None
+    row_lines: List[str] = []
+    async for line in iter_lines(chunks):
+        # A quoted field may span lines; gather lines until the quotes balance
+        row_lines.append(line)
+        if sum(part.count('"') for part in row_lines) % 2:
+            continue
+        row = next(csv.reader(io.StringIO("\n".join(row_lines))), [])
+        row_lines = []
+        if not any(cell.strip() for cell in row):
+            continue
+        if column is None:
+            header = [cell.strip().lower() for cell in row]
+            column = next((header.index(name) for name in ("content_description", "description") if name in header), 0)
+            continue
+        if column < len(row) and row[column].strip():
+            yield row[column]
+
+class BatchItemLimitExceeded(ValueError):
+    """An uploaded batch has more items than the user's tier allows"""
+
+class BatchItemsAborted(Exception):
+    """The batch of the items being generated was cancelled"""
+
 class BatchContentService:
     def __init__(self):
         self.db = None
+        
+        # Items generated in parallel per batch, and across every batch in this worker process
+        self.item_concurrency = int(os.environ.get('BATCH_ITEM_CONCURRENCY', '4'))
+        self.global_concurrency = int(os.environ.get('BATCH_GLOBAL_CONCURRENCY', '16'))
+        
+        # Queue workers (disable in API-only processes and run batch_worker.py instead)
+        self.workers_enabled = os.environ.get('BATCH_WORKERS_ENABLED', 'true').lower() == 'true'
+        self.poll_interval = float(os.environ.get('BATCH_QUEUE_POLL_SECONDS', '1'))
+        # How often to look for batches cancelled through another process
+        self.cancel_poll_interval = float(os.environ.get('BATCH_CANCEL_POLL_SECONDS', '2'))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._worker_task: Optional[asyncio.Task] = None
+        self._work_available: Optional[asyncio.Event] = None
+        # Packed batches send up to this many items per provider prompt
+        self.pack_size = int(os.environ.get('BATCH_PACK_SIZE', '8'))
+        
+        # item task -> its leased items (several for a pack), and tasks in flight per batch and user
+        self._running: Dict[asyncio.Task, List[Dict]] = {}
+        self._batch_active: Dict[str, int] = {}
+        self._user_active: Dict[str, int] = {}
+        # item task -> the provider call it is waiting on, and cancelled batches with tasks still running
+        self._generations: Dict[asyncio.Task, asyncio.Future] = {}
+        self._aborted_batches: Set[str] = set()
+        # Batch parameters loaded by this worker, most recent last
+        self._batch_jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        
+        # Uploaded items are queued in chunks of this many as they are parsed
+        self.ingest_chunk_size = int(os.environ.get('BATCH_INGEST_CHUNK_SIZE', '500'))
+        
+        # Finished items are written in bulk once the buffer fills up or ages out
+        self.flush_size = int(os.environ.get('BATCH_FLUSH_SIZE', '50'))
+        self.flush_interval = float(os.environ.get('BATCH_FLUSH_SECONDS', '2'))
+        self._pending_results: List[Tuple[Dict, GenerationResult]] = []
+        self._pending_failures: Dict[str, int] = {}
+        # Per-item progress events of failed items, published with the next flush
+        self._pending_events: Dict[str, List[Dict]] = {}
+        # What a failed flush completed but couldn't count, or whose duplicates it couldn't settle
+        self._pending_completed: Dict[str, int] = {}
+        self._pending_originals: Dict[str, Dict[int, GenerationResult]] = {}
+        # Results taken out of the buffer by the flush in progress; their leases still need renewing
+        self._flushing: List[Tuple[Dict, GenerationResult]] = []
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_wanted: Optional[asyncio.Event] = None
+        
+        # Recent per-item generation times and completion timestamps, for estimates and throughput
+        self._item_seconds = deque(maxlen=200)
+        self._completions = deque(maxlen=5000)
+        self.throughput_window = 300
     
     async def initialize(self):
         """Initialize database connection"""
         if not self.db:
             self.db = get_database()
     
-    async def create_batch_generation(self, request: BatchGenerationRequest) -> BatchGenerationResult:
-        """Create a new batch generation job"""
+    def _batch_concurrency(self, request: BatchGenerationRequest) -> int:
+        """Items (or packs) of this batch to run in parallel on one worker"""
+        limit = request.max_concurrency or self.item_concurrency
+        return max(1, min(limit, self.item_concurrency, self.global_concurrency))
+    
+    def _pack_size(self, request: BatchGenerationRequest) -> int:
+        """Items per provider prompt for this batch"""
+        if not request.packed:
+            return 1
+        return max(1, min(request.pack_size or self.pack_size, MAX_PACK_SIZE))
+    
+    def get_throughput(self) -> float:
+        """Items finished per minute by this worker over the recent window"""
+        cutoff = time.time() - self.throughput_window
+        while self._completions and self._completions[0] < cutoff:
+            self._completions.popleft()
+        return len(self._completions) * 60 / self.throughput_window
+    
+    async def get_worker_stats(self) -> Dict[str, Any]:
+        """Concurrency limits, items in flight, recent throughput and queue depth"""
         await self.initialize()
-        
-        # Estimate completion time (roughly 5 seconds per item per provider)
-        estimated_time = len(request.content_descriptions) * len(request.ai_providers) * 5
-        estimated_completion = datetime.utcnow() + timedelta(seconds=estimated_time)
-        
+        return {
+            "worker_id": self.worker_id,
+            "workers_enabled": self.workers_enabled,
+            "item_concurrency": self.item_concurrency,
+            "global_concurrency": self.global_concurrency,
+            "active_items": sum(len(items) for items in self._running.values()),
+            "throughput_per_minute": round(self.get_throughput(), 2),
+            "median_item_seconds": (
+                round(sorted(self._item_seconds)[len(self._item_seconds) // 2], 2) if self._item_seconds else None
+            ),
+            "queue": await batch_job_queue.get_stats(),
+            "scheduler": batch_scheduler.get_stats(),
+            "events": batch_event_bus.get_stats(),
+            "webhooks": webhook_sender.get_stats()
+        }
+    
+    async def estimate_batch(self, request: BatchGenerationRequest) -> Dict[str, Any]:
+        """Dry run: expected duration range, tokens and cost of a batch request, without creating it"""
+        await self.initialize()
+        return await batch_estimator.estimate(
+            request, self._batch_concurrency(request), self._pack_size(request), self.global_concurrency
+        )
+    
+    async def _estimate_completion(self, request: BatchGenerationRequest, items: int,
+                                   include_queue: bool = True) -> Dict[str, Any]:
+        """Completion time range for ``items`` more items, as batch document fields"""
+        duration = await batch_estimator.estimate_duration(
+            request, items, self._batch_concurrency(request), self._pack_size(request), self.global_concurrency,
+            include_queue=include_queue
+        )
+        now = datetime.utcnow()
+        low = now + timedelta(seconds=duration["duration_seconds_low"])
+        return {
+            "estimated_completion": low,
+            "estimated_completion_range": [low, now + timedelta(seconds=duration["duration_seconds_high"])]
+        }
+    
+    async def _insert_batch(self, request: BatchGenerationRequest, total_items: int, user_tier: UserTier,
+                            ingesting: bool = False, unique_items: Optional[int] = None) -> BatchGenerationResult:
+        """Save a new batch with the parameters any worker needs to process its items"""
         batch_result = BatchGenerationResult(
             user_id=request.user_id,
             batch_name=request.batch_name or f"Batch {datetime.utcnow().strftime('%Y%m%d_%H%M%S')}",
             category=request.category,
             platform=request.platform,
-            total_items=len(request.content_descriptions),
-            estimated_completion=estimated_completion,
-            status="pending"
+            total_items=total_items,
+            status="pending" if total_items or ingesting else "completed",
+            **await self._estimate_completion(request, total_items if unique_items is None else unique_items)
         )
+        batch_doc = batch_result.dict()
+        batch_doc["ingesting"] = ingesting
+        batch_doc["job"] = {
+            **request.dict(exclude={"content_descriptions"}),
+            "concurrency": self._batch_concurrency(request),
+            "tier": user_tier.value
+        }
+        await self.db.batch_generation_results.insert_one(batch_doc)
+        return batch_result
+    
+    def _notify_workers(self):
+        if self._work_available is not None:
+            self._work_available.set()
+    
+    async def create_batch_generation(self, request: BatchGenerationRequest,
+                                      user_tier: UserTier = UserTier.FREE) -> BatchGenerationResult:
+        """Create a new batch generation job and queue its items for the workers
+
+        ``user_tier`` sets the batch's weight in fair-share scheduling.
+        """
+        await self.initialize()
         
-        # Save to database
-        await self.db.batch_generation_results.insert_one(batch_result.dict())
-        
-        # Start batch processing in background
-        asyncio.create_task(self._process_batch(request, batch_result.id))
+        unique_items = len(request.content_descriptions)
+        if request.dedupe:
+            unique_items = len({batch_job_queue.description_key(d) for d in request.content_descriptions})
+        batch_result = await self._insert_batch(
+            request, len(request.content_descriptions), user_tier, unique_items=unique_items
+        )
+        duplicates = await batch_job_queue.enqueue(
+            batch_result.id, request.user_id, request.content_descriptions, tier=user_tier.value,
+            seen={} if request.dedupe else None
+        )
+        if duplicates:
+            batch_result.duplicate_items = len(duplicates)
+            await self.db.batch_generation_results.update_one(
+                {"id": batch_result.id}, {"$set": {"duplicate_items": batch_result.duplicate_items}}
+            )
+        self._notify_workers()
         
         return batch_result
     
-    async def _process_batch(self, request: BatchGenerationRequest, batch_id: str):
-        """Process batch generation in background"""
+    async def ingest_batch_stream(self, request: BatchGenerationRequest, descriptions: AsyncIterator[str],
+                                  max_items: Optional[int] = None,
+                                  user_tier: UserTier = UserTier.FREE) -> BatchGenerationResult:
+        """Create a batch from a stream of content descriptions, queueing items as they arrive
+
+        Workers start on the first chunk while the rest is still being read,
+        and the batch can't finish until the stream ends. If the stream is
+        invalid or exceeds ``max_items`` (BatchItemLimitExceeded) the batch
+        is cancelled and the ValueError re-raised. Subscribers get the
+        cancelled batch's summary; its webhook isn't called, since the upload
+        was rejected rather than run.
+        """
+        await self.initialize()
+        
+        batch_result = await self._insert_batch(request, 0, user_tier, ingesting=True)
+        batch_id = batch_result.id
+        total_items = 0
+        duplicate_items = 0
+        chunk: List[str] = []
+        # Repeats are detected across the whole upload, not just within a chunk
+        seen: Optional[Dict[str, int]] = {} if request.dedupe else None
+        
+        async def enqueue_chunk():
+            nonlocal total_items, duplicate_items
+            start_index = total_items
+            duplicates = await batch_job_queue.enqueue(
+                batch_id, request.user_id, chunk, start_index=start_index, tier=user_tier.value, seen=seen
+            )
+            total_items += len(chunk)
+            duplicate_items += len(duplicates)
+            await self.db.batch_generation_results.update_one(
+                {"id": batch_id}, {"$set": {"total_items": total_items, "duplicate_items": duplicate_items}}
+            )
+            chunk.clear()
+            self._notify_workers()
+            # Repeats of items from earlier chunks that may already have finished
+            await self._resolve_late_duplicates(
+                batch_id, [duplicate for duplicate in duplicates if duplicate["duplicate_of"] < start_index]
+            )
+        
         try:
-            await self.initialize()
-            
-            # Update status to processing
+            async for description in descriptions:
+                if max_items is not None and total_items + len(chunk) >= max_items:
+                    raise BatchItemLimitExceeded(f"Batch exceeds the limit of {max_items} items")
+                chunk.append(description)
+                if len(chunk) >= self.ingest_chunk_size:
+                    await enqueue_chunk()
+            if chunk:
+                await enqueue_chunk()
+        except BaseException:
             await self.db.batch_generation_results.update_one(
                 {"id": batch_id},
-                {"$set": {"status": "processing"}}
+                {"$set": {"status": "cancelled", "ingesting": False, "completed_at": datetime.utcnow()}}
             )
-            
-            results = []
-            completed_count = 0
-            failed_count = 0
-            
-            for i, content_description in enumerate(request.content_descriptions):
-                try:
-                    # Generate content for this item
-                    content_result = await ai_service.generate_combined_content(
-                        category=request.category,
-                        platform=request.platform,
-                        content_description=content_description,
-                        selected_providers=[p.value for p in request.ai_providers]
-                    )
-                    
-                    # Create generation result
-                    generation_result = GenerationResult(
-                        user_id=request.user_id,
-                        category=request.category,
-                        platform=request.platform,
-                        content_description=content_description,
-                        ai_responses=content_result["ai_responses"],
-                        hashtags=content_result["hashtags"],
-                        combined_result=content_result["combined_result"]
-                    )
-                    
-                    # Save individual result
-                    await self.db.generation_results.insert_one(generation_result.dict())
-                    results.append(generation_result)
-                    completed_count += 1
-                    
-                    # Update batch progress
-                    await self.db.batch_generation_results.update_one(
-                        {"id": batch_id},
-                        {
-                            "$set": {
-                                "completed_items": completed_count,
-                                "failed_items": failed_count
-                            }
-                        }
-                    )
+            await batch_job_queue.cancel_batch(batch_id)
+            self._abort_batch_items(batch_id)
+            await self._announce_completion(batch_id, webhook=False)
+            raise
+        
+        await self.db.batch_generation_results.update_one(
+            {"id": batch_id},
+            {
+                "$set": {
+                    "ingesting": False,
+                    **await self._estimate_completion(request, total_items - duplicate_items),
+                    **({} if total_items else {"status": "completed", "completed_at": datetime.utcnow()})
+                }
+            }
+        )
+        # Items may all have finished while the upload was still streaming
+        await self._record_progress(batch_id)
+        
+        return await self.get_batch_status(batch_id, request.user_id)
+    
+    # Queue workers
+    
+    async def start_workers(self):
+        """Start consuming the batch queue (called on application startup)"""
+        if not self.workers_enabled or self._worker_task is not None:
+            return
+        await self.initialize()
+        self._work_available = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_wanted = asyncio.Event()
+        self._worker_task = asyncio.create_task(self._worker_loop())
+        logger.info(f"Batch worker {self.worker_id} started")
+    
+    async def stop_workers(self):
+        """Stop claiming work, abandon in-flight items, save what already finished and hand the leases back"""
+        if self._worker_task is None:
+            return
+        self._worker_task.cancel()
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(self._worker_task, *self._running, return_exceptions=True)
+        self._worker_task = None
+        try:
+            await self.flush_writes()
+            await batch_job_queue.release(self.worker_id)
+        except Exception as e:
+            logger.error(f"Error releasing batch item leases: {e}")
+        logger.info(f"Batch worker {self.worker_id} stopped")
+    
+    async def _worker_loop(self):
+        """Claim items up to the concurrency limits and run each as its own task"""
+        # Batch AI calls queue behind interactive traffic
+        with request_priority(RequestPriority.BACKGROUND):
+            heartbeat = asyncio.create_task(self._heartbeat_loop())
+            flusher = asyncio.create_task(self._flush_loop())
+            cancel_watch = asyncio.create_task(self._cancel_watch_loop())
+            try:
+                while True:
+                    if len(self._running) >= self.global_concurrency:
+                        await asyncio.wait(list(self._running), return_when=asyncio.FIRST_COMPLETED)
+                        continue
                     
-                    logger.info(f"Batch {batch_id}: Completed item {i+1}/{len(request.content_descriptions)}")
+                    try:
+                        item = await self._claim_next()
+                    except Exception as e:
+                        logger.error(f"Error claiming batch item: {e}")
+                        item = None
                     
-                except Exception as e:
-                    logger.error(f"Error processing batch item {i}: {e}")
-                    failed_count += 1
+                    if item is None:
+                        # Nothing claimable: wait for new work, a free slot, or the next poll
+                        self._work_available.clear()
+                        waiters = [asyncio.create_task(self._work_available.wait()), *self._running]
+                        await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                        waiters[0].cancel()
+                        continue
                     
-                    # Update batch progress
-                    await self.db.batch_generation_results.update_one(
-                        {"id": batch_id},
-                        {
-                            "$set": {
-                                "completed_items": completed_count,
-                                "failed_items": failed_count
-                            }
-                        }
-                    )
+                    batch_scheduler.charge(item)
+                    self._batch_active[item["batch_id"]] = self._batch_active.get(item["batch_id"], 0) + 1
+                    self._user_active[item["user_id"]] = self._user_active.get(item["user_id"], 0) + 1
+                    # Packed batches add more items to this list once the task has loaded the batch
+                    items = [item]
+                    task = asyncio.create_task(self._run_items(items))
+                    self._running[task] = items
+                    task.add_done_callback(lambda finished, item=item: self._item_finished(finished, item))
+            finally:
+                # A flush in progress carries on shielded; stop_workers waits for it
+                for task in (heartbeat, flusher, cancel_watch):
+                    task.cancel()
+                await asyncio.gather(heartbeat, flusher, cancel_watch, return_exceptions=True)
+    
+    async def _claim_next(self) -> Optional[Dict]:
+        """Claim the next item in fair-share order, within the per-batch and per-user limits"""
+        saturated = [
+            batch_id for batch_id, active in self._batch_active.items()
+            if active >= self._batch_jobs.get(batch_id, {}).get("concurrency", self.item_concurrency)
+        ]
+        await batch_scheduler.refresh()
+        # One claim for the user who is next in the cached order; the backlog counts make a miss rare
+        order = batch_scheduler.order_users(self._user_active, self.global_concurrency)
+        if order:
+            item = await batch_job_queue.claim(self.worker_id, saturated, user_id=order[0])
+            if item is not None:
+                return item
+            batch_scheduler.mark_empty(order[0])
+        # Expired leases, work queued since the last refresh, and the stale-backlog case above
+        return await batch_job_queue.claim(
+            self.worker_id, saturated,
+            exclude_users=batch_scheduler.capped_users(self._user_active, self.global_concurrency)
+        )
+    
+    def _item_finished(self, task: asyncio.Task, item: Dict):
+        self._running.pop(task, None)
+        for active, key in ((self._batch_active, item["batch_id"]), (self._user_active, item["user_id"])):
+            active[key] -= 1
+            if active[key] <= 0:
+                del active[key]
+        if item["batch_id"] not in self._batch_active:
+            self._aborted_batches.discard(item["batch_id"])
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Batch item task for {item['batch_id']} failed: {task.exception()}")
+    
+    async def _heartbeat_loop(self):
+        """Keep the leases of in-flight and not yet flushed items alive"""
+        while True:
+            await asyncio.sleep(batch_job_queue.lease_seconds / 3)
+            item_ids = [item["id"] for items in self._running.values() for item in items]
+            item_ids += [item["id"] for item, _ in self._pending_results + self._flushing]
+            try:
+                await batch_job_queue.heartbeat(self.worker_id, item_ids)
+            except Exception as e:
+                logger.error(f"Error renewing batch item leases: {e}")
+    
+    async def _cancel_watch_loop(self):
+        """Abort in-flight items of batches that were cancelled, wherever the cancel request landed"""
+        while True:
+            await asyncio.sleep(self.cancel_poll_interval)
+            if not self._batch_active:
+                continue
+            try:
+                cursor = self.db.batch_generation_results.find(
+                    {"id": {"$in": list(self._batch_active)}, "status": "cancelled"},
+                    {"_id": 0, "id": 1}
+                )
+                async for doc in cursor:
+                    self._abort_batch_items(doc["id"])
+            except Exception as e:
+                logger.error(f"Error checking for cancelled batches: {e}")
+    
+    def _abort_batch_items(self, batch_id: str) -> int:
+        """Cancel the provider calls of this worker's in-flight items for a batch
+
+        Only the calls are cancelled, never the item tasks, so nothing they
+        are writing is interrupted. Tasks that haven't reached their call yet
+        skip it.
+        """
+        aborted = 0
+        if batch_id in self._batch_active:
+            self._aborted_batches.add(batch_id)
+        for task, items in list(self._running.items()):
+            generation = self._generations.get(task)
+            if items[0]["batch_id"] == batch_id and generation is not None and not generation.done():
+                generation.cancel()
+                aborted += len(items)
+        self._batch_jobs.pop(batch_id, None)
+        if aborted:
+            logger.info(f"Batch {batch_id} cancelled: aborted {aborted} in-flight items")
+        return aborted
+    
+    async def _flush_loop(self):
+        """Flush buffered writes every ``flush_interval`` seconds, or as soon as the buffer fills up
+
+        The only place workers flush from, so item tasks (which get cancelled
+        with their batch) never own a write that other batches' results share.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wanted.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wanted.clear()
+            try:
+                await self.flush_writes()
+            except Exception as e:
+                logger.error(f"Error flushing batch results: {e}")
+    
+    async def flush_writes(self):
+        """Write buffered results and item completions in bulk, then update each batch's progress once
+
+        The writes run shielded: cancelling the caller doesn't stop a flush
+        partway, and the next flush waits for it to finish.
+        """
+        await asyncio.shield(self._write_buffered())
+    
+    async def _write_buffered(self):
+        async with self._flush_lock:
+            pending, self._pending_results = self._pending_results, []
+            self._flushing = pending
+            completed, self._pending_completed = self._pending_completed, {}
+            failures, self._pending_failures = self._pending_failures, {}
+            events, self._pending_events = self._pending_events, {}
+            finished, self._pending_originals = self._pending_originals, {}
             
-            # Update final batch status
-            final_status = "completed" if failed_count == 0 else "partially_completed"
-            if failed_count == len(request.content_descriptions):
-                final_status = "failed"
+            def item_event(item: Dict, generation_result: GenerationResult, **extra) -> Dict:
+                return batch_event_bus.make_event(item["batch_id"], batch_event_bus.ITEM, {
+                    "index": item["index"], "status": "completed", "result_id": generation_result.id, **extra
+                })
             
-            await self.db.batch_generation_results.update_one(
-                {"id": batch_id},
-                {
-                    "$set": {
-                        "status": final_status,
-                        "completed_at": datetime.utcnow(),
-                        "completed_items": completed_count,
-                        "failed_items": failed_count,
-                        "results": [r.dict() for r in results]
-                    }
-                }
-            )
+            if pending:
+                try:
+                    await self._save_results(pending)
+                    accepted = await batch_job_queue.complete_many(
+                        self.worker_id, [(item, generation_result.id) for item, generation_result in pending]
+                    )
+                except Exception:
+                    # Nothing was counted yet: the next flush writes it all again
+                    self._requeue_buffered(pending, completed, failures, events, finished)
+                    raise
+                finally:
+                    self._flushing = []
+                await self._discard_orphans(pending, accepted)
+                for item, generation_result in pending:
+                    if item["id"] in accepted:
+                        completed[item["batch_id"]] = completed.get(item["batch_id"], 0) + 1
+                        finished.setdefault(item["batch_id"], {})[item["index"]] = generation_result
+                        events.setdefault(item["batch_id"], []).append(item_event(item, generation_result))
             
-            logger.info(f"Batch {batch_id} completed: {completed_count} success, {failed_count} failed")
+            # Repeats of the finished items get copies of their results
+            try:
+                duplicates = []
+                for batch_id, results_by_index in finished.items():
+                    duplicates += await batch_job_queue.find_duplicates(batch_id, results_by_index)
+                for duplicate, generation_result in await self._copy_to_duplicates(duplicates, finished):
+                    completed[duplicate["batch_id"]] = completed.get(duplicate["batch_id"], 0) + 1
+                    events.setdefault(duplicate["batch_id"], []).append(
+                        item_event(duplicate, generation_result, duplicate_of=duplicate["duplicate_of"])
+                    )
+            except Exception as e:
+                logger.error(f"Error completing duplicate batch items: {e}")
+                self._requeue_buffered([], {}, {}, {}, finished)
             
+            # Each batch on its own, so one failing update doesn't hold back the others' counts
+            for batch_id in set(completed) | set(failures):
+                batch_completed, batch_failed = completed.get(batch_id, 0), failures.get(batch_id, 0)
+                batch_events = events.get(batch_id, [])
+                try:
+                    batch_doc = await self._count_finished(batch_id, batch_completed, batch_failed)
+                except Exception as e:
+                    logger.error(f"Error recording progress of batch {batch_id}: {e}")
+                    self._requeue_buffered([], {batch_id: batch_completed}, {batch_id: batch_failed},
+                                           {batch_id: batch_events}, {})
+                    continue
+                try:
+                    await self._update_progress(batch_id, batch_doc, batch_events)
+                except Exception as e:
+                    # Counted already: the next flush only re-checks the batch and publishes its events
+                    logger.error(f"Error updating progress of batch {batch_id}: {e}")
+                    self._requeue_buffered([], {batch_id: 0}, {}, {batch_id: batch_events}, {})
+    
+    def _requeue_buffered(self, results: List[Tuple[Dict, GenerationResult]], completed: Dict[str, int],
+                          failures: Dict[str, int], events: Dict[str, List[Dict]],
+                          finished: Dict[str, Dict[int, GenerationResult]]):
+        """Put state a flush couldn't write back in front of what was buffered since, for the next flush"""
+        self._pending_results[:0] = results
+        for batch_id, count in completed.items():
+            self._pending_completed[batch_id] = self._pending_completed.get(batch_id, 0) + count
+        for batch_id, count in failures.items():
+            self._pending_failures[batch_id] = self._pending_failures.get(batch_id, 0) + count
+        for batch_id, batch_events in events.items():
+            self._pending_events.setdefault(batch_id, [])[:0] = batch_events
+        for batch_id, results_by_index in finished.items():
+            self._pending_originals.setdefault(batch_id, {}).update(results_by_index)
+    
+    async def _load_batch_job(self, batch_id: str) -> Optional[Dict]:
+        """Batch parameters and concurrency for a batch, cached per worker"""
+        job = self._batch_jobs.get(batch_id)
+        if job is None:
+            batch_doc = await self.db.batch_generation_results.find_one(
+                {"id": batch_id}, {"_id": 0, "job": 1, "user_id": 1}
+            )
+            if not batch_doc or "job" not in batch_doc:
+                return None
+            params = dict(batch_doc["job"])
+            concurrency = params.pop("concurrency", self.item_concurrency)
+            params.pop("tier", None)
+            job = {
+                "request": BatchGenerationRequest(**params, content_descriptions=[]),
+                "concurrency": concurrency
+            }
+            self._batch_jobs[batch_id] = job
+            while len(self._batch_jobs) > 256:
+                self._batch_jobs.popitem(last=False)
+        self._batch_jobs.move_to_end(batch_id)
+        return job
+    
+    async def _save_results(self, results: List[Tuple[Dict, GenerationResult]]):
+        """Upsert batch results by id, which is their queue item's id
+
+        Writing an item's result again, after a flush that was interrupted
+        before completing it or by the worker that took over its lease,
+        replaces the earlier document instead of adding a second one.
+        """
+        await self.db.generation_results.bulk_write([
+            ReplaceOne({"id": generation_result.id}, generation_result.dict(), upsert=True)
+            for _, generation_result in results
+        ], ordered=False)
+    
+    async def _discard_orphans(self, results: List[Tuple[Dict, GenerationResult]], accepted: Set[str]):
+        """Delete saved results whose items this worker couldn't complete and nobody will
+
+        An item another worker took over keeps the document: its result has
+        the same id and replaces it.
+        """
+        orphaned = [item["id"] for item, _ in results if item["id"] not in accepted]
+        if not orphaned:
+            return
+        # Only cleanup: the items themselves are settled whether or not this succeeds
+        try:
+            closed = await batch_job_queue.find_closed(orphaned)
+            if closed:
+                await self.db.generation_results.delete_many({"id": {"$in": list(closed)}})
         except Exception as e:
-            logger.error(f"Error processing batch {batch_id}: {e}")
+            logger.error(f"Error discarding orphaned batch results: {e}")
+    
+    async def _copy_to_duplicates(self, duplicates: List[Dict],
+                                  finished: Dict[str, Dict[int, GenerationResult]]) -> List[Tuple[Dict, GenerationResult]]:
+        """Save copies of finished results for their duplicates; returns the duplicates completed and their copies"""
+        copies = []
+        for duplicate in duplicates:
+            original = finished.get(duplicate["batch_id"], {}).get(duplicate["duplicate_of"])
+            if original is None:
+                continue
+            copies.append((duplicate, GenerationResult(
+                **original.dict(exclude={"id", "created_at", "content_description", "batch_index"}),
+                id=duplicate["id"],
+                content_description=duplicate["content_description"],
+                batch_index=duplicate["index"]
+            )))
+        if not copies:
+            return []
+        
+        await self._save_results(copies)
+        resolved = await batch_job_queue.complete_duplicates(
+            [(duplicate, generation_result.id) for duplicate, generation_result in copies]
+        )
+        # Another worker resolved them first, or the batch was cancelled
+        await self._discard_orphans(copies, resolved)
+        
+        return [(duplicate, generation_result) for duplicate, generation_result in copies if duplicate["id"] in resolved]
+    
+    async def _resolve_late_duplicates(self, batch_id: str, duplicates: List[Dict]):
+        """Settle duplicates queued after their original item had already finished"""
+        if not duplicates:
+            return
+        originals = await batch_job_queue.find_items(batch_id, {duplicate["duplicate_of"] for duplicate in duplicates})
+        result_ids = {item["result_id"]: item["index"] for item in originals if item["status"] == batch_job_queue.DONE}
+        
+        finished: Dict[int, GenerationResult] = {}
+        async for doc in self.db.generation_results.find({"id": {"$in": list(result_ids)}}, {"_id": 0}):
+            finished[result_ids[doc["id"]]] = GenerationResult(**doc)
+        completed = len(await self._copy_to_duplicates(duplicates, {batch_id: finished}))
+        
+        failed = 0
+        for item in originals:
+            if item["status"] == batch_job_queue.FAILED:
+                failed += await batch_job_queue.fail_duplicates(batch_id, item["index"], item.get("last_error") or "")
+        if completed or failed:
+            await self._record_progress(batch_id, completed, failed)
+    
+    async def _abortable(self, batch_id: str, call: Awaitable):
+        """Await a provider call for items of ``batch_id`` that _abort_batch_items can cancel
+
+        Raises BatchItemsAborted if the batch was cancelled before or during
+        the call. Cancelling the item task itself cancels the call as well.
+        """
+        if batch_id in self._aborted_batches:
+            call.close()
+            raise BatchItemsAborted()
+        generation = asyncio.ensure_future(call)
+        task = asyncio.current_task()
+        self._generations[task] = generation
+        try:
+            await asyncio.wait([generation])
+        except asyncio.CancelledError:
+            generation.cancel()
+            raise
+        finally:
+            self._generations.pop(task, None)
+        if generation.cancelled():
+            raise BatchItemsAborted()
+        return generation.result()
+    
+    def _build_result(self, request: BatchGenerationRequest, content_description: str, content_result: Dict,
+                      batch_id: Optional[str] = None, batch_index: Optional[int] = None) -> GenerationResult:
+        return GenerationResult(
+            user_id=request.user_id,
+            category=request.category,
+            platform=request.platform,
+            content_description=content_description,
+            ai_responses=content_result["ai_responses"],
+            hashtags=content_result["hashtags"],
+            combined_result=content_result["combined_result"],
+            batch_id=batch_id,
+            batch_index=batch_index
+        )
+    
+    async def _generate_item(self, request: BatchGenerationRequest, content_description: str,
+                             batch_id: Optional[str] = None, batch_index: Optional[int] = None) -> GenerationResult:
+        """Generate one batch item"""
+        start_time = time.time()
+        # Auto routing re-picks providers per item as latencies move
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, request.category.value, request.latency_sla
+        )
+        content_result = await self._abortable(batch_id, ai_service.generate_combined_content(
+            category=request.category,
+            platform=request.platform,
+            content_description=content_description,
+            selected_providers=[p.value for p in providers],
+            request_budget=request.latency_sla,
+            use_cache=not request.bypass_cache
+        ))
+        self._item_seconds.append(time.time() - start_time)
+        
+        return self._build_result(request, content_description, content_result, batch_id, batch_index)
+    
+    def _buffer_result(self, item: Dict, generation_result: GenerationResult):
+        """Buffer a finished item; it is saved with the next bulk flush"""
+        # One result document per queue item, however often the item is generated or flushed
+        generation_result.id = item["id"]
+        self._pending_results.append((item, generation_result))
+        self._completions.append(time.time())
+        if len(self._pending_results) >= self.flush_size:
+            self._flush_wanted.set()
+        logger.info(f"Batch {item['batch_id']}: Completed item {item['index'] + 1}")
+    
+    async def _fail_item(self, item: Dict, error: str, retry: bool = True):
+        """Record a failed attempt, counting the item and its duplicates if it failed for good"""
+        batch_id = item["batch_id"]
+        if await batch_job_queue.fail(item, self.worker_id, error, retry=retry):
+            duplicates = await batch_job_queue.fail_duplicates(batch_id, item["index"], error)
+            self._pending_failures[batch_id] = self._pending_failures.get(batch_id, 0) + 1 + duplicates
+            self._pending_events.setdefault(batch_id, []).append(batch_event_bus.make_event(
+                batch_id, batch_event_bus.ITEM,
+                {"index": item["index"], "status": "failed", "error": error[:500], "duplicates_failed": duplicates}
+            ))
+    
+    async def _fill_pack(self, items: List[Dict], pack_size: int):
+        """Claim more queued items of the same batch until the pack is full"""
+        while len(items) < pack_size:
+            item = await batch_job_queue.claim(self.worker_id, batch_id=items[0]["batch_id"])
+            if item is None:
+                return
+            batch_scheduler.charge(item)
+            items.append(item)
+    
+    async def _run_items(self, items: List[Dict]):
+        """Generate leased items of one batch, record the outcomes and finish the batch if they were the last
+
+        Starts with one item; for a packed batch more items are claimed into
+        ``items`` and generated with one prompt per provider.
+        """
+        batch_id = items[0]["batch_id"]
+        job = await self._load_batch_job(batch_id)
+        if job is None:
+            await batch_job_queue.fail(items[0], self.worker_id, "Batch no longer exists", retry=False)
+            return
+        request = job["request"]
+        
+        # First item claimed for the batch starts the clock
+        await self.db.batch_generation_results.update_one(
+            {"id": batch_id, "status": "pending"},
+            {"$set": {"status": "processing", "started_at": datetime.utcnow()}}
+        )
+        
+        if request.packed:
+            await self._fill_pack(items, self._pack_size(request))
+        
+        runnable = []
+        for item in items:
+            if item["attempts"] > batch_job_queue.max_attempts:
+                # Lease expired on every attempt (worker crashes or hangs)
+                await self._fail_item(item, "Lease expired too many times", retry=False)
+            else:
+                runnable.append(item)
+        
+        try:
+            if len(runnable) > 1:
+                await self._run_pack(request, runnable)
+            elif runnable:
+                await self._run_item(request, runnable[0])
+        except BatchItemsAborted:
+            # cancel_batch already withdrew the items from the queue
+            pass
+    
+    async def _run_item(self, request: BatchGenerationRequest, item: Dict):
+        """Generate one leased item on its own"""
+        try:
+            generation_result = await self._generate_item(
+                request, item["content_description"], item["batch_id"], item["index"]
+            )
+            self._buffer_result(item, generation_result)
+        except (asyncio.CancelledError, BatchItemsAborted):
+            raise
+        except Exception as e:
+            logger.error(f"Error processing batch item {item['index']} of {item['batch_id']}: {e}")
+            await self._fail_item(item, str(e))
+    
+    async def _run_pack(self, request: BatchGenerationRequest, items: List[Dict]):
+        """Generate several leased items with one prompt per provider
+
+        Items the providers' responses left out are generated one at a time.
+        """
+        start_time = time.time()
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, request.category.value, request.latency_sla
+        )
+        try:
+            content_results = await self._abortable(items[0]["batch_id"], ai_service.generate_packed_content(
+                category=request.category,
+                platform=request.platform,
+                content_descriptions=[item["content_description"] for item in items],
+                selected_providers=[p.value for p in providers],
+                use_cache=not request.bypass_cache
+            ))
+        except (asyncio.CancelledError, BatchItemsAborted):
+            raise
+        except Exception as e:
+            logger.error(f"Error processing packed items of {items[0]['batch_id']}: {e}")
+            content_results = [None] * len(items)
+        
+        answered = [content_result for content_result in content_results if content_result is not None]
+        per_item = (time.time() - start_time) / max(len(answered), 1)
+        for item, content_result in zip(items, content_results):
+            if content_result is None:
+                await self._run_item(request, item)
+                continue
+            self._item_seconds.append(per_item)
+            self._buffer_result(item, self._build_result(
+                request, item["content_description"], content_result, item["batch_id"], item["index"]
+            ))
+    
+    async def _record_progress(self, batch_id: str, completed: int = 0, failed: int = 0,
+                               events: Optional[List[Dict]] = None):
+        """Count finished items, refresh throughput and ETA, and finalize the batch when all are done
+
+        ``events`` (per-item events of this update) are published along with
+        a progress event, or the completion summary for the last update.
+        """
+        batch_doc = await self._count_finished(batch_id, completed, failed)
+        await self._update_progress(batch_id, batch_doc, events)
+    
+    async def _count_finished(self, batch_id: str, completed: int, failed: int) -> Optional[Dict]:
+        """Add finished items to the batch's counts; returns the updated counts"""
+        return await self.db.batch_generation_results.find_one_and_update(
+            {"id": batch_id},
+            {"$inc": {"completed_items": completed, "failed_items": failed}},
+            projection={"_id": 0, "total_items": 1, "completed_items": 1, "failed_items": 1, "started_at": 1,
+                        "ingesting": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def _update_progress(self, batch_id: str, batch_doc: Optional[Dict], events: Optional[List[Dict]] = None):
+        """Refresh throughput and ETA from counts just recorded, or finalize the batch if they are complete"""
+        events = list(events or [])
+        if not batch_doc:
+            return
+        
+        finished = batch_doc["completed_items"] + batch_doc["failed_items"]
+        started_at = batch_doc.get("started_at") or datetime.utcnow()
+        elapsed = max((datetime.utcnow() - started_at).total_seconds(), 1e-6)
+        throughput = finished * 60 / elapsed
+        job = await self._load_batch_job(batch_id)
+        
+        if finished < batch_doc["total_items"] or batch_doc.get("ingesting"):
+            remaining = batch_doc["total_items"] - finished
+            warm = job is None or finished >= job["concurrency"] * self._pack_size(job["request"])
+            if warm:
+                # A full wave has finished: the batch's own throughput is the best predictor
+                eta = datetime.utcnow() + timedelta(minutes=remaining / throughput if throughput else 0)
+                estimate = {"estimated_completion": eta, "estimated_completion_range": [eta, eta]}
+            else:
+                estimate = await self._estimate_completion(job["request"], remaining, include_queue=False)
             await self.db.batch_generation_results.update_one(
                 {"id": batch_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "completed_at": datetime.utcnow()
-                    }
+                {"$set": {"throughput_per_minute": round(throughput, 2), **estimate}}
+            )
+            events.append(batch_event_bus.make_event(batch_id, batch_event_bus.PROGRESS, {
+                "total_items": batch_doc["total_items"],
+                "completed_items": batch_doc["completed_items"],
+                "failed_items": batch_doc["failed_items"],
+                "throughput_per_minute": round(throughput, 2),
+                "estimated_completion": estimate["estimated_completion"]
+            }))
+            await batch_event_bus.publish(events)
+            return
+        
+        # Update final batch status
+        failed_count = batch_doc["failed_items"]
+        final_status = "completed" if failed_count == 0 else "partially_completed"
+        if failed_count == batch_doc["total_items"]:
+            final_status = "failed"
+        
+        result = await self.db.batch_generation_results.update_one(
+            {"id": batch_id, "status": {"$in": ["pending", "processing"]}},
+            {
+                "$set": {
+                    "status": final_status,
+                    "completed_at": datetime.utcnow(),
+                    "throughput_per_minute": round(throughput, 2)
                 }
+            }
+        )
+        self._batch_jobs.pop(batch_id, None)
+        # Only the update that finalized the batch announces it
+        if result.modified_count:
+            await self._announce_completion(batch_id, job=job, events=events)
+        else:
+            await batch_event_bus.publish(events)
+        
+        logger.info(f"Batch {batch_id} completed: {batch_doc['completed_items']} success, {failed_count} failed")
+    
+    async def _announce_completion(self, batch_id: str, batch_doc: Optional[Dict] = None, job: Optional[Dict] = None,
+                                   events: Optional[List[Dict]] = None, webhook: bool = True):
+        """Publish a finished or cancelled batch's summary and, unless ``webhook`` is False, call its webhook"""
+        if batch_doc is None:
+            batch_doc = await self.db.batch_generation_results.find_one({"id": batch_id}, BATCH_STATUS_PROJECTION)
+            if not batch_doc:
+                return
+        if job is None:
+            job = await self._load_batch_job(batch_id)
+            self._batch_jobs.pop(batch_id, None)
+        summary = self._completion_summary(batch_doc)
+        await batch_event_bus.publish([
+            *(events or []), batch_event_bus.make_event(batch_id, batch_event_bus.COMPLETE, summary)
+        ])
+        if webhook and job and job["request"].webhook_url:
+            webhook_sender.send(job["request"].webhook_url, {"event": "batch.completed", "batch": summary})
+    
+    @staticmethod
+    def _completion_summary(batch_doc: Dict) -> Dict[str, Any]:
+        """Final counts and timing of a batch, as sent in completion events and webhooks"""
+        summary = {
+            field: batch_doc.get(field) for field in (
+                "id", "batch_name", "status", "total_items", "completed_items", "failed_items", "duplicate_items",
+                "created_at", "started_at", "completed_at", "throughput_per_minute"
+            )
+        }
+        if batch_doc.get("started_at") and batch_doc.get("completed_at"):
+            summary["duration_seconds"] = round(
+                (batch_doc["completed_at"] - batch_doc["started_at"]).total_seconds(), 1
+            )
+        return summary
+    
+    async def stream_batch_events(self, batch_id: str, user_id: str,
+                                  keepalive: float = 15) -> Optional[AsyncIterator[Tuple[str, Dict]]]:
+        """Progress events of a batch as ``(event_type, data)``, ending with ``complete``
+
+        Starts with a ``snapshot`` of the batch status; a batch that has
+        already finished gets its ``complete`` summary straight away.
+        ``("keepalive", {})`` is yielded after ``keepalive`` quiet seconds.
+        Returns None if the batch isn't the user's.
+        """
+        await self.initialize()
+        
+        # Subscribe before reading the snapshot so no event falls between the two
+        queue = batch_event_bus.subscribe(batch_id)
+        try:
+            batch_doc = await self.db.batch_generation_results.find_one(
+                {"id": batch_id, "user_id": user_id}, BATCH_STATUS_PROJECTION
             )
+        except BaseException:
+            batch_event_bus.unsubscribe(batch_id, queue)
+            raise
+        if not batch_doc:
+            batch_event_bus.unsubscribe(batch_id, queue)
+            return None
+        
+        async def events():
+            try:
+                yield "snapshot", BatchGenerationResult(**batch_doc).dict()
+                if batch_doc["status"] not in ("pending", "processing"):
+                    yield batch_event_bus.COMPLETE, self._completion_summary(batch_doc)
+                    return
+                while True:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                    except asyncio.TimeoutError:
+                        yield "keepalive", {}
+                        continue
+                    yield event["type"], event["data"]
+                    if event["type"] == batch_event_bus.COMPLETE:
+                        return
+            finally:
+                batch_event_bus.unsubscribe(batch_id, queue)
+        
+        return events()
     
     async def get_batch_status(self, batch_id: str, user_id: str) -> Optional[BatchGenerationResult]:
         """Get batch generation status"""
         await self.initialize()
         
-        batch_doc = await self.db.batch_generation_results.find_one({
-            "id": batch_id,
-            "user_id": user_id
-        })
+        batch_doc = await self.db.batch_generation_results.find_one(
+            {"id": batch_id, "user_id": user_id},
+            BATCH_STATUS_PROJECTION
+        )
         
         if batch_doc:
             return BatchGenerationResult(**batch_doc)
         return None
     
-    async def get_user_batches(self, user_id: str, limit: int = 20, skip: int = 0) -> List[BatchGenerationResult]:
-        """Get user's batch generation history"""
+    async def get_user_batches(self, user_id: str, limit: int = 20, skip: int = 0,
+                               cursor: Optional[str] = None) -> List[BatchGenerationResult]:
+        """Get user's batch generation history, newest first
+
+        Pages continue from ``cursor``; ``skip`` is only honoured without one
+        and is kept for older clients.
+        """
         await self.initialize()
         
-        cursor = self.db.batch_generation_results.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).skip(skip).limit(limit)
+        docs = self.db.batch_generation_results.find(
+            keyset_query({"user_id": user_id}, cursor), BATCH_STATUS_PROJECTION
+        ).sort(KEYSET_SORT)
+        if skip and not cursor:
+            docs = docs.skip(skip)
+        docs = docs.limit(limit)
         
         batches = []
-        async for doc in cursor:
+        async for doc in docs:
             batches.append(BatchGenerationResult(**doc))
         
         return batches
     
+    async def get_batch_results(self, batch_id: str, user_id: str, cursor: Optional[str] = None,
+                                limit: int = 50, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Page through a batch's results in item order
+
+        ``cursor`` is the ``next_cursor`` of the previous page; ``fields``
+        limits each result to those GenerationResult fields (plus ``id`` and
+        ``batch_index``). Returns None if the batch isn't the user's.
+        """
+        await self.initialize()
+        
+        batch_doc = await self.db.batch_generation_results.find_one(
+            {"id": batch_id, "user_id": user_id}, {"_id": 1}
+        )
+        if not batch_doc:
+            return None
+        
+        query = {"batch_id": batch_id}
+        if cursor:
+            query["batch_index"] = {"$gt": decode_results_cursor(cursor)}
+        
+        projection = {"_id": 0}
+        if fields:
+            unknown = set(fields) - set(GenerationResult.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown result fields: {', '.join(sorted(unknown))}")
+            projection.update({field: 1 for field in fields})
+            projection.update({"id": 1, "batch_index": 1})
+        
+        limit = max(1, min(limit, 200))
+        results = await self.db.generation_results.find(query, projection).sort(
+            "batch_index", 1
+        ).limit(limit + 1).to_list(length=limit + 1)
+        
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_results_cursor(results[-1]["batch_index"])
+        
+        return {"batch_id": batch_id, "results": results, "next_cursor": next_cursor}
+    
+    async def export_batch_results(self, batch_id: str, user_id: str,
+                                   export_format: str = "ndjson") -> Optional[AsyncIterator[str]]:
+        """Stream a batch's results in item order as NDJSON lines or CSV rows
+
+        Returns None if the batch isn't the user's. Results are read with a
+        cursor, so memory use doesn't grow with the batch size.
+        """
+        await self.initialize()
+        
+        if export_format not in ("ndjson", "csv"):
+            raise ValueError("Export format must be ndjson or csv")
+        batch_doc = await self.db.batch_generation_results.find_one(
+            {"id": batch_id, "user_id": user_id}, {"_id": 1}
+        )
+        if not batch_doc:
+            return None
+        
+        cursor = self.db.generation_results.find(
+            {"batch_id": batch_id}, {"_id": 0}
+        ).sort("batch_index", 1).batch_size(200)
+        
+        async def ndjson_rows():
+            async for doc in cursor:
+                yield json.dumps(jsonable_encoder(doc)) + "\n"
+        
+        async def csv_rows():
+            columns = ["batch_index", "id", "content_description", "combined_result", "hashtags", "created_at"]
+            
+            def format_row(values: List[Any]) -> str:
+                out = io.StringIO()
+                csv.writer(out).writerow(values)
+                return out.getvalue()
+            
+            yield format_row(columns)
+            async for doc in cursor:
+                yield format_row([
+                    doc.get("batch_index"),
+                    doc.get("id"),
+                    doc.get("content_description"),
+                    doc.get("combined_result"),
+                    " ".join(doc.get("hashtags") or []),
+                    doc["created_at"].isoformat() if doc.get("created_at") else ""
+                ])
+        
+        return ndjson_rows() if export_format == "ndjson" else csv_rows()
+    
     async def cancel_batch(self, batch_id: str, user_id: str) -> bool:
-        """Cancel a pending or processing batch"""
+        """Cancel a pending or processing batch
+
+        Queued items are withdrawn so no worker claims them, and in-flight
+        items are aborted along with their provider calls: right away on this
+        process, and within BATCH_CANCEL_POLL_SECONDS on other workers.
+        """
         await self.initialize()
         
         result = await self.db.batch_generation_results.update_one(
@@ -189,8 +1160,19 @@ class BatchContentService:
                 }
             }
         )
+        if result.modified_count == 0:
+            return False
         
-        return result.modified_count > 0
+        withdrawn = await batch_job_queue.cancel_batch(batch_id)
+        self._abort_batch_items(batch_id)
+        await self._announce_completion(batch_id)
+        logger.info(f"Batch {batch_id} cancelled: {withdrawn} unfinished items withdrawn")
+        return True
+
+register_indexes("batch_generation_results", [
+    IndexModel([("id", ASCENDING)], unique=True),
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+])
 
 # Global service instance
 batch_content_service = BatchContentService()
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Batch Estimator for THREE11 MOTION TECH
+Batch duration ranges and token/cost estimates from recorded generation times, queue depth and concurrency
+"""
+
+import os
+import json
+import math
+import time
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from database import get_analytics_database
+from models import AIProvider, BatchGenerationRequest
+from ai_service import ai_service
+from batch_job_queue import batch_job_queue
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# USD per million input/output tokens; override with AI_PROVIDER_PRICING, a JSON object shaped like this one
+PROVIDER_PRICING: Dict[str, Dict[str, float]] = {
+    "openai": {"input": 2.50, "output": 10.00},
+    "anthropic": {"input": 3.00, "output": 15.00},
+    "gemini": {"input": 0.10, "output": 0.40},
+    "perplexity": {"input": 3.00, "output": 15.00},
+}
+
+# Typical completion sizes; the upper cost bound uses the full max_tokens budget instead
+EXPECTED_CAPTION_TOKENS = 150
+EXPECTED_HASHTAG_TOKENS = 90
+CALL_MAX_TOKENS = 400
+
+
+class BatchEstimator:
+    """Estimates how long a batch will take and what its provider calls will cost.
+
+    Per-call latency is the p50 (low) and p90 (high) of successful
+    ``usage_analytics.generation_time`` samples for the provider and content
+    category over the last ``history_days``, falling back to the provider's
+    samples across all categories, then to ``prior_latency``. Samples faster
+    than ``min_sample_seconds`` are left out: those are generation cache hits
+    recorded before cached responses were kept out of the analytics, not
+    provider round trips. An item waits on
+    its slowest provider. A packed prompt takes ``pack_growth`` longer per extra
+    description, since its completion grows with the pack.
+
+    Duration is the time to drain the batch's round trips at its concurrency,
+    plus the wait for the items already queued ahead of it to clear the
+    workers' slots. Token counts use the real prompts; cost assumes no
+    generation cache hits, so it is an upper bound for repeated content.
+    """
+
+    def __init__(self, history_days: float = 7, history_samples: int = 2000, min_samples: int = 20,
+                 cache_seconds: float = 300, prior_latency: float = 5.0, pack_growth: float = 0.25,
+                 pricing: Optional[Dict[str, Dict[str, float]]] = None, min_sample_seconds: float = 0.05):
+        self.history_days = history_days
+        self.history_samples = history_samples
+        self.min_samples = min_samples
+        self.min_sample_seconds = min_sample_seconds
+        self.cache_seconds = cache_seconds
+        self.prior_latency = prior_latency
+        self.pack_growth = pack_growth
+        self.pricing = pricing or PROVIDER_PRICING
+        # (provider, category) -> (expires_at, latency stats)
+        self._latency_cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+
+    async def _load_generation_times(self, provider: AIProvider, category: Optional[str]) -> List[float]:
+        query = {
+            "ai_provider": provider.value,
+            "success": True,
+            "generation_time": {"$gte": self.min_sample_seconds},
+            "created_at": {"$gte": datetime.utcnow() - timedelta(days=self.history_days)}
+        }
+        if category:
+            query["category"] = category
+        cursor = get_analytics_database().usage_analytics.find(query, {"_id": 0, "generation_time": 1}).sort(
+            "created_at", -1
+        ).limit(self.history_samples)
+        return sorted([doc["generation_time"] async for doc in cursor])
+
+    async def provider_latency(self, provider: AIProvider, category: str) -> Dict:
+        """p50/p90 call latency for a provider and category, and where the numbers came from"""
+        cache_key = (provider.value, category)
+        cached = self._latency_cache.get(cache_key)
+        if cached and cached[0] > time.time():
+            return cached[1]
+
+        stats = {"p50": self.prior_latency, "p90": self.prior_latency * 2, "samples": 0, "source": "default"}
+        for source, scope in (("category", category), ("provider", None)):
+            times = await self._load_generation_times(provider, scope)
+            if len(times) >= self.min_samples:
+                stats = {
+                    "p50": round(times[int(len(times) * 0.5)], 3),
+                    "p90": round(times[min(int(len(times) * 0.9), len(times) - 1)], 3),
+                    "samples": len(times),
+                    "source": source
+                }
+                break
+
+        self._latency_cache[cache_key] = (time.time() + self.cache_seconds, stats)
+        return stats
+
+    async def queue_snapshot(self) -> Dict[str, int]:
+        """Items waiting or in flight across all batches, and the workers currently holding leases"""
+        items = batch_job_queue.items
+        queued = await items.count_documents({"status": batch_job_queue.QUEUED})
+        leased = await items.count_documents({"status": batch_job_queue.LEASED})
+        workers = await items.distinct("lease_owner", {"status": batch_job_queue.LEASED})
+        return {"queued": queued, "leased": leased, "workers": max(len(workers), 1)}
+
+    async def estimate_duration(self, request: BatchGenerationRequest, unique_items: int, concurrency: int,
+                                pack_size: int, worker_slots: int, include_queue: bool = True) -> Dict:
+        """Low (p50) and high (p90) seconds to finish ``unique_items`` items of a batch
+
+        ``worker_slots`` is the item concurrency of one worker process. Pass
+        ``include_queue=False`` for a batch that is already running.
+        """
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, request.category.value, request.latency_sla
+        )
+        latencies = {
+            provider.value: await self.provider_latency(provider, request.category.value) for provider in providers
+        }
+        if pack_size <= 1 and AIProvider.OPENAI.value not in latencies:
+            # Hashtags always come from OpenAI alongside the captions
+            latencies[AIProvider.OPENAI.value] = await self.provider_latency(AIProvider.OPENAI, request.category.value)
+
+        growth = 1 + self.pack_growth * (pack_size - 1)
+        trip_low = max((stats["p50"] for stats in latencies.values()), default=self.prior_latency) * growth
+        trip_high = max((stats["p90"] for stats in latencies.values()), default=self.prior_latency * 2) * growth
+        round_trips = math.ceil(unique_items / pack_size)
+        waves = math.ceil(round_trips / max(concurrency, 1))
+
+        queue = {"queued": 0, "leased": 0, "workers": 1}
+        wait_low = wait_high = 0.0
+        if include_queue:
+            queue = await self.queue_snapshot()
+            slots = max(queue["workers"] * worker_slots, 1)
+            # Fair share lets a new batch start as soon as a slot frees up; strict FIFO would drain the queue first
+            if queue["leased"] >= slots:
+                wait_low = trip_low
+            wait_high = math.ceil((queue["queued"] + queue["leased"]) / slots) * trip_high
+
+        return {
+            "providers": [provider.value for provider in providers],
+            "latency": latencies,
+            "round_trips": round_trips,
+            "queue": queue,
+            "queue_wait_seconds_low": round(wait_low, 1),
+            "queue_wait_seconds_high": round(wait_high, 1),
+            "duration_seconds_low": round(wait_low + waves * trip_low, 1),
+            "duration_seconds_high": round(wait_high + waves * trip_high, 1)
+        }
+
+    def _price(self, provider: str, input_tokens: int, output_tokens: int) -> float:
+        price = self.pricing.get(provider, {})
+        return (input_tokens * price.get("input", 0.0) + output_tokens * price.get("output", 0.0)) / 1_000_000
+
+    def estimate_usage(self, request: BatchGenerationRequest, descriptions: List[str], providers: List[str],
+                       pack_size: int) -> Dict:
+        """Input tokens, expected and maximum output tokens, and the resulting cost range per provider"""
+        usage = {provider: {"calls": 0, "input_tokens": 0, "output_tokens_expected": 0, "output_tokens_max": 0}
+                 for provider in providers}
+
+        def add(provider: str, system_message: str, prompt: str, expected: int, maximum: int):
+            entry = usage.setdefault(
+                provider, {"calls": 0, "input_tokens": 0, "output_tokens_expected": 0, "output_tokens_max": 0}
+            )
+            entry["calls"] += 1
+            entry["input_tokens"] += (len(system_message) + len(prompt)) // 4
+            entry["output_tokens_expected"] += expected
+            entry["output_tokens_max"] += maximum
+
+        for start in range(0, len(descriptions), pack_size):
+            pack = descriptions[start:start + pack_size]
+            for provider in providers:
+                system_message = ai_service._category_system_message(AIProvider(provider), request.category)
+                if len(pack) > 1:
+                    add(provider, system_message, ai_service._packed_prompt(request.category, request.platform, pack),
+                        (EXPECTED_CAPTION_TOKENS + EXPECTED_HASHTAG_TOKENS) * len(pack),
+                        ai_service._packed_max_tokens(len(pack)))
+                else:
+                    add(provider, system_message, ai_service._caption_prompt(request.category, request.platform, pack[0]),
+                        EXPECTED_CAPTION_TOKENS, CALL_MAX_TOKENS)
+            if len(pack) == 1:
+                add(AIProvider.OPENAI.value, ai_service._category_system_message(AIProvider.OPENAI, request.category),
+                    ai_service._hashtag_prompt(request.category, request.platform, pack[0]),
+                    EXPECTED_HASHTAG_TOKENS, CALL_MAX_TOKENS)
+
+        for provider, entry in usage.items():
+            entry["cost_usd_low"] = round(
+                self._price(provider, entry["input_tokens"], entry["output_tokens_expected"]), 4
+            )
+            entry["cost_usd_high"] = round(self._price(provider, entry["input_tokens"], entry["output_tokens_max"]), 4)
+        return usage
+
+    async def estimate(self, request: BatchGenerationRequest, concurrency: int, pack_size: int,
+                       worker_slots: int) -> Dict:
+        """Dry-run estimate for a batch request: item counts, duration range, tokens and cost"""
+        descriptions = request.content_descriptions
+        if request.dedupe:
+            unique = {}
+            for description in descriptions:
+                unique.setdefault(batch_job_queue.description_key(description), description)
+            descriptions = list(unique.values())
+
+        duration = await self.estimate_duration(request, len(descriptions), concurrency, pack_size, worker_slots)
+        usage = self.estimate_usage(request, descriptions, duration["providers"], pack_size)
+        now = datetime.utcnow()
+        return {
+            "total_items": len(request.content_descriptions),
+            "unique_items": len(descriptions),
+            "concurrency": concurrency,
+            "pack_size": pack_size,
+            **duration,
+            "estimated_completion_low": now + timedelta(seconds=duration["duration_seconds_low"]),
+            "estimated_completion_high": now + timedelta(seconds=duration["duration_seconds_high"]),
+            "usage": usage,
+            "input_tokens": sum(entry["input_tokens"] for entry in usage.values()),
+            "output_tokens_expected": sum(entry["output_tokens_expected"] for entry in usage.values()),
+            "output_tokens_max": sum(entry["output_tokens_max"] for entry in usage.values()),
+            "cost_usd_low": round(sum(entry["cost_usd_low"] for entry in usage.values()), 4),
+            "cost_usd_high": round(sum(entry["cost_usd_high"] for entry in usage.values()), 4)
+        }
+
+
+def _load_pricing() -> Dict[str, Dict[str, float]]:
+    raw = os.environ.get('AI_PROVIDER_PRICING')
+    if not raw:
+        return PROVIDER_PRICING
+    try:
+        return {**PROVIDER_PRICING, **json.loads(raw)}
+    except ValueError:
+        logger.error("Ignoring invalid AI_PROVIDER_PRICING (expected a JSON object)")
+        return PROVIDER_PRICING
+
+
+batch_estimator = BatchEstimator(
+    history_days=float(os.environ.get('BATCH_ESTIMATE_HISTORY_DAYS', '7')),
+    min_samples=int(os.environ.get('BATCH_ESTIMATE_MIN_SAMPLES', '20')),
+    prior_latency=float(os.environ.get('BATCH_ESTIMATE_PRIOR_LATENCY', '5')),
+    pack_growth=float(os.environ.get('BATCH_ESTIMATE_PACK_GROWTH', '0.25')),
+    pricing=_load_pricing(),
+    min_sample_seconds=float(os.environ.get('BATCH_ESTIMATE_MIN_SAMPLE_SECONDS', '0.05'))
+)
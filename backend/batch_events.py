@@ -0,0 +1,233 @@
+"""
+Batch Events for THREE11 MOTION TECH
+Batch progress events shared through Mongo for SSE streams, plus completion webhooks
+"""
+
+import os
+import hmac
+import json
+import time
+import uuid
+import socket
+import asyncio
+import hashlib
+import logging
+import ipaddress
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
+import httpx
+from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from pymongo import IndexModel, ASCENDING
+
+from database import get_database, register_indexes
+from query_monitor import create_background_task
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEventBus:
+    """Delivers batch progress events from whichever process runs the worker to SSE subscribers.
+
+    Workers append events to ``batch_events`` (expired by a TTL index). Each
+    API process runs one tailer while anyone is subscribed: every
+    ``poll_interval`` it reads new events for all watched batches in a single
+    query and fans them out to per-subscriber queues, so DB reads don't grow
+    with the number of open streams. Reads look back ``overlap`` seconds to
+    tolerate clock skew and late inserts between hosts; events already
+    delivered are skipped by id.
+    """
+
+    ITEM = "item"
+    PROGRESS = "progress"
+    COMPLETE = "complete"
+
+    def __init__(self, poll_interval: float = 0.5, overlap: float = 5.0, queue_size: int = 1000):
+        self.poll_interval = poll_interval
+        self.overlap = overlap
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._seen: Dict[str, float] = {}
+        self._tailer: Optional[asyncio.Task] = None
+
+    @property
+    def events(self):
+        return get_database().batch_events
+
+    @staticmethod
+    def make_event(batch_id: str, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.uuid4()),
+            "batch_id": batch_id,
+            "type": event_type,
+            "data": data,
+            "created_at": datetime.utcnow()
+        }
+
+    async def publish(self, events: List[Dict[str, Any]]):
+        if events:
+            await self.events.insert_many(events, ordered=False)
+
+    def subscribe(self, batch_id: str) -> asyncio.Queue:
+        """Queue receiving the batch's events from now on; pass it to ``unsubscribe`` when done"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(batch_id, set()).add(queue)
+        if self._tailer is None or self._tailer.done():
+            # Outlives the SSE request that happens to start it
+            self._tailer = create_background_task(self._tail())
+        return queue
+
+    def unsubscribe(self, batch_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(batch_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[batch_id]
+
+    async def _tail(self):
+        since = datetime.utcnow()
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            poll_started = datetime.utcnow()
+            try:
+                cursor = self.events.find(
+                    {
+                        "batch_id": {"$in": list(self._subscribers)},
+                        "created_at": {"$gte": since - timedelta(seconds=self.overlap)}
+                    },
+                    {"_id": 0}
+                ).sort("created_at", 1)
+                async for event in cursor:
+                    if event["id"] in self._seen:
+                        continue
+                    self._seen[event["id"]] = time.time()
+                    for queue in list(self._subscribers.get(event["batch_id"], ())):
+                        if queue.full():
+                            # A stalled client loses its oldest events rather than holding memory,
+                            # and never the newest, so the final ``complete`` always gets through
+                            queue.get_nowait()
+                        queue.put_nowait(event)
+            except Exception as e:
+                logger.error(f"Error reading batch events: {e}")
+                continue
+            since = poll_started
+            cutoff = time.time() - self.overlap * 4
+            self._seen = {event_id: seen_at for event_id, seen_at in self._seen.items() if seen_at >= cutoff}
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "watched_batches": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values())
+        }
+
+
+class WebhookSender:
+    """POSTs batch completion summaries to user-supplied URLs.
+
+    Delivery is best effort: a few attempts with exponential backoff, in a
+    background task of the process that finished the batch. With a secret
+    configured, the body is signed as ``X-Three11-Signature: sha256=<hex HMAC>``.
+    Hosts resolving to any address that isn't globally routable unicast are
+    refused unless ``allow_private`` is set. The request then connects to the address
+    that was checked (with the original Host header and TLS server name), so a
+    second DNS answer can't point it somewhere else.
+    """
+
+    def __init__(self, timeout: float = 10, attempts: int = 3, backoff: float = 2,
+                 secret: Optional[str] = None, allow_private: bool = False):
+        self.timeout = timeout
+        self.attempts = attempts
+        self.backoff = backoff
+        self.secret = secret
+        self.allow_private = allow_private
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"delivered": 0, "failed": 0, "refused": 0}
+
+    @staticmethod
+    def validate_url(url: str):
+        """Raise ValueError unless the URL is an absolute http(s) URL"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError("Webhook URL must be an absolute http or https URL")
+
+    async def _public_address(self, host: str) -> Optional[str]:
+        """An address of ``host`` to connect to, or None if any of its addresses isn't public"""
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return None
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%")[0])
+            if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped is not None:
+                address = address.ipv4_mapped
+            # Besides private and loopback ranges, is_global leaves out shared (CGNAT) and reserved space
+            if not address.is_global or address.is_multicast:
+                return None
+        return infos[0][4][0] if infos else None
+
+    async def _deliver(self, url: str, payload: Dict[str, Any]):
+        target = httpx.URL(url)
+        body = json.dumps(jsonable_encoder(payload)).encode("utf-8")
+        headers = {"Content-Type": "application/json", "User-Agent": "THREE11-Batch-Webhook/1.0"}
+        extensions: Dict[str, Any] = {}
+        if not self.allow_private:
+            address = await self._public_address(target.host)
+            if address is None:
+                self._stats["refused"] += 1
+                logger.warning(f"Refusing batch webhook to non-public host {target.host}")
+                return
+            # Pin the connection to the address just checked instead of resolving the name again
+            headers["Host"] = target.netloc.decode("ascii")
+            extensions["sni_hostname"] = target.host
+            target = target.copy_with(host=address)
+        if self.secret:
+            signature = hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers["X-Three11-Signature"] = f"sha256={signature}"
+
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=False) as client:
+            for attempt in range(1, self.attempts + 1):
+                try:
+                    response = await client.post(target, content=body, headers=headers, extensions=extensions)
+                    if response.status_code < 400:
+                        self._stats["delivered"] += 1
+                        return
+                    error = f"HTTP {response.status_code}"
+                except httpx.HTTPError as e:
+                    error = str(e) or type(e).__name__
+                if attempt < self.attempts:
+                    await asyncio.sleep(self.backoff ** attempt)
+        self._stats["failed"] += 1
+        logger.error(f"Batch webhook to {url} failed after {self.attempts} attempts: {error}")
+
+    def send(self, url: str, payload: Dict[str, Any]):
+        """Deliver in the background; the caller never waits on the receiving server"""
+        task = create_background_task(self._deliver(url, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, "in_flight": len(self._tasks)}
+
+
+# Events are kept for a day
+register_indexes("batch_events", [
+    IndexModel([("batch_id", ASCENDING), ("created_at", ASCENDING)]),
+    IndexModel([("created_at", ASCENDING)], expireAfterSeconds=86400),
+])
+
+batch_event_bus = BatchEventBus(
+    poll_interval=float(os.environ.get('BATCH_EVENTS_POLL_SECONDS', '0.5'))
+)
+
+webhook_sender = WebhookSender(
+    timeout=float(os.environ.get('BATCH_WEBHOOK_TIMEOUT', '10')),
+    attempts=int(os.environ.get('BATCH_WEBHOOK_ATTEMPTS', '3')),
+    secret=os.environ.get('BATCH_WEBHOOK_SECRET'),
+    allow_private=os.environ.get('BATCH_WEBHOOK_ALLOW_PRIVATE', 'false').lower() == 'true'
+)
@@ -0,0 +1,323 @@
+"""
+Batch Job Queue for THREE11 MOTION TECH
+Mongo-backed queue of batch items with leases, heartbeats and retries, shared by any number of worker processes
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from pymongo import IndexModel, ReturnDocument, UpdateOne, ASCENDING
+
+from database import get_database, register_indexes
+from generation_cache import GenerationCache
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJobQueue:
+    """One ``batch_job_items`` document per batch item.
+
+    A worker claims an item by atomically setting a lease on it, keeps the
+    lease alive with heartbeats while generating, and marks it done or
+    failed. Leases left behind by a crashed or redeployed worker expire and
+    the item is claimed again, so batches resume from the last finished item.
+    Failed attempts are retried with a linear backoff up to ``max_attempts``.
+    Only the current lease holder can finish an item, so each item is counted
+    exactly once even if a slow worker loses its lease.
+
+    Items repeating an earlier description of their batch are stored as
+    ``duplicate`` and never claimed; they are completed with a copy of the
+    first item's result, or failed along with it.
+
+    Done, failed and cancelled items get an ``expires_at`` and are removed by
+    Mongo ``retention_seconds`` after they finish.
+    """
+
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    DUPLICATE = "duplicate"
+
+    def __init__(self, lease_seconds: float = 120, max_attempts: int = 3, retry_backoff: float = 30,
+                 retention_seconds: float = 604800):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retention_seconds = retention_seconds
+
+    @property
+    def items(self):
+        return get_database().batch_job_items
+
+    def _expires_at(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.retention_seconds)
+
+    @staticmethod
+    def description_key(content_description: str) -> str:
+        """Digest of a normalized description, for spotting repeats within a batch"""
+        return hashlib.sha1(GenerationCache.normalize(content_description).encode("utf-8")).hexdigest()
+
+    async def enqueue(self, batch_id: str, user_id: str, content_descriptions: List[str], start_index: int = 0,
+                      tier: str = "free", seen: Optional[Dict[str, int]] = None) -> List[Dict]:
+        """Queue items of a batch, numbered from ``start_index``
+
+        With ``seen`` (description key -> index of its first item, shared
+        across calls for one batch) repeats are stored as duplicates of the
+        first item. Returns the items stored as duplicates.
+        """
+        now = datetime.utcnow()
+        docs = [
+            {
+                "id": str(uuid.uuid4()),
+                "batch_id": batch_id,
+                "user_id": user_id,
+                "tier": tier,
+                "index": index,
+                "content_description": content_description,
+                "status": self.QUEUED,
+                "attempts": 0,
+                "available_at": now,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "last_error": None,
+                "result_id": None,
+                "created_at": now,
+                "updated_at": now
+            }
+            for index, content_description in enumerate(content_descriptions, start_index)
+        ]
+        duplicates = []
+        if seen is not None:
+            for doc in docs:
+                first_index = seen.setdefault(self.description_key(doc["content_description"]), doc["index"])
+                if first_index != doc["index"]:
+                    doc["status"] = self.DUPLICATE
+                    doc["duplicate_of"] = first_index
+                    duplicates.append(doc)
+        if docs:
+            await self.items.insert_many(docs, ordered=False)
+        return duplicates
+
+    async def claim(self, worker_id: str, exclude_batches: Iterable[str] = (), user_id: Optional[str] = None,
+                    exclude_users: Iterable[str] = (), batch_id: Optional[str] = None) -> Optional[Dict]:
+        """Lease the oldest available item (queued, or with an expired lease), optionally of one user or batch"""
+        now = datetime.utcnow()
+        query = {
+            "$or": [
+                {"status": self.QUEUED, "available_at": {"$lte": now}},
+                {"status": self.LEASED, "lease_expires_at": {"$lt": now}}
+            ]
+        }
+        exclude_batches = list(exclude_batches)
+        if batch_id is not None:
+            query["batch_id"] = batch_id
+        elif exclude_batches:
+            query["batch_id"] = {"$nin": exclude_batches}
+        exclude_users = list(exclude_users)
+        if user_id is not None:
+            query["user_id"] = user_id
+        elif exclude_users:
+            query["user_id"] = {"$nin": exclude_users}
+        return await self.items.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": self.LEASED,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1), ("index", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def heartbeat(self, worker_id: str, item_ids: List[str]):
+        """Extend the leases this worker still holds"""
+        if not item_ids:
+            return
+        now = datetime.utcnow()
+        await self.items.update_many(
+            {"id": {"$in": item_ids}, "lease_owner": worker_id, "status": self.LEASED},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=self.lease_seconds), "updated_at": now}}
+        )
+
+    async def complete_many(self, worker_id: str, completions: List[Tuple[Dict, str]]) -> Set[str]:
+        """Mark leased items done in one bulk write; returns the ids this worker still held"""
+        if not completions:
+            return set()
+        now = datetime.utcnow()
+        result = await self.items.bulk_write([
+            UpdateOne(
+                {"id": item["id"], "lease_owner": worker_id, "status": self.LEASED},
+                {
+                    "$set": {
+                        "status": self.DONE,
+                        "result_id": result_id,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "updated_at": now,
+                        "expires_at": self._expires_at(now)
+                    }
+                }
+            )
+            for item, result_id in completions
+        ], ordered=False)
+        if result.modified_count == len(completions):
+            return {item["id"] for item, _ in completions}
+        # Some leases were lost: find out which items took our result
+        cursor = self.items.find(
+            {
+                "id": {"$in": [item["id"] for item, _ in completions]},
+                "result_id": {"$in": [result_id for _, result_id in completions]}
+            },
+            {"_id": 0, "id": 1}
+        )
+        return {doc["id"] async for doc in cursor}
+
+    async def find_duplicates(self, batch_id: str, indexes: Iterable[int]) -> List[Dict]:
+        """Unresolved duplicates of the given items of a batch"""
+        cursor = self.items.find(
+            {"batch_id": batch_id, "status": self.DUPLICATE, "duplicate_of": {"$in": list(indexes)}},
+            {"_id": 0}
+        )
+        return await cursor.to_list(length=None)
+
+    async def find_items(self, batch_id: str, indexes: Iterable[int]) -> List[Dict]:
+        """Items of a batch by index"""
+        cursor = self.items.find({"batch_id": batch_id, "index": {"$in": list(indexes)}}, {"_id": 0})
+        return await cursor.to_list(length=None)
+
+    async def find_closed(self, item_ids: Iterable[str]) -> Set[str]:
+        """Ids among ``item_ids`` that were cancelled or failed for good, so no worker will complete them"""
+        cursor = self.items.find(
+            {"id": {"$in": list(item_ids)}, "status": {"$in": [self.CANCELLED, self.FAILED]}},
+            {"_id": 0, "id": 1}
+        )
+        return {doc["id"] async for doc in cursor}
+
+    async def complete_duplicates(self, completions: List[Tuple[Dict, str]]) -> Set[str]:
+        """Mark duplicates done with their copied results; returns the ids this call resolved"""
+        if not completions:
+            return set()
+        now = datetime.utcnow()
+        result = await self.items.bulk_write([
+            UpdateOne(
+                {"id": duplicate["id"], "status": self.DUPLICATE},
+                {"$set": {"status": self.DONE, "result_id": result_id, "updated_at": now,
+                          "expires_at": self._expires_at(now)}}
+            )
+            for duplicate, result_id in completions
+        ], ordered=False)
+        if result.modified_count == len(completions):
+            return {duplicate["id"] for duplicate, _ in completions}
+        cursor = self.items.find(
+            {
+                "id": {"$in": [duplicate["id"] for duplicate, _ in completions]},
+                "result_id": {"$in": [result_id for _, result_id in completions]}
+            },
+            {"_id": 0, "id": 1}
+        )
+        return {doc["id"] async for doc in cursor}
+
+    async def fail_duplicates(self, batch_id: str, index: int, error: str) -> int:
+        """Fail the duplicates of an item that failed for good; returns how many"""
+        now = datetime.utcnow()
+        result = await self.items.update_many(
+            {"batch_id": batch_id, "status": self.DUPLICATE, "duplicate_of": index},
+            {"$set": {"status": self.FAILED, "last_error": error[:500], "updated_at": now,
+                      "expires_at": self._expires_at(now)}}
+        )
+        return result.modified_count
+
+    async def fail(self, item: Dict, worker_id: str, error: str, retry: bool = True) -> bool:
+        """Record a failed attempt; True if the item has now failed for good"""
+        now = datetime.utcnow()
+        permanent = not retry or item["attempts"] >= self.max_attempts
+        update = {
+            "status": self.FAILED if permanent else self.QUEUED,
+            "last_error": error[:500],
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "updated_at": now
+        }
+        if permanent:
+            update["expires_at"] = self._expires_at(now)
+        else:
+            update["available_at"] = now + timedelta(seconds=self.retry_backoff * item["attempts"])
+        result = await self.items.update_one(
+            {"id": item["id"], "lease_owner": worker_id, "status": self.LEASED},
+            {"$set": update}
+        )
+        return permanent and result.modified_count > 0
+
+    async def release(self, worker_id: str):
+        """Hand this worker's leases back on shutdown without using up an attempt"""
+        result = await self.items.update_many(
+            {"lease_owner": worker_id, "status": self.LEASED},
+            {
+                "$set": {"status": self.QUEUED, "lease_owner": None, "lease_expires_at": None,
+                         "available_at": datetime.utcnow()},
+                "$inc": {"attempts": -1}
+            }
+        )
+        if result.modified_count:
+            logger.info(f"Released {result.modified_count} batch item leases held by {worker_id}")
+
+    async def cancel_batch(self, batch_id: str) -> int:
+        """Withdraw a batch's unfinished items; leased ones can no longer be completed by their worker"""
+        now = datetime.utcnow()
+        result = await self.items.update_many(
+            {"batch_id": batch_id, "status": {"$in": [self.QUEUED, self.LEASED, self.DUPLICATE]}},
+            {
+                "$set": {
+                    "status": self.CANCELLED,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "updated_at": now,
+                    "expires_at": self._expires_at(now)
+                }
+            }
+        )
+        return result.modified_count
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Item counts per status across all batches"""
+        counts = {
+            status: 0 for status in (self.QUEUED, self.LEASED, self.DONE, self.FAILED, self.CANCELLED, self.DUPLICATE)
+        }
+        async for row in self.items.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+
+# Claims read each branch of their $or in (created_at, index) order from the
+# status-prefixed indexes and merge them, instead of sorting every available item
+register_indexes("batch_job_items", [
+    IndexModel([("id", ASCENDING)], unique=True),
+    IndexModel([("status", ASCENDING), ("available_at", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("created_at", ASCENDING), ("index", ASCENDING)]),
+    IndexModel([("status", ASCENDING), ("user_id", ASCENDING), ("created_at", ASCENDING), ("index", ASCENDING)]),
+    IndexModel([("batch_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING), ("index", ASCENDING)]),
+    IndexModel([("batch_id", ASCENDING), ("index", ASCENDING)]),
+    IndexModel([("lease_owner", ASCENDING)]),
+    IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+])
+
+batch_job_queue = BatchJobQueue(
+    lease_seconds=float(os.environ.get('BATCH_LEASE_SECONDS', '120')),
+    max_attempts=int(os.environ.get('BATCH_MAX_ATTEMPTS', '3')),
+    retry_backoff=float(os.environ.get('BATCH_RETRY_BACKOFF_SECONDS', '30')),
+    retention_seconds=float(os.environ.get('BATCH_ITEM_RETENTION_SECONDS', '604800'))
+)
@@ -0,0 +1,153 @@
+"""
+Batch Fair-Share Scheduler for THREE11 MOTION TECH
+Weighted fair queuing of batch items across users, weighted by UserTier, with a per-user share cap
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+from dotenv import load_dotenv
+
+from database import get_database
+from models import UserTier
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Relative share of batch capacity per tier; override with BATCH_TIER_WEIGHT_<TIER>
+DEFAULT_TIER_WEIGHTS = {
+    UserTier.FREE: 1.0,
+    UserTier.PREMIUM: 4.0,
+    UserTier.UNLIMITED: 8.0,
+    UserTier.ADMIN: 8.0,
+    UserTier.SUPER_ADMIN: 8.0,
+}
+
+
+class FairShareScheduler:
+    """Decides whose batch item a worker claims next.
+
+    Stride scheduling: every user with claimable items has a virtual ``pass``
+    that advances by ``1 / weight`` per item claimed, and the user with the
+    lowest pass goes next, so a PREMIUM user gets four items for each FREE
+    user's one. Users joining start at the current lowest pass rather than
+    zero, so idle time doesn't bank credit. While other users are waiting,
+    no user may hold more than ``user_share_cap`` of the worker's slots.
+
+    Backlog per user comes from a periodic aggregation over the queue, so
+    ordering is approximate between refreshes; the claim itself stays atomic.
+    """
+
+    def __init__(self, tier_weights: Dict[UserTier, float], user_share_cap: float = 0.5,
+                 refresh_interval: float = 2.0, wait_samples: int = 500):
+        self.tier_weights = tier_weights
+        self.user_share_cap = user_share_cap
+        self.refresh_interval = refresh_interval
+        self.wait_samples = wait_samples
+
+        self._pass: Dict[str, float] = {}
+        # user_id -> {"tier": ..., "queued": n}
+        self._backlog: Dict[str, Dict] = {}
+        self._depth_by_tier: Dict[str, int] = {}
+        self._refreshed_at = 0.0
+        self._waits: Dict[str, Deque[float]] = {tier.value: deque(maxlen=wait_samples) for tier in UserTier}
+
+    def weight(self, tier: Optional[str]) -> float:
+        try:
+            return self.tier_weights[UserTier(tier)]
+        except (ValueError, KeyError):
+            return self.tier_weights[UserTier.FREE]
+
+    async def refresh(self, force: bool = False):
+        """Reload queued item counts per user and tier"""
+        if not force and time.time() - self._refreshed_at < self.refresh_interval:
+            return
+        backlog: Dict[str, Dict] = {}
+        depth_by_tier = {tier.value: 0 for tier in UserTier}
+        pipeline = [
+            {"$match": {"status": "queued", "available_at": {"$lte": datetime.utcnow()}}},
+            {"$group": {"_id": {"user_id": "$user_id", "tier": "$tier"}, "queued": {"$sum": 1}}}
+        ]
+        async for row in get_database().batch_job_items.aggregate(pipeline):
+            user_id = row["_id"]["user_id"]
+            tier = row["_id"].get("tier") or UserTier.FREE.value
+            entry = backlog.setdefault(user_id, {"tier": tier, "queued": 0})
+            entry["queued"] += row["queued"]
+            depth_by_tier[tier] = depth_by_tier.get(tier, 0) + row["queued"]
+
+        floor = min((self._pass[user_id] for user_id in backlog if user_id in self._pass), default=0.0)
+        self._pass = {user_id: max(self._pass.get(user_id, floor), floor) for user_id in backlog}
+        self._backlog = backlog
+        self._depth_by_tier = depth_by_tier
+        self._refreshed_at = time.time()
+
+    def order_users(self, active_by_user: Dict[str, int], capacity: int) -> List[str]:
+        """Users to try claiming from, best first, leaving out those over their share"""
+        waiting = [user_id for user_id, entry in self._backlog.items() if entry["queued"] > 0]
+        if len(waiting) > 1:
+            cap = max(int(capacity * self.user_share_cap), 1)
+            waiting = [user_id for user_id in waiting if active_by_user.get(user_id, 0) < cap]
+        return sorted(waiting, key=lambda user_id: self._pass[user_id])
+
+    def capped_users(self, active_by_user: Dict[str, int], capacity: int) -> List[str]:
+        """Users at their share cap while others are waiting"""
+        if len([entry for entry in self._backlog.values() if entry["queued"] > 0]) <= 1:
+            return []
+        cap = max(int(capacity * self.user_share_cap), 1)
+        return [user_id for user_id, active in active_by_user.items() if active >= cap]
+
+    def charge(self, item: Dict):
+        """Account for a claimed item: advance its user's pass and record how long it waited"""
+        user_id = item["user_id"]
+        tier = item.get("tier") or UserTier.FREE.value
+        floor = min(self._pass.values(), default=0.0)
+        self._pass[user_id] = self._pass.get(user_id, floor) + 1 / self.weight(tier)
+        entry = self._backlog.get(user_id)
+        if entry and entry["queued"] > 0:
+            entry["queued"] -= 1
+        waited = (datetime.utcnow() - item["available_at"]).total_seconds()
+        self._waits.setdefault(tier, deque(maxlen=self.wait_samples)).append(max(waited, 0.0))
+
+    def mark_empty(self, user_id: str):
+        """The user had nothing claimable after all (taken by another worker)"""
+        if user_id in self._backlog:
+            self._backlog[user_id]["queued"] = 0
+
+    def get_stats(self) -> Dict:
+        """Queue depth, weight and recent claim wait times per tier"""
+        tiers = {}
+        for tier in UserTier:
+            waits = sorted(self._waits.get(tier.value, ()))
+
+            def percentile(p: float) -> Optional[float]:
+                if not waits:
+                    return None
+                return round(waits[min(int(len(waits) * p), len(waits) - 1)], 2)
+
+            tiers[tier.value] = {
+                "weight": self.tier_weights[tier],
+                "queue_depth": self._depth_by_tier.get(tier.value, 0),
+                "waiting_users": sum(
+                    1 for entry in self._backlog.values() if entry["tier"] == tier.value and entry["queued"] > 0
+                ),
+                "wait_seconds_p50": percentile(0.5),
+                "wait_seconds_p95": percentile(0.95),
+                "claims_sampled": len(waits)
+            }
+        return {"user_share_cap": self.user_share_cap, "tiers": tiers}
+
+
+batch_scheduler = FairShareScheduler(
+    tier_weights={
+        tier: float(os.environ.get(f"BATCH_TIER_WEIGHT_{tier.name}", weight))
+        for tier, weight in DEFAULT_TIER_WEIGHTS.items()
+    },
+    user_share_cap=float(os.environ.get('BATCH_USER_SHARE_CAP', '0.5')),
+    refresh_interval=float(os.environ.get('BATCH_SCHEDULER_REFRESH_SECONDS', '2'))
+)
@@ -0,0 +1,46 @@
+"""
+THREE11 MOTION TECH - Batch Worker
+Consumes the batch job queue outside the API process. Run as many copies as needed:
+
+    python batch_worker.py
+
+API processes can stop consuming the queue themselves with BATCH_WORKERS_ENABLED=false.
+"""
+
+import asyncio
+import signal
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import connect_to_mongo, close_mongo_connection
+from provider_telemetry import provider_telemetry
+from batch_content_service import batch_content_service
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    """Process batch items until SIGINT/SIGTERM, then hand back unfinished leases"""
+    await connect_to_mongo()
+    provider_telemetry.start()
+    batch_content_service.workers_enabled = True
+    await batch_content_service.start_workers()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    await batch_content_service.stop_workers()
+    await provider_telemetry.stop()
+    await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
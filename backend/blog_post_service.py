@@ -1,22 +1,29 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import uuid
 import logging
 import re
 from datetime import datetime
 from models import *
 from ai_service import ai_service
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, get_analytics_database, register_indexes
+from pagination import KEYSET_SORT, keyset_query
 
 logger = logging.getLogger(__name__)
 
+# History list rows: leaves the heavy post body and outline in Mongo
+BLOG_POST_SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in BlogPostSummary.model_fields}}
+
 class BlogPostService:
     def __init__(self):
         self.db = None
+        self.analytics_db = None
     
     async def initialize(self):
         """Initialize database connection"""
         if not self.db:
             self.db = get_database()
+            self.analytics_db = get_analytics_database()
     
     async def generate_blog_post(self, request: BlogPostRequest) -> BlogPostResult:
         """Generate SEO-optimized blog post"""
@@ -44,7 +51,10 @@ class BlogPostService:
         suggested_images = []
         internal_link_suggestions = []
         
-        for provider in request.ai_providers:
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, ContentType.BLOG_POST.value, request.latency_sla
+        )
+        for provider in providers:
             try:
                 # Generate comprehensive blog content
                 blog_data = await self._generate_blog_content(request, provider.value)
@@ -402,17 +412,24 @@ class BlogPostService:
         total_score = min(100, keyword_score + bonus_score)
         return round(total_score, 1)
     
-    async def get_user_blog_posts(self, user_id: str, limit: int = 20) -> List[BlogPostResult]:
-        """Get user's blog post history"""
+    async def get_user_blog_posts(self, user_id: str, limit: int = 20, cursor: Optional[str] = None,
+                                  fields: ListFields = ListFields.FULL) -> List[Union[BlogPostResult, BlogPostSummary]]:
+        """Get user's blog post history, newest first, after ``cursor`` if given
+
+        The summary view reads only the BlogPostSummary fields from Mongo.
+        """
         await self.initialize()
         
-        cursor = self.db.blog_post_results.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(limit)
+        summary = fields == ListFields.SUMMARY
+        docs = self.db.blog_post_results.find(
+            keyset_query({"user_id": user_id}, cursor),
+            BLOG_POST_SUMMARY_PROJECTION if summary else {"_id": 0}
+        ).sort(KEYSET_SORT).limit(limit)
         
+        model = BlogPostSummary if summary else BlogPostResult
         results = []
-        async for doc in cursor:
-            results.append(BlogPostResult(**doc))
+        async for doc in docs:
+            results.append(model(**doc))
         
         return results
     
@@ -432,7 +449,7 @@ class BlogPostService:
             }}
         ]
         
-        cursor = self.db.blog_post_results.aggregate(pipeline)
+        cursor = self.analytics_db.blog_post_results.aggregate(pipeline)
         analytics = {
             "total_posts": 0,
             "avg_word_count": 0,
@@ -450,5 +467,9 @@ class BlogPostService:
         
         return analytics
 
+register_indexes("blog_post_results", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+])
+
 # Global service instance
 blog_post_service = BlogPostService()
\ No newline at end of file
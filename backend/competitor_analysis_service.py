@@ -12,8 +12,9 @@ import json
 from urllib.parse import urlparse
 
 from ai_service import AIService
-from database import get_database
-from models import CompetitorProfile, CompetitorAnalysis, AnalysisInsight
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, register_indexes
+from models import AIProvider, CompetitorProfile, CompetitorAnalysis, AnalysisInsight
 
 
 class CompetitorAnalysisService:
@@ -374,21 +375,27 @@ class CompetitorAnalysisService:
     async def _multi_ai_analysis(self, prompt: str, analysis_type: str) -> Dict[str, Any]:
         """Use multiple AI providers for comprehensive analysis"""
         try:
-            # Use all three AI providers for different perspectives
-            providers = ['openai', 'anthropic', 'gemini']
+            # Use all three AI providers for different perspectives, skipping any whose circuit is open
+            providers = [
+                provider for provider in ['openai', 'anthropic', 'gemini']
+                if self.ai_service.is_accepting_requests(AIProvider(provider))
+            ]
             results = {}
             
-            for provider in providers:
-                try:
-                    result = await self.ai_service.generate_content(
-                        prompt=prompt,
-                        provider=provider,
-                        max_tokens=2000
-                    )
-                    results[f"{provider}_analysis"] = result
-                except Exception as e:
-                    print(f"Error with {provider}: {e}")
+            outcomes = await asyncio.gather(*[
+                self.ai_service.generate_content(
+                    prompt=prompt,
+                    provider=provider,
+                    max_tokens=2000
+                )
+                for provider in providers
+            ], return_exceptions=True)
+            
+            for provider, result in zip(providers, outcomes):
+                if isinstance(result, Exception):
+                    print(f"Error with {provider}: {result}")
                     continue
+                results[f"{provider}_analysis"] = result
             
             # Combine insights from all providers
             if results:
@@ -436,5 +443,14 @@ class CompetitorAnalysisService:
             }
 
 
+register_indexes("competitor_profiles", [
+    IndexModel([("competitor_id", ASCENDING)]),
+    IndexModel([("created_by", ASCENDING), ("created_at", DESCENDING)]),
+])
+
+register_indexes("competitor_analyses", [
+    IndexModel([("competitor_id", ASCENDING), ("analysis_type", ASCENDING), ("created_at", DESCENDING)]),
+])
+
 # Initialize service instance
 competitor_service = CompetitorAnalysisService()
\ No newline at end of file
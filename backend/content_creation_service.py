@@ -11,6 +11,9 @@ from models import (
     VideoScriptResponse, ContentStrategyRequest, ContentStrategyResponse,
     TrendingTopic, ContentCalendar, BrandVoice
 )
+from single_flight import SingleFlight
+from llm_backend import create_llm_chat
+from ai_service import ai_service
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,7 @@ class ContentCreationService:
         self.openai_key = os.environ.get('OPENAI_API_KEY')
         self.anthropic_key = os.environ.get('ANTHROPIC_API_KEY')
         self.gemini_key = os.environ.get('GEMINI_API_KEY')
+        self.trending_flights = SingleFlight("trending_topics")
         
         # Content creation system messages
         self.content_creation_messages = {
@@ -77,28 +81,37 @@ class ContentCreationService:
         }
 
     async def create_content_chat(self, content_type: ContentType, category: ContentCategory, 
-                                provider: AIProvider = AIProvider.OPENAI) -> LlmChat:
-        """Create a chat instance optimized for content creation"""
+                                provider: Optional[AIProvider] = None) -> LlmChat:
+        """Create a chat instance optimized for content creation
+
+        Without an explicit provider, the best of OpenAI/Anthropic/Gemini for
+        this content type is picked from live latency and error rates.
+        """
+        if provider is None:
+            provider = ai_service.select_providers(
+                content_type.value,
+                candidates=[AIProvider.OPENAI, AIProvider.ANTHROPIC, AIProvider.GEMINI]
+            )[0]
         session_id = f"{provider.value}_{content_type.value}_{category.value}_{int(time.time())}"
         system_message = self.content_creation_messages.get(content_type, 
                                                           "You are a helpful content creation assistant.")
         
         if provider == AIProvider.OPENAI:
-            chat = LlmChat(
+            chat = create_llm_chat(
                 api_key=self.openai_key,
                 session_id=session_id,
                 system_message=system_message
             ).with_model("openai", "gpt-4o").with_max_tokens(800)
             
         elif provider == AIProvider.ANTHROPIC:
-            chat = LlmChat(
+            chat = create_llm_chat(
                 api_key=self.anthropic_key,
                 session_id=session_id,
                 system_message=system_message
             ).with_model("anthropic", "claude-3-5-sonnet-20241022").with_max_tokens(800)
             
         elif provider == AIProvider.GEMINI:
-            chat = LlmChat(
+            chat = create_llm_chat(
                 api_key=self.gemini_key,
                 session_id=session_id,
                 system_message=system_message
@@ -320,8 +333,6 @@ Content Strategy:"""
             # This would typically integrate with real trending APIs
             # For now, we'll generate trending topics using AI
             
-            chat = await self.create_content_chat(ContentType.TRENDING_TOPIC, category)
-            
             prompt = f"""
 List 5 current trending topics for {category.value} content on {platform.value}.
 
@@ -335,8 +346,12 @@ Format: Return as a simple list of trending topics.
 
 Trending Topics:"""
 
-            message = UserMessage(text=prompt)
-            response = await chat.send_message(message)
+            async def fetch_topics():
+                chat = await self.create_content_chat(ContentType.TRENDING_TOPIC, category)
+                return await chat.send_message(UserMessage(text=prompt))
+            
+            # Concurrent requests for the same category/platform share one LLM call
+            response = await self.trending_flights.do((category, platform), fetch_topics)
             
             topics = [topic.strip().replace('- ', '') for topic in response.split('\n') 
                      if topic.strip() and not topic.startswith('Trending Topics:')]
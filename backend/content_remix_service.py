@@ -8,13 +8,14 @@ import asyncio
 import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-import openai
+from llm_backend import create_openai_client
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 import re
 from ai_service import AIService
 from models import Platform, ContentCategory
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, register_indexes
 import uuid
 
 @dataclass
@@ -40,7 +41,7 @@ class ContentVariation:
 
 class ContentRemixEngine:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.openai_client = create_openai_client(os.getenv('OPENAI_API_KEY'))
         self.ai_service = AIService()
         self.executor = ThreadPoolExecutor(max_workers=4)
         
@@ -674,4 +675,9 @@ class ContentRemixEngine:
             
         except Exception as e:
             print(f"Error getting remix analytics: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+
+register_indexes("content_suites", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+])
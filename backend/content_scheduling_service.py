@@ -3,7 +3,8 @@ from datetime import datetime, timedelta
 import uuid
 import logging
 from models import *
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, register_indexes
 
 logger = logging.getLogger(__name__)
 
@@ -193,5 +194,15 @@ class ContentSchedulingService:
         
         return posts
 
+register_indexes("scheduled_content", [
+    IndexModel([("id", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("scheduled_time", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("scheduled_time", ASCENDING)]),
+])
+
+register_indexes("content_calendars", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+])
+
 # Global service instance
 content_scheduling_service = ContentSchedulingService()
\ No newline at end of file
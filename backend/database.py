@@ -1,29 +1,103 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import IndexModel, ASCENDING, DESCENDING
 import os
-from typing import Optional
+import asyncio
+import importlib.util
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 import logging
 
+from query_monitor import query_monitor, PoolMonitor
+
 logger = logging.getLogger(__name__)
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     db = None
+    # Secondary-preferred client for analytics reads; its own pool, so long
+    # aggregations don't hold connections latency-critical requests wait for
+    analytics_client: Optional[AsyncIOMotorClient] = None
+    analytics_db = None
+    client_options: Dict[str, Dict[str, Any]] = {}
+    index_task: Optional[asyncio.Task] = None
+    # collection -> error from its last index build, if it failed
+    index_errors: Dict[str, str] = {}
 
 database = Database()
 
+# collection -> index name -> spec. Services register the indexes their queries
+# need at import time; create_indexes builds whatever is registered.
+INDEX_REGISTRY: Dict[str, Dict[str, IndexModel]] = {}
+
+def register_indexes(collection: str, indexes: List[IndexModel]):
+    """Declare indexes a collection needs; registering the same index twice is a no-op"""
+    specs = INDEX_REGISTRY.setdefault(collection, {})
+    for index in indexes:
+        specs[index.document["name"]] = index
+
+pool_monitors = {"primary": PoolMonitor("primary"), "analytics": PoolMonitor("analytics")}
+
+def _available_compressors() -> str:
+    """Wire compressors in order of preference, skipping those whose packages aren't installed"""
+    compressors = []
+    if importlib.util.find_spec("zstandard"):
+        compressors.append("zstd")
+    if importlib.util.find_spec("snappy"):
+        compressors.append("snappy")
+    compressors.append("zlib")
+    return ",".join(compressors)
+
+def client_options(prefix: str, max_pool_size: int, socket_timeout_ms: Optional[int]) -> Dict[str, Any]:
+    """Pool, timeout and compression settings for a client, from <prefix>* environment variables
+
+    Unset optional settings keep the driver defaults; a socket timeout of 0
+    means none.
+    """
+    options = {
+        "maxPoolSize": int(os.environ.get(f'{prefix}MAX_POOL_SIZE', str(max_pool_size))),
+        "minPoolSize": int(os.environ.get(f'{prefix}MIN_POOL_SIZE', '0')),
+        "serverSelectionTimeoutMS": int(os.environ.get(f'{prefix}SERVER_SELECTION_TIMEOUT_MS', '10000')),
+        "connectTimeoutMS": int(os.environ.get(f'{prefix}CONNECT_TIMEOUT_MS', '10000')),
+        "compressors": os.environ.get('MONGO_COMPRESSORS', _available_compressors())
+    }
+    socket_timeout = int(os.environ.get(f'{prefix}SOCKET_TIMEOUT_MS', str(socket_timeout_ms or 0)))
+    if socket_timeout:
+        options["socketTimeoutMS"] = socket_timeout
+    for option, name in (("maxIdleTimeMS", "MAX_IDLE_TIME_MS"), ("waitQueueTimeoutMS", "WAIT_QUEUE_TIMEOUT_MS")):
+        if os.environ.get(f'{prefix}{name}'):
+            options[option] = int(os.environ[f'{prefix}{name}'])
+    return options
+
 async def connect_to_mongo():
     """Create database connection"""
     try:
-        database.client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        options = client_options('MONGO_', max_pool_size=100, socket_timeout_ms=60000)
+        database.client = AsyncIOMotorClient(
+            os.environ['MONGO_URL'], event_listeners=[query_monitor, pool_monitors["primary"]], **options
+        )
         database.db = database.client[os.environ['DB_NAME']]
+        database.client_options = {"primary": options}
         
         # Test connection
         await database.client.admin.command('ping')
-        logger.info("Connected to MongoDB successfully")
+        logger.info(f"Connected to MongoDB successfully (pool {options['minPoolSize']}-{options['maxPoolSize']}, "
+                    f"compressors {options['compressors']})")
         
-        # Create indexes
-        await create_indexes()
+        if os.environ.get('MONGO_ANALYTICS_ENABLED', 'true').lower() == 'true':
+            analytics_options = client_options('MONGO_ANALYTICS_', max_pool_size=20, socket_timeout_ms=300000)
+            analytics_options["readPreference"] = "secondaryPreferred"
+            if os.environ.get('MONGO_ANALYTICS_MAX_STALENESS_SECONDS'):
+                analytics_options["maxStalenessSeconds"] = int(os.environ['MONGO_ANALYTICS_MAX_STALENESS_SECONDS'])
+            database.analytics_client = AsyncIOMotorClient(
+                os.environ.get('MONGO_ANALYTICS_URL') or os.environ['MONGO_URL'],
+                event_listeners=[query_monitor, pool_monitors["analytics"]],
+                **analytics_options
+            )
+            database.analytics_db = database.analytics_client[os.environ['DB_NAME']]
+            database.client_options["analytics"] = analytics_options
+        
+        # Build indexes without holding up startup; queries work (slower) meanwhile
+        database.index_task = asyncio.create_task(create_indexes())
         
     except Exception as e:
         logger.error(f"Error connecting to MongoDB: {e}")
@@ -31,60 +105,164 @@ async def connect_to_mongo():
 
 async def close_mongo_connection():
     """Close database connection"""
+    if database.index_task and not database.index_task.done():
+        database.index_task.cancel()
+        try:
+            await database.index_task
+        except asyncio.CancelledError:
+            pass
+    if database.analytics_client:
+        database.analytics_client.close()
     if database.client:
         database.client.close()
         logger.info("Disconnected from MongoDB")
 
 async def create_indexes():
-    """Create database indexes for better performance"""
+    """Create every registered index
+
+    Safe to run on every startup: indexes that already exist with the same
+    spec are left alone. A collection whose build fails (e.g. a unique index
+    over existing duplicates) is logged and skipped so the others still get
+    built; index_report shows what is still missing.
+    
+    Builds go through a short-lived client of their own: one over a large
+    collection can outlast the primary client's socket timeout. It has no
+    socket timeout unless MONGO_INDEX_SOCKET_TIMEOUT_MS sets one.
+    """
+    database.index_errors = {}
+    options = client_options('MONGO_INDEX_', max_pool_size=2, socket_timeout_ms=None)
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[query_monitor], **options)
+    db = client[os.environ['DB_NAME']]
     try:
-        # Users collection indexes
-        await database.db.users.create_indexes([
-            IndexModel([("email", ASCENDING)], unique=True),
-            IndexModel([("created_at", DESCENDING)]),
-            IndexModel([("tier", ASCENDING)]),
-        ])
-        
-        # Generation results collection indexes
-        await database.db.generation_results.create_indexes([
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-            IndexModel([("category", ASCENDING)]),
-            IndexModel([("platform", ASCENDING)]),
-            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
-        ])
-        
-        # Usage analytics collection indexes
-        await database.db.usage_analytics.create_indexes([
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-            IndexModel([("category", ASCENDING)]),
-            IndexModel([("platform", ASCENDING)]),
-            IndexModel([("ai_provider", ASCENDING)]),
-            IndexModel([("success", ASCENDING)]),
-        ])
-        
-        # Premium pack purchases collection indexes
-        await database.db.premium_pack_purchases.create_indexes([
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("pack_id", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ])
-        
-        # Content performance collection indexes
-        await database.db.content_performance.create_indexes([
-            IndexModel([("user_id", ASCENDING)]),
-            IndexModel([("generation_id", ASCENDING)]),
-            IndexModel([("platform", ASCENDING)]),
-            IndexModel([("created_at", DESCENDING)]),
-        ])
-        
+        for collection, specs in list(INDEX_REGISTRY.items()):
+            try:
+                await db[collection].create_indexes(list(specs.values()))
+            except Exception as e:
+                database.index_errors[collection] = str(e)
+                logger.error(f"Error creating indexes on {collection}: {e}")
+    finally:
+        client.close()
+    
+    if database.index_errors:
+        logger.warning(f"Database indexes created with errors on {len(database.index_errors)} collections")
+    else:
         logger.info("Database indexes created successfully")
+
+async def index_report() -> Dict[str, Any]:
+    """Registered indexes that are missing, and existing ones that go unused
+
+    Usage comes from ``$indexStats``, whose counters reset when mongod
+    restarts (``since`` says from when), so a low-traffic index can look
+    unused on a freshly started server. ``unused`` is null where the server
+    doesn't report index stats.
+    """
+    db = database.db
+    if database.index_task is None:
+        build_status = "not_started"
+    elif not database.index_task.done():
+        build_status = "running"
+    elif database.index_task.cancelled():
+        build_status = "cancelled"
+    else:
+        build_status = "failed" if database.index_errors else "done"
+    
+    collections = {}
+    for collection, specs in sorted(INDEX_REGISTRY.items()):
+        existing = [index["name"] async for index in db[collection].list_indexes()]
         
-    except Exception as e:
-        logger.error(f"Error creating indexes: {e}")
-        raise
+        unused = None
+        since = None
+        try:
+            stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(length=None)
+            unused = sorted(
+                stat["name"] for stat in stats
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+            )
+            since = min((stat["accesses"]["since"] for stat in stats), default=None)
+        except Exception as e:
+            logger.warning(f"$indexStats unavailable for {collection}: {e}")
+        
+        collections[collection] = {
+            "registered": sorted(specs),
+            "missing": sorted(name for name in specs if name not in existing),
+            "unregistered": sorted(name for name in existing if name not in specs and name != "_id_"),
+            "unused": unused,
+            "usage_since": since,
+            "build_error": database.index_errors.get(collection)
+        }
+    
+    return {
+        "build_status": build_status,
+        "generated_at": datetime.utcnow(),
+        "missing_total": sum(len(entry["missing"]) for entry in collections.values()),
+        "unused_total": sum(len(entry["unused"] or []) for entry in collections.values()),
+        "collections": collections
+    }
 
 def get_database():
     """Get database instance"""
-    return database.db
\ No newline at end of file
+    return database.db
+
+def get_analytics_database():
+    """Database handle for analytics reads, which may lag the primary slightly
+
+    Falls back to the primary database when the analytics client is disabled.
+    Writes always go through get_database().
+    """
+    return database.analytics_db if database.analytics_db is not None else database.db
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool settings and wait times for each client"""
+    return {
+        name: {
+            "options": options,
+            **pool_monitors[name].get_stats()
+        }
+        for name, options in database.client_options.items()
+    }
+
+register_indexes("users", [
+    IndexModel([("email", ASCENDING)], unique=True),
+    IndexModel([("id", ASCENDING)]),
+    # Admin listing, keyset-paginated on (created_at, id)
+    IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+    IndexModel([("tier", ASCENDING)]),
+    IndexModel([("team_code_used", ASCENDING)], sparse=True),
+])
+
+register_indexes("generation_results", [
+    IndexModel([("id", ASCENDING)]),
+    IndexModel([("user_id", ASCENDING)]),
+    IndexModel([("category", ASCENDING)]),
+    IndexModel([("platform", ASCENDING)]),
+    # History listings, keyset-paginated on (created_at, id)
+    IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    IndexModel([("batch_id", ASCENDING), ("batch_index", ASCENDING)], sparse=True),
+])
+
+register_indexes("usage_analytics", [
+    IndexModel([("user_id", ASCENDING)]),
+    IndexModel([("created_at", DESCENDING)]),
+    IndexModel([("category", ASCENDING)]),
+    IndexModel([("platform", ASCENDING)]),
+    IndexModel([("ai_provider", ASCENDING)]),
+    IndexModel([("success", ASCENDING)]),
+    # Generation time history for batch estimates
+    IndexModel([("ai_provider", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING)]),
+    IndexModel([("ai_provider", ASCENDING), ("created_at", DESCENDING)]),
+])
+
+register_indexes("premium_pack_purchases", [
+    IndexModel([("user_id", ASCENDING)]),
+    IndexModel([("pack_id", ASCENDING)]),
+    IndexModel([("created_at", DESCENDING)]),
+])
+
+register_indexes("premium_packs", [
+    IndexModel([("is_active", ASCENDING)]),
+])
+
+register_indexes("content_calendar", [
+    IndexModel([("user_id", ASCENDING), ("date", ASCENDING)]),
+])
@@ -4,18 +4,22 @@ import logging
 from datetime import datetime
 from models import *
 from ai_service import ai_service
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, get_analytics_database, register_indexes
+from pagination import KEYSET_SORT, keyset_query
 
 logger = logging.getLogger(__name__)
 
 class EmailMarketingService:
     def __init__(self):
         self.db = None
+        self.analytics_db = None
     
     async def initialize(self):
         """Initialize database connection"""
         if not self.db:
             self.db = get_database()
+            self.analytics_db = get_analytics_database()
     
     async def generate_email_content(self, request: EmailContentRequest) -> EmailContentResult:
         """Generate email marketing content"""
@@ -40,7 +44,10 @@ class EmailMarketingService:
         personalization_tags = []
         a_b_variations = []
         
-        for provider in request.ai_providers:
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, request.email_type.value, request.latency_sla
+        )
+        for provider in providers:
             try:
                 # Generate subject lines
                 subjects = await self._generate_subject_lines(request, provider.value)
@@ -274,16 +281,17 @@ class EmailMarketingService:
             "content": variation_content.strip()
         }
     
-    async def get_user_email_campaigns(self, user_id: str, limit: int = 20) -> List[EmailContentResult]:
-        """Get user's email campaign history"""
+    async def get_user_email_campaigns(self, user_id: str, limit: int = 20,
+                                       cursor: Optional[str] = None) -> List[EmailContentResult]:
+        """Get user's email campaign history, newest first, after ``cursor`` if given"""
         await self.initialize()
         
-        cursor = self.db.email_content_results.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(limit)
+        docs = self.db.email_content_results.find(
+            keyset_query({"user_id": user_id}, cursor)
+        ).sort(KEYSET_SORT).limit(limit)
         
         results = []
-        async for doc in cursor:
+        async for doc in docs:
             results.append(EmailContentResult(**doc))
         
         return results
@@ -305,7 +313,7 @@ class EmailMarketingService:
             }}
         ]
         
-        cursor = self.db.email_content_results.aggregate(pipeline)
+        cursor = self.analytics_db.email_content_results.aggregate(pipeline)
         analytics = {
             "total_campaigns": 0,
             "campaigns_by_type": {},
@@ -329,5 +337,9 @@ class EmailMarketingService:
         
         return analytics
 
+register_indexes("email_content_results", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+])
+
 # Global service instance
 email_marketing_service = EmailMarketingService()
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Generation Result Cache for THREE11 MOTION TECH
+Two-tier cache for captions and hashtags: an in-process LRU backed by a shared Mongo collection
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from pymongo import IndexModel, ASCENDING
+
+from database import get_database, register_indexes
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    """LRU cache bounded by entry count and approximate size, with a TTL.
+
+    Entries missing from memory are looked up in the ``generation_cache``
+    collection, whose TTL index on ``expires_at`` lets Mongo expire them, so
+    every uvicorn worker shares the same hits.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 5000,
+                 max_bytes: int = 32 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # key -> (expires_at timestamp, size in bytes, value)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "writes": 0, "bypassed": 0}
+
+    @staticmethod
+    def normalize(content_description: str) -> str:
+        """Normalize a description so trivially different inputs share a cache entry"""
+        return " ".join(content_description.lower().split())
+
+    def make_key(self, kind: str, provider: str, category: str, platform: str,
+                 content_description: str) -> str:
+        """Build the cache key for a caption or hashtag request"""
+        raw = "|".join([kind, provider, category, platform, self.normalize(content_description)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def record_bypass(self):
+        self._stats["bypassed"] += 1
+
+    def _evict(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store_local(self, key: str, value: Any, expires_at: float):
+        size = len(json.dumps(value, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.time():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Look up a cached value, checking memory first and then Mongo"""
+        value = self._get_local(key)
+        if value is not None:
+            self._stats["memory_hits"] += 1
+            return value
+
+        db = get_database()
+        if db is not None:
+            try:
+                doc = await db.generation_cache.find_one({"key": key, "expires_at": {"$gt": datetime.utcnow()}})
+                if doc:
+                    self._stats["mongo_hits"] += 1
+                    remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                    self._store_local(key, doc["value"], time.time() + remaining)
+                    return doc["value"]
+            except Exception as e:
+                logger.error(f"Error reading generation cache: {e}")
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        """Store a value in both tiers"""
+        self._stats["writes"] += 1
+        self._store_local(key, value, time.time() + self.ttl_seconds)
+
+        db = get_database()
+        if db is None:
+            return
+        try:
+            await db.generation_cache.update_one(
+                {"key": key},
+                {"$set": {
+                    "key": key,
+                    "value": value,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error writing generation cache: {e}")
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and current in-memory footprint"""
+        hits = self._stats["memory_hits"] + self._stats["mongo_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Expired entries removed by Mongo
+register_indexes("generation_cache", [
+    IndexModel([("key", ASCENDING)], unique=True),
+    IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+])
+
+# Shared across every AIService instance
+generation_cache = GenerationCache(
+    ttl_seconds=int(os.environ.get('GENERATION_CACHE_TTL', '3600')),
+    max_entries=int(os.environ.get('GENERATION_CACHE_MAX_ENTRIES', '5000')),
+    max_bytes=int(os.environ.get('GENERATION_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+)
@@ -0,0 +1,179 @@
+"""
+LLM Client Pool for THREE11 MOTION TECH
+Reuses configured LlmChat instances across requests instead of building one per call
+"""
+
+import os
+import uuid
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Tuple, Deque, List, Optional, Set
+from dotenv import load_dotenv
+
+from emergentintegrations.llm.chat import LlmChat
+from llm_backend import create_llm_chat
+from models import AIProvider
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# (provider, model, system message, max tokens)
+PoolKey = Tuple[AIProvider, str, str, int]
+
+
+class _PooledChat:
+    """A pooled chat plus the history it started with"""
+
+    def __init__(self, chat: LlmChat):
+        self.chat = chat
+        history = getattr(chat, "messages", None)
+        # None when the chat keeps no history list we can inspect and trim
+        self.baseline: Optional[List] = list(history) if isinstance(history, list) else None
+
+    def reset(self) -> bool:
+        """Drop the conversation turns added while the chat was checked out
+
+        Returns False unless the history is confirmed to be back to where it
+        started; such a chat must not be handed to another request.
+        """
+        history = getattr(self.chat, "messages", None)
+        if self.baseline is None or not isinstance(history, list):
+            return False
+        del history[len(self.baseline):]
+        return history == self.baseline
+
+
+class LLMClientPool:
+    """Bounded per-provider pool of idle LlmChat clients.
+
+    A client is checked out exclusively for one request, because LlmChat keeps
+    the running conversation on the instance. On release its history is reset
+    and it goes back on the idle list for its key. If the reset can't be
+    confirmed (the chat exposes no ``messages`` list, or trimming it didn't
+    restore the original turns) the client is discarded instead, so one
+    request's prompts never reach another. A provider whose clients turn out
+    not to be resettable is logged and then served without the pool, so a pool
+    that could never hit doesn't keep paying for bookkeeping; ``poolable`` in
+    the stats shows it. Each provider keeps at most
+    ``max_per_provider`` idle clients; the least recently used key loses one
+    when that limit is hit.
+
+    What a hit saves is building and configuring the chat. HTTP keep-alive is
+    the provider SDK's business: LlmChat doesn't hold a connection of its own,
+    so connection reuse doesn't depend on this pool.
+    """
+
+    def __init__(self, max_per_provider: int = 8):
+        self.max_per_provider = max_per_provider
+        self._idle: Dict[AIProvider, "OrderedDict[PoolKey, Deque[_PooledChat]]"] = {}
+        self._stats = {
+            provider: {"hits": 0, "misses": 0, "evictions": 0, "discarded": 0, "in_use": 0}
+            for provider in AIProvider
+        }
+        # Providers whose clients can't be reset, served unpooled
+        self._unpoolable: Set[AIProvider] = set()
+
+    def _idle_count(self, provider: AIProvider) -> int:
+        return sum(len(chats) for chats in self._idle.get(provider, {}).values())
+
+    def _checkout(self, key: PoolKey, api_key: str, vendor: str) -> _PooledChat:
+        provider, model, system_message, max_tokens = key
+        stats = self._stats[provider]
+        by_key = self._idle.setdefault(provider, OrderedDict())
+
+        chats = by_key.get(key)
+        if chats:
+            by_key.move_to_end(key)
+            stats["hits"] += 1
+            pooled = chats.pop()
+        else:
+            stats["misses"] += 1
+            chat = create_llm_chat(
+                api_key=api_key,
+                session_id=f"{provider.value}_pool_{uuid.uuid4().hex[:12]}",
+                system_message=system_message
+            ).with_model(vendor, model).with_max_tokens(max_tokens)
+            pooled = _PooledChat(chat)
+
+        stats["in_use"] += 1
+        return pooled
+
+    def _checkin(self, key: PoolKey, pooled: _PooledChat, reusable: bool = True):
+        provider = key[0]
+        stats = self._stats[provider]
+        stats["in_use"] -= 1
+        if not reusable:
+            return
+        if not pooled.reset():
+            stats["discarded"] += 1
+            if pooled.baseline is None and provider not in self._unpoolable:
+                self._unpoolable.add(provider)
+                self._idle.pop(provider, None)
+                logger.warning(f"{provider.value} chat clients expose no resettable history; not pooling them")
+            return
+
+        by_key = self._idle.setdefault(provider, OrderedDict())
+        by_key.setdefault(key, deque()).append(pooled)
+        by_key.move_to_end(key)
+
+        # Enforce the per-provider bound by evicting from the least recently used key
+        while self._idle_count(provider) > self.max_per_provider:
+            oldest_key = next(iter(by_key))
+            by_key[oldest_key].popleft()
+            if not by_key[oldest_key]:
+                del by_key[oldest_key]
+            stats["evictions"] += 1
+
+    @asynccontextmanager
+    async def client(self, provider: AIProvider, api_key: str, vendor: str, model: str,
+                     system_message: str, max_tokens: int):
+        """Check out a chat client for the given configuration
+
+        Clients whose request raised (or was cancelled) are dropped rather than
+        returned to the pool, so a broken connection is never handed out again.
+        """
+        if provider in self._unpoolable:
+            yield create_llm_chat(
+                api_key=api_key,
+                session_id=f"{provider.value}_{uuid.uuid4().hex[:12]}",
+                system_message=system_message
+            ).with_model(vendor, model).with_max_tokens(max_tokens)
+            return
+        key = (provider, model, system_message, max_tokens)
+        pooled = self._checkout(key, api_key, vendor)
+        try:
+            yield pooled.chat
+        except BaseException:
+            self._checkin(key, pooled, reusable=False)
+            raise
+        self._checkin(key, pooled)
+
+    def clear(self):
+        """Drop every idle client (e.g. after rotating API keys) and try pooling every provider again"""
+        self._idle.clear()
+        self._unpoolable.clear()
+
+    def get_stats(self) -> List[Dict]:
+        """Pool hit/miss counters and sizes per provider"""
+        stats = []
+        for provider in AIProvider:
+            counters = self._stats[provider]
+            lookups = counters["hits"] + counters["misses"]
+            stats.append({
+                "provider": provider.value,
+                **counters,
+                "poolable": provider not in self._unpoolable,
+                "idle": self._idle_count(provider),
+                "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0
+            })
+        return stats
+
+
+# Shared across every AIService instance
+llm_client_pool = LLMClientPool(
+    max_per_provider=int(os.environ.get('LLM_POOL_SIZE_PER_PROVIDER', '8'))
+)
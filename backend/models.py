@@ -62,6 +62,11 @@ class ContentType(str, Enum):
     PRODUCT_DESCRIPTION = "product_description"
     ECOMMERCE_COPY = "ecommerce_copy"
 
+class ListFields(str, Enum):
+    """How much of each item a history listing returns"""
+    SUMMARY = "summary"  # Enough to render a list row; heavy bodies are never read from Mongo
+    FULL = "full"
+
 class ContentTemplateType(str, Enum):
     EDUCATIONAL = "educational"
     ENTERTAINING = "entertaining"
@@ -123,6 +128,11 @@ class GenerationRequest(BaseModel):
     platform: Platform
     content_description: str
     ai_providers: List[AIProvider] = [AIProvider.OPENAI, AIProvider.ANTHROPIC, AIProvider.GEMINI]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    # Seconds. Auto routing skips providers expected to be slower; in every mode it is also the
+    # request's overall budget, after which providers still running are reported as timed out
+    latency_sla: Optional[float] = Field(None, gt=0)
+    bypass_cache: bool = False  # Force fresh generations instead of cached captions/hashtags
 
 class AIResponse(BaseModel):
     provider: AIProvider
@@ -130,6 +140,7 @@ class AIResponse(BaseModel):
     generation_time: float
     success: bool
     error: Optional[str] = None
+    cached: bool = False  # Served from the generation cache; generation_time isn't a provider latency
 
 class GenerationResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -142,13 +153,15 @@ class GenerationResult(BaseModel):
     combined_result: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     performance_metrics: Optional[Dict[str, Any]] = None
+    batch_id: Optional[str] = None  # Set for items generated by a batch job
+    batch_index: Optional[int] = None
 
 class GenerationResultResponse(BaseModel):
     id: str
     category: ContentCategory
     platform: Platform
     content_description: str
-    captions: Dict[str, str]  # provider -> caption
+    captions: Dict[str, str] = {}  # provider -> caption; empty in summary listings
     hashtags: List[str]
     combined_result: str
     created_at: datetime
@@ -162,8 +175,18 @@ class BatchGenerationRequest(BaseModel):
     platform: Platform
     content_descriptions: List[str]  # Multiple content descriptions
     ai_providers: List[AIProvider] = [AIProvider.OPENAI, AIProvider.ANTHROPIC, AIProvider.GEMINI]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    # Seconds. Auto routing skips providers expected to be slower; in every mode it is also each
+    # unpacked item's overall budget, after which providers still running are reported as timed out
+    latency_sla: Optional[float] = Field(None, gt=0)
     template_id: Optional[str] = None
     batch_name: Optional[str] = None
+    bypass_cache: bool = False
+    max_concurrency: Optional[int] = None  # Items generated in parallel (capped by BATCH_ITEM_CONCURRENCY)
+    dedupe: bool = True  # Generate repeated descriptions (compared normalized) once and copy the result
+    packed: bool = False  # Send several descriptions per provider prompt; best for short captions
+    pack_size: Optional[int] = None  # Descriptions per packed prompt (default BATCH_PACK_SIZE)
+    webhook_url: Optional[str] = None  # POSTed the batch summary when it finishes or is cancelled
 
 class BatchGenerationResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -174,11 +197,13 @@ class BatchGenerationResult(BaseModel):
     total_items: int
     completed_items: int = 0
     failed_items: int = 0
+    duplicate_items: int = 0  # Items answered by copying an identical item's result
     status: str = "pending"  # pending, processing, completed, failed
-    results: List[GenerationResult] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     estimated_completion: Optional[datetime] = None
+    estimated_completion_range: Optional[List[datetime]] = None  # [typical (p50), slow (p90)] from recorded latencies
+    throughput_per_minute: Optional[float] = None  # Items finished per minute so far
 
 # Content Scheduling Models
 class ScheduledContent(BaseModel):
@@ -300,6 +325,8 @@ class VideoCaptionRequest(BaseModel):
     include_timestamps: bool = True
     language: str = "en"
     ai_providers: List[AIProvider] = [AIProvider.OPENAI, AIProvider.ANTHROPIC]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    latency_sla: Optional[float] = Field(None, gt=0)  # Seconds; auto routing skips providers slower than this
 
 class VideoCaptionResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -311,6 +338,14 @@ class VideoCaptionResult(BaseModel):
     style: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class VideoCaptionSummary(BaseModel):
+    """VideoCaptionResult without the captions and subtitle file"""
+    id: str
+    video_content_id: str
+    language: str
+    style: str
+    created_at: datetime
+
 # Podcast Models
 class PodcastContent(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -335,6 +370,8 @@ class PodcastContentRequest(BaseModel):
     tone: str = "professional"  # professional, casual, educational, entertaining
     include_timestamps: bool = True
     ai_providers: List[AIProvider] = [AIProvider.ANTHROPIC, AIProvider.OPENAI]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    latency_sla: Optional[float] = Field(None, gt=0)  # Seconds; auto routing skips providers slower than this
 
 class PodcastContentResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -372,6 +409,8 @@ class EmailContentRequest(BaseModel):
     include_personalization: bool = True
     email_length: str = "medium"  # short, medium, long
     ai_providers: List[AIProvider] = [AIProvider.ANTHROPIC, AIProvider.OPENAI]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    latency_sla: Optional[float] = Field(None, gt=0)  # Seconds; auto routing skips providers slower than this
 
 class EmailContentResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -411,6 +450,8 @@ class BlogPostRequest(BaseModel):
     include_social_snippets: bool = True
     seo_focus: bool = True
     ai_providers: List[AIProvider] = [AIProvider.ANTHROPIC, AIProvider.OPENAI]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    latency_sla: Optional[float] = Field(None, gt=0)  # Seconds; auto routing skips providers slower than this
 
 class BlogPostResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -428,6 +469,17 @@ class BlogPostResult(BaseModel):
     internal_link_suggestions: List[str] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class BlogPostSummary(BaseModel):
+    """BlogPostResult without the post body, outline and suggestions"""
+    id: str
+    blog_post_id: str
+    title: str
+    meta_description: str
+    word_count: int
+    readability_score: Optional[float] = None
+    seo_score: Optional[float] = None
+    created_at: datetime
+
 # Product Description & E-commerce Models
 class Product(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -455,6 +507,8 @@ class ProductDescriptionRequest(BaseModel):
     include_usage_instructions: bool = False
     persuasion_style: str = "benefits_focused"  # benefits_focused, feature_focused, story_driven
     ai_providers: List[AIProvider] = [AIProvider.ANTHROPIC, AIProvider.OPENAI]
+    auto_providers: Optional[int] = Field(None, ge=1)  # Route to the N best providers right now instead of ai_providers
+    latency_sla: Optional[float] = Field(None, gt=0)  # Seconds; auto routing skips providers slower than this
 
 class ProductDescriptionResult(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
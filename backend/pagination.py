@@ -0,0 +1,68 @@
+"""
+Pagination for THREE11 MOTION TECH
+Opaque keyset cursors over (created_at, id) for newest-first history listings
+"""
+
+import json
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Newest first, ties broken by id so every document has one place in the order.
+# Listings pair this with an index on (<filter fields>, created_at -1, id -1).
+KEYSET_SORT = [("created_at", -1), ("id", -1)]
+
+# Response header carrying the next page's cursor on endpoints that return a bare list
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """A cursor that wasn't produced by encode_cursor"""
+
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    """Opaque cursor pointing just past one listed item"""
+    return base64.urlsafe_b64encode(
+        json.dumps({"t": created_at.isoformat(), "i": item_id}).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position["t"]), str(position["i"])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """``query`` narrowed to the items after ``cursor`` in KEYSET_SORT order
+
+    A ``query`` with its own ``$or`` keeps it: both are combined with ``$and``.
+    Raises InvalidCursorError for a malformed cursor.
+    """
+    if not cursor:
+        return query
+    created_at, item_id = decode_cursor(cursor)
+    after_cursor = [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": item_id}}
+    ]
+    if "$or" in query:
+        return {"$and": [query, {"$or": after_cursor}]}
+    return {**query, "$or": after_cursor}
+
+
+def next_cursor(items: List[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after ``items``, or None once a page comes back short
+
+    ``items`` are documents or models with ``created_at`` and ``id``. A page
+    that happens to end exactly at the last item still gets a cursor; the page
+    after it is empty.
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last["created_at"], last["id"])
+    return encode_cursor(last.created_at, last.id)
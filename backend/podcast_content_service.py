@@ -4,18 +4,22 @@ import logging
 from datetime import datetime
 from models import *
 from ai_service import ai_service
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, get_analytics_database, register_indexes
+from pagination import KEYSET_SORT, keyset_query
 
 logger = logging.getLogger(__name__)
 
 class PodcastContentService:
     def __init__(self):
         self.db = None
+        self.analytics_db = None
     
     async def initialize(self):
         """Initialize database connection"""
         if not self.db:
             self.db = get_database()
+            self.analytics_db = get_analytics_database()
     
     async def generate_podcast_content(self, request: PodcastContentRequest) -> PodcastContentResult:
         """Generate podcast descriptions and show notes"""
@@ -41,7 +45,10 @@ class PodcastContentService:
         key_quotes = []
         resources_mentioned = []
         
-        for provider in request.ai_providers:
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, request.content_type.value, request.latency_sla
+        )
+        for provider in providers:
             try:
                 if request.content_type == ContentType.PODCAST_DESCRIPTION:
                     description = await self._generate_podcast_description(request, provider.value)
@@ -208,16 +215,17 @@ class PodcastContentService:
             "resources": resources
         }
     
-    async def get_user_podcast_content(self, user_id: str, limit: int = 20) -> List[PodcastContentResult]:
-        """Get user's podcast content history"""
+    async def get_user_podcast_content(self, user_id: str, limit: int = 20,
+                                       cursor: Optional[str] = None) -> List[PodcastContentResult]:
+        """Get user's podcast content history, newest first, after ``cursor`` if given"""
         await self.initialize()
         
-        cursor = self.db.podcast_content_results.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(limit)
+        docs = self.db.podcast_content_results.find(
+            keyset_query({"user_id": user_id}, cursor)
+        ).sort(KEYSET_SORT).limit(limit)
         
         results = []
-        async for doc in cursor:
+        async for doc in docs:
             results.append(PodcastContentResult(**doc))
         
         return results
@@ -236,7 +244,7 @@ class PodcastContentService:
             }}
         ]
         
-        cursor = self.db.podcast_content_results.aggregate(pipeline)
+        cursor = self.analytics_db.podcast_content_results.aggregate(pipeline)
         analytics = {"total_episodes": 0, "content_types": {}, "avg_duration": 0}
         
         async for doc in cursor:
@@ -249,5 +257,9 @@ class PodcastContentService:
         
         return analytics
 
+register_indexes("podcast_content_results", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+])
+
 # Global service instance
 podcast_content_service = PodcastContentService()
\ No newline at end of file
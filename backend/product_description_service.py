@@ -4,18 +4,22 @@ import logging
 from datetime import datetime
 from models import *
 from ai_service import ai_service
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, get_analytics_database, register_indexes
+from pagination import KEYSET_SORT, keyset_query
 
 logger = logging.getLogger(__name__)
 
 class ProductDescriptionService:
     def __init__(self):
         self.db = None
+        self.analytics_db = None
     
     async def initialize(self):
         """Initialize database connection"""
         if not self.db:
             self.db = get_database()
+            self.analytics_db = get_analytics_database()
     
     async def generate_product_description(self, request: ProductDescriptionRequest) -> ProductDescriptionResult:
         """Generate comprehensive product descriptions"""
@@ -45,7 +49,10 @@ class ProductDescriptionService:
         marketing_angles = []
         cross_sell_suggestions = []
         
-        for provider in request.ai_providers:
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, ContentType.PRODUCT_DESCRIPTION.value, request.latency_sla
+        )
+        for provider in providers:
             try:
                 # Generate main product content
                 product_data = await self._generate_product_content(request, provider.value)
@@ -308,16 +315,17 @@ class ProductDescriptionService:
             "cross_sell": cross_sell
         }
     
-    async def get_user_products(self, user_id: str, limit: int = 20) -> List[ProductDescriptionResult]:
-        """Get user's product description history"""
+    async def get_user_products(self, user_id: str, limit: int = 20,
+                                cursor: Optional[str] = None) -> List[ProductDescriptionResult]:
+        """Get user's product description history, newest first, after ``cursor`` if given"""
         await self.initialize()
         
-        cursor = self.db.product_description_results.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(limit)
+        docs = self.db.product_description_results.find(
+            keyset_query({"user_id": user_id}, cursor)
+        ).sort(KEYSET_SORT).limit(limit)
         
         results = []
-        async for doc in cursor:
+        async for doc in docs:
             results.append(ProductDescriptionResult(**doc))
         
         return results
@@ -345,7 +353,7 @@ class ProductDescriptionService:
             }}
         ]
         
-        cursor = self.db.product_description_results.aggregate(pipeline)
+        cursor = self.analytics_db.product_description_results.aggregate(pipeline)
         analytics = {
             "total_products": 0,
             "categories": {},
@@ -363,5 +371,9 @@ class ProductDescriptionService:
         
         return analytics
 
+register_indexes("product_description_results", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+])
+
 # Global service instance
 product_description_service = ProductDescriptionService()
\ No newline at end of file
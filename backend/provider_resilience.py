@@ -0,0 +1,177 @@
+"""
+Provider Resilience for THREE11 MOTION TECH
+Per-provider circuit breakers that stop sending traffic to degraded AI providers
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from models import AIProvider
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is rejecting calls"""
+    pass
+
+
+class CircuitBreaker:
+    """Circuit breaker over a rolling window of recent calls to one provider.
+
+    The breaker opens when, over at least ``min_calls`` recent calls, the error
+    rate or the share of calls slower than ``slow_call_seconds`` reaches its
+    threshold. After ``open_seconds`` it goes half-open and lets up to
+    ``half_open_probes`` calls through; a successful probe closes it again and
+    a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, provider: AIProvider, window_size: int = 50, min_calls: int = 10,
+                 error_rate_threshold: float = 0.5, slow_call_seconds: float = 20.0,
+                 slow_call_rate_threshold: float = 0.8, open_seconds: float = 30.0,
+                 half_open_probes: int = 1):
+        self.provider = provider
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = self.CLOSED
+        self.opened_at: Optional[float] = None
+        self.probes_in_flight = 0
+        self.trip_count = 0
+        self.rejected_count = 0
+        # (success, latency seconds)
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+
+    def is_open(self) -> bool:
+        """Whether calls are still being rejected outright
+
+        An open breaker whose ``open_seconds`` have passed is due a probe, so
+        it no longer counts as open even though ``allow_request`` hasn't moved
+        it to half-open yet. Use this, not ``state``, to decide whether to
+        route to the provider.
+        """
+        return self.state == self.OPEN and time.time() - self.opened_at < self.open_seconds
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to the provider right now"""
+        if self.state == self.OPEN:
+            if time.time() - self.opened_at < self.open_seconds:
+                self.rejected_count += 1
+                return False
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+            logger.info(f"Circuit for {self.provider.value} half-open, probing")
+
+        if self.state == self.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected_count += 1
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+    def record_success(self, latency: float):
+        slow = latency >= self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+            if slow:
+                self._trip()
+            else:
+                self._close()
+            return
+        self._window.append((True, latency))
+        self._evaluate()
+
+    def record_failure(self, latency: float):
+        if self.state == self.HALF_OPEN:
+            self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+            self._trip()
+            return
+        self._window.append((False, latency))
+        self._evaluate()
+
+    def record_abandoned(self, latency: float):
+        """Record a call that was cancelled before finishing (deadline or lost hedge)"""
+        if latency >= self.slow_call_seconds:
+            self.record_failure(latency)
+        elif self.state == self.HALF_OPEN:
+            self.probes_in_flight = max(self.probes_in_flight - 1, 0)
+
+    def _evaluate(self):
+        if self.state != self.CLOSED or len(self._window) < self.min_calls:
+            return
+        calls = len(self._window)
+        error_rate = sum(1 for success, _ in self._window if not success) / calls
+        slow_rate = sum(1 for _, latency in self._window if latency >= self.slow_call_seconds) / calls
+        if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            self._trip()
+
+    def _trip(self):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.trip_count += 1
+        self._window.clear()
+        logger.warning(f"Circuit for {self.provider.value} opened (trip #{self.trip_count})")
+
+    def _close(self):
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._window.clear()
+        logger.info(f"Circuit for {self.provider.value} closed")
+
+    def get_status(self) -> Dict:
+        calls = len(self._window)
+        errors = sum(1 for success, _ in self._window if not success)
+        return {
+            "state": self.state,
+            "trip_count": self.trip_count,
+            "rejected_count": self.rejected_count,
+            "window_calls": calls,
+            "window_error_rate": round(errors / calls, 3) if calls else 0.0,
+            "opened_at": self.opened_at
+        }
+
+
+class ProviderCircuitBreakers:
+    """One circuit breaker per AIProvider, shared by every AIService instance"""
+
+    def __init__(self, **breaker_options):
+        self._breakers = {
+            provider: CircuitBreaker(provider, **breaker_options) for provider in AIProvider
+        }
+
+    def get(self, provider: AIProvider) -> CircuitBreaker:
+        return self._breakers[provider]
+
+    def get_status(self) -> List[Dict]:
+        return [
+            {"provider": provider.value, **breaker.get_status()}
+            for provider, breaker in self._breakers.items()
+        ]
+
+
+circuit_breakers = ProviderCircuitBreakers(
+    window_size=int(os.environ.get('AI_BREAKER_WINDOW', '50')),
+    min_calls=int(os.environ.get('AI_BREAKER_MIN_CALLS', '10')),
+    error_rate_threshold=float(os.environ.get('AI_BREAKER_ERROR_RATE', '0.5')),
+    slow_call_seconds=float(os.environ.get('AI_BREAKER_SLOW_CALL_SECONDS', '20')),
+    slow_call_rate_threshold=float(os.environ.get('AI_BREAKER_SLOW_CALL_RATE', '0.8')),
+    open_seconds=float(os.environ.get('AI_BREAKER_OPEN_SECONDS', '30')),
+    half_open_probes=int(os.environ.get('AI_BREAKER_HALF_OPEN_PROBES', '1'))
+)
@@ -0,0 +1,140 @@
+"""
+AI Provider Router for THREE11 MOTION TECH
+Picks providers for "auto" requests by live latency, error rate and per-category quality
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+from models import AIProvider
+from provider_resilience import circuit_breakers, CircuitBreaker
+from provider_telemetry import provider_telemetry
+from rate_limiter import rate_limiters
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+AUTO_PROVIDER = "auto"
+
+# Relative output quality (0-1) per content category or content type; anything
+# not listed scores DEFAULT_QUALITY. Override with AI_ROUTER_QUALITY_SCORES, a
+# JSON object shaped like this one.
+DEFAULT_QUALITY = 0.8
+QUALITY_SCORES: Dict[str, Dict[str, float]] = {
+    "openai": {"fashion": 0.9, "food": 0.9, "travel": 0.9, "ideas": 0.9, "video_captions": 0.9},
+    "anthropic": {"business": 0.95, "event_space": 0.9, "blog_post": 0.95, "email_marketing": 0.95,
+                  "podcast_show_notes": 0.95, "product_description": 0.9},
+    "gemini": {"gaming": 0.85, "music": 0.85, "fitness": 0.85},
+    "perplexity": {"trending_topic": 0.95, "default": 0.7},
+}
+
+
+class ProviderRouter:
+    """Ranks candidate providers for a request.
+
+    Each provider scores ``quality * success_rate / (1 + latency / latency_scale)``
+    where latency is its recent p50 plus the time its rate limiter queue needs
+    to drain. Providers with an open circuit are skipped and half-open ones are
+    penalised. With a latency SLA, providers whose recent p95 exceeds it are
+    dropped, unless none meet it, in which case the lowest-p95 ones are used.
+    Providers without enough telemetry get ``prior_latency`` so new or idle
+    backends still receive traffic.
+    """
+
+    def __init__(self, latency_scale: float = 5.0, prior_latency: float = 3.0,
+                 half_open_penalty: float = 0.5, quality_scores: Optional[Dict[str, Dict[str, float]]] = None):
+        self.latency_scale = latency_scale
+        self.prior_latency = prior_latency
+        self.half_open_penalty = half_open_penalty
+        self.quality_scores = quality_scores or QUALITY_SCORES
+        self._stats = {"routed": 0, "sla_fallbacks": 0}
+        self._picks = {provider.value: 0 for provider in AIProvider}
+
+    def quality(self, provider: AIProvider, category: Optional[str] = None) -> float:
+        scores = self.quality_scores.get(provider.value, {})
+        if category and category in scores:
+            return scores[category]
+        return scores.get("default", DEFAULT_QUALITY)
+
+    def _queue_delay(self, provider: AIProvider) -> float:
+        status = rate_limiters.get(provider).get_status()
+        return status["queue_depth"] / status["requests_per_second"]
+
+    def _evaluate(self, provider: AIProvider, category: Optional[str]) -> Optional[Dict]:
+        breaker = circuit_breakers.get(provider)
+        if breaker.is_open():
+            return None
+        stats = provider_telemetry.get(provider)
+        p50 = stats.latency_percentile(0.5)
+        p95 = stats.latency_percentile(0.95)
+        success_rate = stats.success_rate()
+        latency = (p50 if p50 is not None else self.prior_latency) + self._queue_delay(provider)
+        score = (
+            self.quality(provider, category)
+            * (success_rate if success_rate is not None else 1.0)
+            / (1 + latency / self.latency_scale)
+        )
+        if breaker.state != CircuitBreaker.CLOSED:
+            # Half-open, or open and due a probe
+            score *= self.half_open_penalty
+        return {
+            "provider": provider,
+            "score": score,
+            "expected_latency": latency,
+            "p95": p95
+        }
+
+    def rank(self, candidates: Iterable[AIProvider], category: Optional[str] = None,
+             latency_sla: Optional[float] = None) -> List[Dict]:
+        """Score candidates best-first, applying the latency SLA"""
+        ranked = [entry for entry in (self._evaluate(p, category) for p in candidates) if entry]
+        if latency_sla is not None and ranked:
+            def expected_p95(entry: Dict) -> float:
+                return entry["p95"] if entry["p95"] is not None else entry["expected_latency"]
+
+            within_sla = [entry for entry in ranked if expected_p95(entry) <= latency_sla]
+            if within_sla:
+                ranked = within_sla
+            else:
+                self._stats["sla_fallbacks"] += 1
+                ranked.sort(key=expected_p95)
+                return ranked
+        ranked.sort(key=lambda entry: entry["score"], reverse=True)
+        return ranked
+
+    def select(self, candidates: Iterable[AIProvider], top_k: int = 1, category: Optional[str] = None,
+               latency_sla: Optional[float] = None) -> List[AIProvider]:
+        """Pick the ``top_k`` best candidates right now"""
+        chosen = [entry["provider"] for entry in self.rank(candidates, category, latency_sla)[:max(top_k, 1)]]
+        self._stats["routed"] += 1
+        for provider in chosen:
+            self._picks[provider.value] += 1
+        logger.debug(f"Routed {category or 'generic'} request to {[p.value for p in chosen]}")
+        return chosen
+
+    def get_stats(self) -> Dict:
+        return {**self._stats, "picks": dict(self._picks)}
+
+
+def _load_quality_scores() -> Dict[str, Dict[str, float]]:
+    raw = os.environ.get('AI_ROUTER_QUALITY_SCORES')
+    if not raw:
+        return QUALITY_SCORES
+    try:
+        return {**QUALITY_SCORES, **json.loads(raw)}
+    except ValueError:
+        logger.error("Ignoring invalid AI_ROUTER_QUALITY_SCORES (expected a JSON object)")
+        return QUALITY_SCORES
+
+
+provider_router = ProviderRouter(
+    latency_scale=float(os.environ.get('AI_ROUTER_LATENCY_SCALE', '5')),
+    prior_latency=float(os.environ.get('AI_ROUTER_PRIOR_LATENCY', '3')),
+    quality_scores=_load_quality_scores()
+)
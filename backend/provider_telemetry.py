@@ -0,0 +1,192 @@
+"""
+AI Provider Telemetry for THREE11 MOTION TECH
+Rolling per-provider latency percentiles, success rates and throughput, with periodic snapshots to Mongo
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+from database import get_database, register_indexes
+from models import AIProvider
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the cumulative latency histogram buckets
+LATENCY_BUCKETS = [0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60]
+
+# Width (seconds) of the buckets calls are counted in for throughput
+COUNT_BUCKET_SECONDS = 10
+
+
+class ProviderStats:
+    """Rolling window of recent calls to one provider plus a cumulative histogram
+
+    Latency percentiles and success rate come from the last ``max_samples``
+    calls in the window. Throughput is counted separately, in
+    COUNT_BUCKET_SECONDS buckets, so it keeps counting every call once a busy
+    provider fills the sample window.
+    """
+
+    def __init__(self, provider: AIProvider, window_seconds: int, max_samples: int):
+        self.provider = provider
+        self.window_seconds = window_seconds
+        # (timestamp, latency seconds, success)
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=max_samples)
+        # [bucket number, calls], oldest first
+        self._call_counts: Deque[List[int]] = deque()
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_calls = 0
+        self.total_failures = 0
+
+    def record(self, latency: float, success: bool):
+        now = time.time()
+        self._samples.append((now, latency, success))
+        bucket = int(now // COUNT_BUCKET_SECONDS)
+        if self._call_counts and self._call_counts[-1][0] == bucket:
+            self._call_counts[-1][1] += 1
+        else:
+            self._call_counts.append([bucket, 1])
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.total_calls += 1
+        if not success:
+            self.total_failures += 1
+
+    def _recent(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.time() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        return list(self._samples)
+
+    def recent_calls(self) -> int:
+        """Calls in the window, however many there were"""
+        first_bucket = int((time.time() - self.window_seconds) // COUNT_BUCKET_SECONDS)
+        while self._call_counts and self._call_counts[0][0] < first_bucket:
+            self._call_counts.popleft()
+        return sum(count for _, count in self._call_counts)
+
+    def latency_percentile(self, percentile: float, min_samples: int = 5) -> Optional[float]:
+        """Latency percentile of recent successful calls, or None without enough data"""
+        latencies = sorted(latency for _, latency, success in self._recent() if success)
+        if len(latencies) < min_samples:
+            return None
+        return latencies[min(int(len(latencies) * percentile), len(latencies) - 1)]
+
+    def success_rate(self) -> Optional[float]:
+        recent = self._recent()
+        if not recent:
+            return None
+        return sum(1 for _, _, success in recent if success) / len(recent)
+
+    def get_summary(self) -> Dict:
+        recent = self._recent()
+        latencies = sorted(latency for _, latency, success in recent if success)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)], 3)
+
+        successes = sum(1 for _, _, success in recent if success)
+        calls = self.recent_calls()
+        return {
+            "window_seconds": self.window_seconds,
+            "calls": calls,
+            "sampled_calls": len(recent),
+            "success_rate": round(successes / len(recent), 3) if recent else None,
+            "throughput_per_minute": round(calls * 60 / self.window_seconds, 2),
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_p99": percentile(0.99),
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            # Upper bound in seconds per bucket, None for the overflow bucket; a list
+            # rather than a mapping since bounds like 0.25 aren't valid Mongo field names
+            "latency_histogram": [
+                {"le": bound, "count": count} for bound, count in zip(LATENCY_BUCKETS + [None], self.histogram)
+            ]
+        }
+
+
+class ProviderTelemetry:
+    """Live telemetry for every AIProvider, shared by every AIService instance"""
+
+    def __init__(self, window_seconds: int = 900, max_samples: int = 2000,
+                 snapshot_interval: int = 300, snapshot_retention_days: int = 30):
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_retention_days = snapshot_retention_days
+        self._stats = {
+            provider: ProviderStats(provider, window_seconds, max_samples) for provider in AIProvider
+        }
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def record(self, provider: AIProvider, latency: float, success: bool):
+        self._stats[provider].record(latency, success)
+
+    def get(self, provider: AIProvider) -> ProviderStats:
+        return self._stats[provider]
+
+    def get_summary(self, provider: AIProvider) -> Dict:
+        return self._stats[provider].get_summary()
+
+    async def persist_snapshot(self):
+        """Write the current per-provider summary to provider_telemetry_snapshots"""
+        db = get_database()
+        if db is None:
+            return
+        created_at = datetime.utcnow()
+        await db.provider_telemetry_snapshots.insert_many([
+            {
+                "provider": provider.value,
+                "created_at": created_at,
+                "expires_at": created_at + timedelta(days=self.snapshot_retention_days),
+                **stats.get_summary()
+            }
+            for provider, stats in self._stats.items()
+        ])
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.persist_snapshot()
+            except Exception as e:
+                logger.error(f"Error persisting provider telemetry snapshot: {e}")
+
+    def start(self):
+        """Start the periodic snapshot task (called on application startup)"""
+        if self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        """Stop the snapshot task and write one last snapshot"""
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        try:
+            await self.persist_snapshot()
+        except Exception as e:
+            logger.error(f"Error persisting provider telemetry snapshot: {e}")
+
+
+# Expired snapshots removed by Mongo
+register_indexes("provider_telemetry_snapshots", [
+    IndexModel([("provider", ASCENDING), ("created_at", DESCENDING)]),
+    IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+])
+
+provider_telemetry = ProviderTelemetry(
+    window_seconds=int(os.environ.get('AI_TELEMETRY_WINDOW_SECONDS', '900')),
+    snapshot_interval=int(os.environ.get('AI_TELEMETRY_SNAPSHOT_INTERVAL', '300'))
+)
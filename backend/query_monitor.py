@@ -0,0 +1,381 @@
+"""
+Query Monitor for THREE11 MOTION TECH
+Mongo command monitoring attributed to the API route that issued each command, a slow-query log, and connection pool wait times
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextvars import Context, ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Coroutine, Deque, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Commands that read or write application data; handshakes, pings and auth aren't counted
+DATA_COMMANDS = {
+    "find", "getMore", "aggregate", "count", "distinct", "insert", "update", "delete", "findAndModify"
+}
+
+# Where each command keeps its filter
+FILTER_FIELDS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+
+# Commands issued outside any HTTP request: batch workers, telemetry snapshots, startup
+BACKGROUND_ROUTE = "<background>"
+
+
+class RequestQueries:
+    """Commands issued while serving one HTTP request"""
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.queries = 0
+        self.duration_ms = 0.0
+        self.docs_returned = 0
+
+    @property
+    def route(self) -> str:
+        # FastAPI puts the matched route into the scope once routing has run
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or "<unmatched>"
+        return f"{self.scope.get('method', '')} {path}".strip()
+
+
+current_request: ContextVar[Optional[RequestQueries]] = ContextVar("current_request", default=None)
+
+
+def create_background_task(coro: Coroutine) -> asyncio.Task:
+    """Start ``coro`` as a task outside any request, so its commands count under BACKGROUND_ROUTE
+
+    A task copies the context it is created in. A long-lived task first
+    started by a request handler would otherwise be attributed to that
+    request's route for as long as it runs.
+    """
+    return Context().run(asyncio.create_task, coro)
+
+
+def filter_shape(value: Any) -> Any:
+    """A filter with its values replaced by "?", so queries differing only in values look the same
+
+    Operators and field names are kept; lists of sub-filters (``$or``,
+    ``$and``) keep their shapes, other lists collapse to one "?".
+    """
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return [filter_shape(item) for item in value]
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Optional[Any]:
+    """Shape of the filter (or pipeline) a command runs with, if it has one"""
+    if command_name in FILTER_FIELDS:
+        return filter_shape(command.get(FILTER_FIELDS[command_name], {}))
+    if command_name == "aggregate":
+        return [
+            {stage: filter_shape(spec) if stage == "$match" else "?" for stage, spec in step.items()}
+            for step in command.get("pipeline", [])
+        ]
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return filter_shape(statements[0].get("q", {}))
+    return None
+
+
+def docs_returned(command_name: str, reply: Dict[str, Any]) -> int:
+    """Documents a command sent back or touched, read from its reply"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "distinct":
+        return len(reply.get("values", []))
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class QueryMonitor(monitoring.CommandListener):
+    """Counts and times Mongo commands per API route.
+
+    Registered as a pymongo event listener on the shared client. The route
+    comes from ``current_request``, set by QueryMonitorMiddleware; Motor runs
+    pymongo on executor threads with the caller's context copied, so the
+    listener sees the route of the coroutine that awaited the command.
+
+    Per route it keeps request, command and failure counts, total and
+    slowest command time, documents returned, and queries per request
+    (mean and max), the number that gives away N+1 loops. Commands slower than
+    ``slow_ms`` go to a bounded log with their filter shape. Mongo doesn't
+    report documents examined in command replies; that needs the profiler.
+    """
+
+    def __init__(self, slow_ms: float = 100, slow_log_size: int = 200, request_warn_queries: int = 50):
+        self.slow_ms = slow_ms
+        self.request_warn_queries = request_warn_queries
+        self._lock = threading.Lock()
+        # (connection id, request id) -> (request, route, command name, collection, shape)
+        self._pending: Dict[Tuple[Any, int], Tuple[Optional[RequestQueries], str, str, str, Any]] = {}
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+
+    def _route_stats(self, route: str) -> Dict[str, Any]:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "requests": 0,
+                "queries": 0,
+                "failed": 0,
+                "query_time_ms": 0.0,
+                "max_query_ms": 0.0,
+                "docs_returned": 0,
+                "max_queries_per_request": 0,
+                "commands": {}
+            }
+        return stats
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name not in DATA_COMMANDS:
+            return
+        request = current_request.get()
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                request,
+                request.route if request else BACKGROUND_ROUTE,
+                event.command_name,
+                str(collection),
+                command_shape(event.command_name, event.command)
+            )
+
+    def _finish(self, event, reply: Optional[Dict[str, Any]]):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            request, route, command_name, collection, shape = pending
+            duration_ms = event.duration_micros / 1000
+            returned = docs_returned(command_name, reply) if reply is not None else 0
+
+            stats = self._route_stats(route)
+            stats["queries"] += 1
+            stats["query_time_ms"] += duration_ms
+            stats["max_query_ms"] = max(stats["max_query_ms"], duration_ms)
+            stats["docs_returned"] += returned
+            stats["commands"][command_name] = stats["commands"].get(command_name, 0) + 1
+            if reply is None:
+                stats["failed"] += 1
+            if request is not None:
+                request.queries += 1
+                request.duration_ms += duration_ms
+                request.docs_returned += returned
+
+            slow = duration_ms >= self.slow_ms
+            if slow:
+                self._slow.append({
+                    "route": route,
+                    "command": command_name,
+                    "collection": collection,
+                    "filter_shape": shape,
+                    "duration_ms": round(duration_ms, 2),
+                    "docs_returned": returned,
+                    "at": datetime.utcnow()
+                })
+        if slow:
+            logger.warning(f"Slow Mongo {command_name} on {collection} ({duration_ms:.0f}ms) from {route}: {shape}")
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, event.reply)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, None)
+
+    def request_finished(self, request: RequestQueries):
+        """Fold a finished request's query count into its route"""
+        route = request.route
+        with self._lock:
+            stats = self._route_stats(route)
+            stats["requests"] += 1
+            stats["max_queries_per_request"] = max(stats["max_queries_per_request"], request.queries)
+        if request.queries >= self.request_warn_queries:
+            logger.warning(f"{route} issued {request.queries} Mongo queries in one request")
+
+    def get_stats(self, slow_limit: int = 50) -> Dict[str, Any]:
+        """Per-route query stats, heaviest total query time first, and the most recent slow queries"""
+        with self._lock:
+            routes = {}
+            for route, stats in sorted(self._routes.items(), key=lambda item: -item[1]["query_time_ms"]):
+                requests = stats["requests"]
+                routes[route] = {
+                    **stats,
+                    "commands": dict(stats["commands"]),
+                    "query_time_ms": round(stats["query_time_ms"], 2),
+                    "max_query_ms": round(stats["max_query_ms"], 2),
+                    "avg_query_ms": round(stats["query_time_ms"] / stats["queries"], 2) if stats["queries"] else 0.0,
+                    "queries_per_request": round(stats["queries"] / requests, 2) if requests else None
+                }
+            slow_queries = list(self._slow)[-slow_limit:][::-1]
+        return {
+            "slow_query_ms": self.slow_ms,
+            "routes": routes,
+            "slow_queries": slow_queries
+        }
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool wait times and occupancy for one client.
+
+    The wait is the time from asking the pool for a connection to getting
+    one (or giving up); waits that grow mean the pool is too small for the
+    load on it. Check-outs happen synchronously on one thread, so the start
+    time is kept per thread and address.
+    """
+
+    def __init__(self, name: str, window: int = 1000):
+        self.name = name
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._stats = {
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checked_out": 0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "pool_clears": 0,
+            "max_wait_ms": 0.0
+        }
+        self._failure_reasons: Dict[str, int] = {}
+
+    def _started_at(self) -> Dict[Any, float]:
+        started = getattr(self._local, "started", None)
+        if started is None:
+            started = self._local.started = {}
+        return started
+
+    def _waited_ms(self, address) -> Optional[float]:
+        started = self._started_at().pop(address, None)
+        return (time.perf_counter() - started) * 1000 if started is not None else None
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent):
+        self._started_at()[event.address] = time.perf_counter()
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent):
+        waited_ms = self._waited_ms(event.address)
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["checked_out"] += 1
+            if waited_ms is not None:
+                self._waits.append(waited_ms)
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent):
+        waited_ms = self._waited_ms(event.address)
+        with self._lock:
+            self._stats["checkout_failures"] += 1
+            self._failure_reasons[event.reason] = self._failure_reasons.get(event.reason, 0) + 1
+            if waited_ms is not None:
+                self._waits.append(waited_ms)
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent):
+        with self._lock:
+            self._stats["checked_out"] = max(self._stats["checked_out"] - 1, 0)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent):
+        with self._lock:
+            self._stats["connections_created"] += 1
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        with self._lock:
+            self._stats["connections_closed"] += 1
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent):
+        with self._lock:
+            self._stats["pool_clears"] += 1
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent):
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent):
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent):
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters, connections open and in use, and wait percentiles over the last ``window`` check-outs"""
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = dict(self._stats)
+            failure_reasons = dict(self._failure_reasons)
+
+        def percentile(fraction: float) -> float:
+            return round(waits[min(int(len(waits) * fraction), len(waits) - 1)], 3) if waits else 0.0
+
+        return {
+            **stats,
+            "open_connections": stats["connections_created"] - stats["connections_closed"],
+            "max_wait_ms": round(stats["max_wait_ms"], 3),
+            "wait_ms_p50": percentile(0.5),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_p99": percentile(0.99),
+            "wait_samples": len(waits),
+            "failure_reasons": failure_reasons
+        }
+
+
+class QueryMonitorMiddleware:
+    """ASGI middleware tagging each HTTP request's Mongo commands with its route.
+
+    Adds ``X-DB-Queries`` (commands issued before the response started) and
+    ``X-DB-Time-Ms`` headers. Pure ASGI rather than BaseHTTPMiddleware so
+    streaming responses pass through untouched.
+    """
+
+    def __init__(self, app, monitor: QueryMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestQueries(scope)
+        token = current_request.set(request)
+
+        async def send_with_counts(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(request.queries).encode()))
+                headers.append((b"x-db-time-ms", f"{request.duration_ms:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_counts)
+        finally:
+            current_request.reset(token)
+            self.monitor.request_finished(request)
+
+
+query_monitor = QueryMonitor(
+    slow_ms=float(os.environ.get('MONGO_SLOW_QUERY_MS', '100')),
+    slow_log_size=int(os.environ.get('MONGO_SLOW_QUERY_LOG_SIZE', '200')),
+    request_warn_queries=int(os.environ.get('MONGO_REQUEST_WARN_QUERIES', '50'))
+)
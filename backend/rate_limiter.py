@@ -0,0 +1,212 @@
+"""
+AI Provider Rate Limiter for THREE11 MOTION TECH
+Token-bucket admission control per AI provider with priority lanes and a bounded wait queue
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+from models import AIProvider
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Admission lanes; lower values are served first"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Priority of the AI calls made by the current task (inherited by tasks it spawns)
+current_priority: ContextVar[RequestPriority] = ContextVar(
+    "current_priority", default=RequestPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """Run the enclosed AI calls in the given admission lane"""
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a provider's wait queue is full or a request waited too long"""
+
+    def __init__(self, provider: AIProvider, retry_after: float, reason: str = "queue full"):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider.value} rate limit exceeded ({reason}), retry after {retry_after:.0f}s")
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.available = capacity
+        self._updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (amounts above capacity wait for a full bucket)"""
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+
+class ProviderRateLimiter:
+    """Admission control for one provider: requests/sec and tokens/min buckets.
+
+    Callers that can't be admitted immediately wait in a bounded queue ordered
+    by priority lane, then arrival. Only the head of the queue consumes
+    capacity, so background work never overtakes waiting interactive requests.
+    """
+
+    def __init__(self, provider: AIProvider, requests_per_second: float, tokens_per_minute: float,
+                 max_queue: int = 100, interactive_max_wait: float = 10.0):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_second, max(requests_per_second, 1.0))
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+        self.max_queue = max_queue
+        self.interactive_max_wait = interactive_max_wait
+
+        self._queue: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._changed: Optional[asyncio.Event] = None
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    def _estimated_wait(self, tokens: int) -> float:
+        """Rough time until a new request at the back of the queue would be admitted"""
+        queued = len(self._queue) + 1
+        return max(queued / self.requests.rate, self.tokens.seconds_until(tokens * queued))
+
+    def _signal(self):
+        if self._changed is not None:
+            self._changed.set()
+        self._changed = asyncio.Event()
+
+    def check_admission(self, tokens: int = 0):
+        """Raise RateLimitExceeded right away if a new request could not even be queued"""
+        if len(self._queue) >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise RateLimitExceeded(self.provider, self._estimated_wait(tokens))
+
+    async def acquire(self, tokens: int, priority: Optional[RequestPriority] = None):
+        """Wait for capacity to send one request estimated at ``tokens`` tokens"""
+        priority = current_priority.get() if priority is None else priority
+        self.check_admission(tokens)
+
+        max_wait = self.interactive_max_wait if priority == RequestPriority.INTERACTIVE else None
+        ticket = (int(priority), next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        if len(self._queue) > 1:
+            self._stats["queued"] += 1
+
+        try:
+            await asyncio.wait_for(self._wait_turn(ticket, tokens), timeout=max_wait)
+        except asyncio.TimeoutError:
+            self._stats["timed_out"] += 1
+            raise RateLimitExceeded(self.provider, self._estimated_wait(tokens), reason="wait timeout")
+        finally:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            self._signal()
+
+    async def _wait_turn(self, ticket: Tuple[int, int], tokens: int):
+        while True:
+            if self._queue[0] == ticket:
+                self.requests.refill()
+                self.tokens.refill()
+                delay = max(self.requests.seconds_until(1), self.tokens.seconds_until(tokens))
+                if delay == 0:
+                    self.requests.available -= 1
+                    self.tokens.available -= min(tokens, self.tokens.capacity)
+                    heapq.heappop(self._queue)
+                    self._stats["admitted"] += 1
+                    return
+                await asyncio.sleep(delay)
+            else:
+                # Sleep until the queue changes (head admitted, waiter left, etc.)
+                await self._changed.wait()
+
+    def get_status(self) -> Dict:
+        self.requests.refill()
+        self.tokens.refill()
+        lanes = {lane.name.lower(): 0 for lane in RequestPriority}
+        for lane, _ in self._queue:
+            lanes[RequestPriority(lane).name.lower()] += 1
+        return {
+            "provider": self.provider.value,
+            "requests_per_second": self.requests.rate,
+            "tokens_per_minute": self.tokens.capacity,
+            "queue_depth": len(self._queue),
+            "queue_by_lane": lanes,
+            "max_queue": self.max_queue,
+            **self._stats
+        }
+
+
+class ProviderRateLimiters:
+    """One limiter per AIProvider, shared by every AIService instance"""
+
+    # Conservative defaults; override with AI_RATE_LIMIT_<PROVIDER>_RPS / _TPM
+    DEFAULT_LIMITS = {
+        AIProvider.OPENAI: (10, 300000),
+        AIProvider.ANTHROPIC: (5, 200000),
+        AIProvider.GEMINI: (10, 300000),
+        AIProvider.PERPLEXITY: (2, 100000),
+    }
+
+    def __init__(self):
+        max_queue = int(os.environ.get('AI_RATE_LIMIT_QUEUE_SIZE', '100'))
+        interactive_max_wait = float(os.environ.get('AI_RATE_LIMIT_INTERACTIVE_MAX_WAIT', '10'))
+        self._limiters = {}
+        for provider, (rps, tpm) in self.DEFAULT_LIMITS.items():
+            prefix = f"AI_RATE_LIMIT_{provider.value.upper()}"
+            self._limiters[provider] = ProviderRateLimiter(
+                provider,
+                requests_per_second=float(os.environ.get(f"{prefix}_RPS", rps)),
+                tokens_per_minute=float(os.environ.get(f"{prefix}_TPM", tpm)),
+                max_queue=max_queue,
+                interactive_max_wait=interactive_max_wait
+            )
+
+    def get(self, provider: AIProvider) -> ProviderRateLimiter:
+        return self._limiters[provider]
+
+    def get_status(self) -> List[Dict]:
+        return [limiter.get_status() for limiter in self._limiters.values()]
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token plus the completion budget"""
+    return len(prompt) // 4 + max_tokens
+
+
+rate_limiters = ProviderRateLimiters()
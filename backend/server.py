@@ -1,22 +1,29 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, status, File, UploadFile, Form, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 import jwt
 import io
+import json
 import uuid
 import random
 
 # Import our models and services
 from models import *
-from database import connect_to_mongo, close_mongo_connection, get_database
+from database import connect_to_mongo, close_mongo_connection, get_database, get_analytics_database, index_report, pool_stats
+from query_monitor import query_monitor, QueryMonitorMiddleware
+from pagination import KEYSET_SORT, NEXT_CURSOR_HEADER, InvalidCursorError, keyset_query, next_cursor
 from ai_service import ai_service
+from rate_limiter import RateLimitExceeded
+from provider_telemetry import provider_telemetry
 from auth_service import auth_service
 from content_creation_service import content_creation_service
 from stripe_service import stripe_service
@@ -24,7 +31,8 @@ from voice_service import VoiceService
 from trends_service import TrendsService
 from content_remix_service import ContentRemixEngine
 from competitor_analysis_service import competitor_service
-from batch_content_service import batch_content_service
+from batch_content_service import batch_content_service, iter_csv_descriptions, iter_ndjson_descriptions, BatchItemLimitExceeded
+from batch_events import WebhookSender
 from content_scheduling_service import content_scheduling_service
 from template_library_service import template_library_service
 from advanced_analytics_service import advanced_analytics_service
@@ -74,9 +82,13 @@ async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
     await initialize_admin()  # Initialize admin account
+    provider_telemetry.start()
+    await batch_content_service.start_workers()
     logger.info("Application started")
     yield
     # Shutdown
+    await batch_content_service.stop_workers()
+    await provider_telemetry.stop()
     await close_mongo_connection()
     logger.info("Application stopped")
 
@@ -88,6 +100,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """AI provider queues are full; tell the client when to come back"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(int(exc.retry_after + 0.5), 1))}
+    )
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -221,112 +242,211 @@ async def get_team_members(current_user: Dict = Depends(get_current_user_enhance
     return {"team_members": members}
 
 # Enhanced Content Generation Routes (Updated for new auth)
+async def save_generation_result(user_id: str, request: GenerationRequest, result: Dict) -> GenerationResultResponse:
+    """Persist a combined generation, update usage and analytics, and build the API response"""
+    db = get_database()
+    
+    # Create generation result
+    generation_result = GenerationResult(
+        user_id=user_id,
+        category=request.category,
+        platform=request.platform,
+        content_description=request.content_description,
+        ai_responses=result["ai_responses"],
+        hashtags=result["hashtags"],
+        combined_result=result["combined_result"]
+    )
+    
+    # Save to database
+    await db.generation_results.insert_one(generation_result.dict())
+    
+    # Update user usage
+    await db.users.update_one(
+        {"id": user_id},
+        {
+            "$inc": {
+                "daily_generations_used": 1,
+                "total_generations": 1
+            },
+            "$set": {"updated_at": datetime.utcnow()}
+        }
+    )
+    
+    # Save analytics; cache hits never reached a provider, so their times would skew latency data
+    for ai_response in result["ai_responses"]:
+        if ai_response.cached:
+            continue
+        analytics = UsageAnalytics(
+            user_id=user_id,
+            category=request.category,
+            platform=request.platform,
+            ai_provider=ai_response.provider,
+            generation_time=ai_response.generation_time,
+            success=ai_response.success
+        )
+        await db.usage_analytics.insert_one(analytics.dict())
+    
+    return GenerationResultResponse(
+        id=generation_result.id,
+        category=generation_result.category,
+        platform=generation_result.platform,
+        content_description=generation_result.content_description,
+        captions=result["captions"],
+        hashtags=result["hashtags"],
+        combined_result=result["combined_result"],
+        created_at=generation_result.created_at
+    )
+
 @api_router.post("/generate", response_model=GenerationResultResponse)
 async def generate_content(
     request: GenerationRequest,
     current_user: Dict = Depends(get_current_user_enhanced)
 ):
     """Generate AI-powered captions and hashtags"""
-    db = get_database()
-    
     # Check generation limit
     await check_generation_limit(current_user)
     
+    providers = ai_service.resolve_providers(
+        request.ai_providers, request.auto_providers, request.category.value, request.latency_sla
+    )
+    
+    # Shed load up front when the providers' wait queues are full (503 + Retry-After)
+    ai_service.check_admission(providers)
+    
     try:
         # Generate content using AI service
         result = await ai_service.generate_combined_content(
             category=request.category,
             platform=request.platform,
             content_description=request.content_description,
-            selected_providers=request.ai_providers
-        )
-        
-        # Create generation result
-        generation_result = GenerationResult(
-            user_id=current_user.id,
-            category=request.category,
-            platform=request.platform,
-            content_description=request.content_description,
-            ai_responses=result["ai_responses"],
-            hashtags=result["hashtags"],
-            combined_result=result["combined_result"]
+            selected_providers=providers,
+            request_budget=request.latency_sla,
+            use_cache=not request.bypass_cache
         )
         
-        # Save to database
-        await db.generation_results.insert_one(generation_result.dict())
-        
-        # Update user usage
-        await db.users.update_one(
-            {"id": current_user.id},
-            {
-                "$inc": {
-                    "daily_generations_used": 1,
-                    "total_generations": 1
-                },
-                "$set": {"updated_at": datetime.utcnow()}
-            }
-        )
-        
-        # Save analytics
-        for ai_response in result["ai_responses"]:
-            analytics = UsageAnalytics(
-                user_id=current_user.id,
-                category=request.category,
-                platform=request.platform,
-                ai_provider=ai_response.provider,
-                generation_time=ai_response.generation_time,
-                success=ai_response.success
-            )
-            await db.usage_analytics.insert_one(analytics.dict())
-        
-        # Return response
-        return GenerationResultResponse(
-            id=generation_result.id,
-            category=generation_result.category,
-            platform=generation_result.platform,
-            content_description=generation_result.content_description,
-            captions=result["captions"],
-            hashtags=result["hashtags"],
-            combined_result=result["combined_result"],
-            created_at=generation_result.created_at
-        )
+        return await save_generation_result(current_user.id, request, result)
         
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error generating content: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate content")
 
+def format_sse(event: str, data) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@api_router.post("/generate/stream")
+async def generate_content_stream(
+    request: GenerationRequest,
+    current_user: Dict = Depends(get_current_user_enhanced)
+):
+    """Generate AI-powered captions and hashtags, streaming each result as server-sent events
+
+    Emits a ``caption`` event per provider as soon as it finishes, a ``hashtags``
+    event, then ``complete`` with the saved GenerationResultResponse.
+    """
+    # Check limits before the stream starts so errors are plain HTTP responses
+    await check_generation_limit(current_user)
+    providers = ai_service.resolve_providers(
+        request.ai_providers, request.auto_providers, request.category.value, request.latency_sla
+    )
+    ai_service.check_admission(providers)
+    
+    async def event_stream():
+        try:
+            async for event, payload in ai_service.stream_combined_content(
+                category=request.category,
+                platform=request.platform,
+                content_description=request.content_description,
+                selected_providers=providers,
+                request_budget=request.latency_sla,
+                use_cache=not request.bypass_cache
+            ):
+                if event == "caption":
+                    yield format_sse("caption", payload.dict())
+                elif event == "hashtags":
+                    yield format_sse("hashtags", {"hashtags": payload})
+                elif event == "result":
+                    response = await save_generation_result(current_user.id, request, payload)
+                    yield format_sse("complete", response.dict())
+        except RateLimitExceeded as e:
+            yield format_sse("error", {"detail": str(e), "retry_after": max(int(e.retry_after + 0.5), 1)})
+        except Exception as e:
+            logger.error(f"Error streaming generated content: {e}")
+            yield format_sse("error", {"detail": "Failed to generate content"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Generation History Routes
+
+# Generation listings read only what GenerationResultResponse shows: never the
+# per-provider timings and errors, and no captions at all in the summary view
+GENERATION_LIST_PROJECTIONS = {
+    ListFields.SUMMARY: {
+        "_id": 0, "id": 1, "category": 1, "platform": 1, "content_description": 1,
+        "hashtags": 1, "combined_result": 1, "created_at": 1
+    },
+    ListFields.FULL: {
+        "_id": 0, "id": 1, "category": 1, "platform": 1, "content_description": 1,
+        "ai_responses.provider": 1, "ai_responses.caption": 1,
+        "hashtags": 1, "combined_result": 1, "created_at": 1
+    }
+}
+
+def generation_list_item(doc: dict) -> GenerationResultResponse:
+    """Listing entry for a generation_results document read with GENERATION_LIST_PROJECTIONS"""
+    # Convert ai_responses to captions dict
+    captions = {}
+    for ai_response in doc.get("ai_responses", []):
+        captions[ai_response["provider"]] = ai_response["caption"]
+    
+    return GenerationResultResponse(
+        id=doc["id"],
+        category=doc["category"],
+        platform=doc["platform"],
+        content_description=doc["content_description"],
+        captions=captions,
+        hashtags=doc["hashtags"],
+        combined_result=doc["combined_result"],
+        created_at=doc["created_at"]
+    )
+
 @api_router.get("/generations", response_model=List[GenerationResultResponse])
 async def get_user_generations(
+    response: Response,
     current_user: User = Depends(get_current_user),
     limit: int = 20,
-    skip: int = 0
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    fields: ListFields = ListFields.FULL
 ):
-    """Get user's generation history"""
+    """Get user's generation history, newest first
+
+    The ``X-Next-Cursor`` response header holds the cursor for the next page.
+    ``skip`` still works without a cursor but gets slower with every page.
+    ``fields=summary`` leaves out the per-provider captions.
+    """
     db = get_database()
     
-    cursor = db.generation_results.find(
-        {"user_id": current_user.id}
-    ).sort("created_at", -1).skip(skip).limit(limit)
+    try:
+        query = keyset_query({"user_id": current_user.id}, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    docs = db.generation_results.find(query, GENERATION_LIST_PROJECTIONS[fields]).sort(KEYSET_SORT)
+    if skip and not cursor:
+        docs = docs.skip(skip)
+    docs = docs.limit(limit)
     
-    results = []
-    async for doc in cursor:
-        # Convert ai_responses to captions dict
-        captions = {}
-        for response in doc.get("ai_responses", []):
-            captions[response["provider"]] = response["caption"]
-        
-        results.append(GenerationResultResponse(
-            id=doc["id"],
-            category=doc["category"],
-            platform=doc["platform"],
-            content_description=doc["content_description"],
-            captions=captions,
-            hashtags=doc["hashtags"],
-            combined_result=doc["combined_result"],
-            created_at=doc["created_at"]
-        ))
+    results = [generation_list_item(doc) async for doc in docs]
     
+    page_cursor = next_cursor(results, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     return results
 
 # AI Provider Information Routes
@@ -338,7 +458,12 @@ async def get_ai_providers():
         return {
             "providers": providers,
             "total_providers": len(providers),
-            "available_providers": len([p for p in providers if p["available"]])
+            "available_providers": len([p for p in providers if p["available"]]),
+            "client_pool": ai_service.get_client_pool_stats(),
+            "generation_cache": ai_service.get_cache_stats(),
+            "rate_limits": ai_service.get_rate_limit_status(),
+            "coalescing": ai_service.get_coalescing_stats(),
+            "routing": ai_service.get_routing_stats()
         }
     except Exception as e:
         logger.error(f"Error getting AI provider info: {e}")
@@ -373,6 +498,8 @@ async def get_ai_provider_info(provider: str):
             "provider": provider,
             "available": is_available,
             "model": ai_service.model_versions.get(ai_provider, ""),
+            "circuit_breaker": ai_service.get_circuit_status(ai_provider),
+            "telemetry": ai_service.get_telemetry(ai_provider),
             **provider_info
         }
     except HTTPException:
@@ -419,7 +546,7 @@ async def upgrade_to_premium(
 @api_router.get("/analytics/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
     """Get user dashboard statistics"""
-    db = get_database()
+    db = get_analytics_database()
     
     # Get user's generation stats
     total_generations = await db.generation_results.count_documents({"user_id": current_user.id})
@@ -934,21 +1061,32 @@ async def process_subscription_cancellation(webhook_data: Dict):
 async def get_all_users(
     current_user: User = Depends(get_current_user),
     limit: int = 100,
-    skip: int = 0
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True)
 ):
-    """Get all users (admin only)"""
+    """Get all users, newest first (admin only)
+
+    Pass the returned ``next_cursor`` to get the next page.
+    """
     if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
     db = get_database()
     
-    cursor = db.users.find({}).skip(skip).limit(limit)
+    try:
+        query = keyset_query({}, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    docs = db.users.find(query).sort(KEYSET_SORT)
+    if skip and not cursor:
+        docs = docs.skip(skip)
+    docs = docs.limit(limit)
     users = []
     
-    async for user_doc in cursor:
+    async for user_doc in docs:
         users.append(UserResponse(**user_doc))
     
-    return {"users": users}
+    return {"users": users, "next_cursor": next_cursor(users, limit)}
 
 @api_router.get("/admin/stats")
 async def get_admin_stats(
@@ -958,7 +1096,7 @@ async def get_admin_stats(
     if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    db = get_database()
+    db = get_analytics_database()
     
     # Get user statistics
     total_users = await db.users.count_documents({})
@@ -1029,35 +1167,62 @@ async def update_user_tier(
 async def get_all_generations(
     current_user: User = Depends(get_current_user),
     limit: int = 100,
-    skip: int = 0
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True),
+    fields: ListFields = ListFields.FULL
 ):
-    """Get all generations (admin only)"""
+    """Get all generations, newest first (admin only)
+
+    Pass the returned ``next_cursor`` to get the next page; ``fields=summary``
+    leaves out the per-provider captions.
+    """
     if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
     db = get_database()
     
-    cursor = db.generation_results.find({}).sort("created_at", -1).skip(skip).limit(limit)
-    generations = []
+    try:
+        query = keyset_query({}, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    docs = db.generation_results.find(query, GENERATION_LIST_PROJECTIONS[fields]).sort(KEYSET_SORT)
+    if skip and not cursor:
+        docs = docs.skip(skip)
+    docs = docs.limit(limit)
+    generations = [generation_list_item(doc) async for doc in docs]
     
-    async for doc in cursor:
-        # Convert ai_responses to captions dict
-        captions = {}
-        for response in doc.get("ai_responses", []):
-            captions[response["provider"]] = response["caption"]
-        
-        generations.append(GenerationResultResponse(
-            id=doc["id"],
-            category=doc["category"],
-            platform=doc["platform"],
-            content_description=doc["content_description"],
-            captions=captions,
-            hashtags=doc["hashtags"],
-            combined_result=doc["combined_result"],
-            created_at=doc["created_at"]
-        ))
-    
-    return {"generations": generations}
+    return {"generations": generations, "next_cursor": next_cursor(generations, limit)}
+
+@api_router.get("/admin/database/indexes")
+async def get_index_report(
+    current_user: User = Depends(get_current_user)
+):
+    """Registered indexes missing from the database, and existing ones no query uses (admin only)"""
+    if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await index_report()
+
+@api_router.get("/admin/database/queries")
+async def get_query_stats(
+    current_user: User = Depends(get_current_user),
+    slow_limit: int = 50
+):
+    """Mongo query counts and timings per API route, and recent slow queries (admin only)"""
+    if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return query_monitor.get_stats(slow_limit)
+
+@api_router.get("/admin/database/pools")
+async def get_pool_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Mongo connection pool settings, occupancy and check-out wait times per client (admin only)"""
+    if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return pool_stats()
 
 # Voice Processing Routes
 @api_router.post("/voice/transcribe")
@@ -1751,14 +1916,161 @@ async def create_batch_generation(
         if current_user.daily_generations_used + total_items > 10:
             raise HTTPException(status_code=403, detail="Batch would exceed daily generation limit. Upgrade to Premium for unlimited generations.")
     
+    if request.webhook_url:
+        try:
+            WebhookSender.validate_url(request.webhook_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         request.user_id = current_user.id
-        batch_result = await batch_content_service.create_batch_generation(request)
+        batch_result = await batch_content_service.create_batch_generation(request, current_user.tier)
         return batch_result
     except Exception as e:
         logger.error(f"Error creating batch generation: {e}")
         raise HTTPException(status_code=500, detail="Failed to create batch generation")
 
+@api_router.post("/batch/estimate")
+async def estimate_batch_generation(
+    request: BatchGenerationRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Dry run: expected duration range, queue wait, tokens and cost of a batch, without creating it"""
+    try:
+        request.user_id = current_user.id
+        return await batch_content_service.estimate_batch(request)
+    except Exception as e:
+        logger.error(f"Error estimating batch generation: {e}")
+        raise HTTPException(status_code=500, detail="Failed to estimate batch generation")
+
+@api_router.post("/batch/upload", response_model=BatchGenerationResult)
+async def upload_batch_generation(
+    request: Request,
+    category: ContentCategory,
+    platform: Platform,
+    ai_providers: List[AIProvider] = Query([AIProvider.OPENAI, AIProvider.ANTHROPIC, AIProvider.GEMINI]),
+    auto_providers: Optional[int] = Query(None, ge=1),
+    latency_sla: Optional[float] = Query(None, gt=0),
+    batch_name: Optional[str] = None,
+    bypass_cache: bool = False,
+    max_concurrency: Optional[int] = None,
+    dedupe: bool = True,
+    packed: bool = False,
+    pack_size: Optional[int] = None,
+    webhook_url: Optional[str] = None,
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Create a batch from a streamed NDJSON or CSV upload
+
+    The request body is parsed as it arrives (``format`` or the Content-Type
+    picks ndjson/csv) and items are queued in chunks, so generation starts
+    before the upload finishes. NDJSON lines are strings or objects with a
+    ``content_description``; CSV uses the ``content_description`` or
+    ``description`` column.
+    """
+    upload_format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if upload_format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="Upload format must be ndjson or csv")
+    if webhook_url:
+        try:
+            WebhookSender.validate_url(webhook_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Same limits as /batch/generate, enforced while streaming
+    max_items = None
+    if current_user.tier == UserTier.FREE:
+        max_items = max(min(10, 10 - current_user.daily_generations_used), 0)
+
+    batch_request = BatchGenerationRequest(
+        user_id=current_user.id,
+        category=category,
+        platform=platform,
+        content_descriptions=[],
+        ai_providers=ai_providers,
+        auto_providers=auto_providers,
+        latency_sla=latency_sla,
+        batch_name=batch_name,
+        bypass_cache=bypass_cache,
+        max_concurrency=max_concurrency,
+        dedupe=dedupe,
+        packed=packed,
+        pack_size=pack_size,
+        webhook_url=webhook_url
+    )
+    parser = iter_csv_descriptions if upload_format == "csv" else iter_ndjson_descriptions
+
+    try:
+        return await batch_content_service.ingest_batch_stream(
+            batch_request, parser(request.stream()), max_items, current_user.tier
+        )
+    except BatchItemLimitExceeded as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ingesting batch upload: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create batch generation")
+
+@api_router.get("/batch/{batch_id}/export")
+async def export_batch_results(
+    batch_id: str,
+    format: str = "ndjson",
+    current_user: User = Depends(get_current_user)
+):
+    """Stream all of a batch's results as NDJSON or CSV"""
+    try:
+        rows = await batch_content_service.export_batch_results(batch_id, current_user.id, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="batch_{batch_id}.{format}"'}
+    )
+
+@api_router.get("/batch/{batch_id}/events")
+async def stream_batch_events(
+    batch_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream a batch's progress as server-sent events instead of polling /batch/{batch_id}
+
+    Emits ``snapshot`` (the current BatchGenerationResult), then ``item`` per
+    finished item, ``progress`` with counts and ETA after each worker flush,
+    and finally ``complete`` with the batch summary, after which the stream
+    ends.
+    """
+    events = await batch_content_service.stream_batch_events(batch_id, current_user.id)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    async def event_stream():
+        async for event, data in events:
+            if event == "keepalive":
+                yield ": keepalive\n\n"
+            else:
+                yield format_sse(event, data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/batch/workers")
+async def get_batch_worker_stats(current_user: User = Depends(get_current_user)):
+    """Get batch worker concurrency limits, throughput (items/min), and queue depth and wait times per tier (admin only)"""
+    if current_user.tier not in [UserTier.ADMIN, UserTier.SUPER_ADMIN]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await batch_content_service.get_worker_stats()
+
 @api_router.get("/batch/{batch_id}", response_model=BatchGenerationResult)
 async def get_batch_status(
     batch_id: str,
@@ -1772,12 +2084,45 @@ async def get_batch_status(
 
 @api_router.get("/batch", response_model=List[BatchGenerationResult])
 async def get_user_batches(
+    response: Response,
     current_user: User = Depends(get_current_user),
     limit: int = 20,
-    skip: int = 0
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True)
 ):
-    """Get user's batch generation history"""
-    return await batch_content_service.get_user_batches(current_user.id, limit, skip)
+    """Get user's batch generation history, newest first; the ``X-Next-Cursor`` header holds the next page's cursor"""
+    try:
+        batches = await batch_content_service.get_user_batches(current_user.id, limit, skip, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(batches, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    return batches
+
+@api_router.get("/batch/{batch_id}/results")
+async def get_batch_results(
+    batch_id: str,
+    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    fields: Optional[str] = None
+):
+    """Get a page of a batch's generation results in item order
+
+    Pass the returned ``next_cursor`` to get the next page; ``fields`` is a
+    comma-separated list of result fields to return.
+    """
+    try:
+        page = await batch_content_service.get_batch_results(
+            batch_id, current_user.id, cursor, limit,
+            [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return page
 
 @api_router.post("/batch/{batch_id}/cancel")
 async def cancel_batch(
@@ -2053,7 +2398,9 @@ async def generate_video_captions(
     """Generate video captions and subtitles"""
     if current_user.tier == UserTier.FREE:
         # Count recent video generations
-        recent_videos = await video_content_service.get_user_video_captions(current_user.id, 30)
+        recent_videos = await video_content_service.get_user_video_captions(
+            current_user.id, 30, fields=ListFields.SUMMARY
+        )
         if len(recent_videos) >= 5:
             raise HTTPException(status_code=403, detail="Free users limited to 5 video captions per month. Upgrade to Premium for unlimited access.")
     
@@ -2065,13 +2412,26 @@ async def generate_video_captions(
         logger.error(f"Error generating video captions: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate video captions")
 
-@api_router.get("/video/captions", response_model=List[VideoCaptionResult])
+@api_router.get("/video/captions", response_model=List[Union[VideoCaptionResult, VideoCaptionSummary]])
 async def get_user_video_captions(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: ListFields = ListFields.FULL
 ):
-    """Get user's video caption history"""
-    return await video_content_service.get_user_video_captions(current_user.id, limit)
+    """Get user's video caption history, newest first; the ``X-Next-Cursor`` header holds the next page's cursor
+
+    ``fields=summary`` returns list rows without the heavy content.
+    """
+    try:
+        results = await video_content_service.get_user_video_captions(current_user.id, limit, cursor, fields)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(results, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    return results
 
 # Podcast Content Routes
 @api_router.post("/podcast/content", response_model=PodcastContentResult)
@@ -2095,11 +2455,20 @@ async def generate_podcast_content(
 
 @api_router.get("/podcast/content", response_model=List[PodcastContentResult])
 async def get_user_podcast_content(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None
 ):
-    """Get user's podcast content history"""
-    return await podcast_content_service.get_user_podcast_content(current_user.id, limit)
+    """Get user's podcast content history, newest first; the ``X-Next-Cursor`` header holds the next page's cursor"""
+    try:
+        results = await podcast_content_service.get_user_podcast_content(current_user.id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(results, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    return results
 
 @api_router.get("/podcast/analytics")
 async def get_podcast_analytics(
@@ -2130,11 +2499,20 @@ async def generate_email_content(
 
 @api_router.get("/email/campaigns", response_model=List[EmailContentResult])
 async def get_user_email_campaigns(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None
 ):
-    """Get user's email campaign history"""
-    return await email_marketing_service.get_user_email_campaigns(current_user.id, limit)
+    """Get user's email campaign history, newest first; the ``X-Next-Cursor`` header holds the next page's cursor"""
+    try:
+        results = await email_marketing_service.get_user_email_campaigns(current_user.id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(results, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    return results
 
 @api_router.get("/email/analytics")
 async def get_email_analytics(
@@ -2151,7 +2529,9 @@ async def generate_blog_post(
 ):
     """Generate SEO-optimized blog post"""
     if current_user.tier == UserTier.FREE:
-        recent_blogs = await blog_post_service.get_user_blog_posts(current_user.id, 30)
+        recent_blogs = await blog_post_service.get_user_blog_posts(
+            current_user.id, 30, fields=ListFields.SUMMARY
+        )
         if len(recent_blogs) >= 3:
             raise HTTPException(status_code=403, detail="Free users limited to 3 blog posts per month. Upgrade to Premium for unlimited access.")
     
@@ -2163,13 +2543,26 @@ async def generate_blog_post(
         logger.error(f"Error generating blog post: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate blog post")
 
-@api_router.get("/blog/posts", response_model=List[BlogPostResult])
+@api_router.get("/blog/posts", response_model=List[Union[BlogPostResult, BlogPostSummary]])
 async def get_user_blog_posts(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: ListFields = ListFields.FULL
 ):
-    """Get user's blog post history"""
-    return await blog_post_service.get_user_blog_posts(current_user.id, limit)
+    """Get user's blog post history, newest first; the ``X-Next-Cursor`` header holds the next page's cursor
+
+    ``fields=summary`` returns list rows without the heavy content.
+    """
+    try:
+        results = await blog_post_service.get_user_blog_posts(current_user.id, limit, cursor, fields)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(results, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    return results
 
 @api_router.get("/blog/analytics")
 async def get_blog_analytics(
@@ -2200,11 +2593,20 @@ async def generate_product_description(
 
 @api_router.get("/product/descriptions", response_model=List[ProductDescriptionResult])
 async def get_user_product_descriptions(
+    response: Response,
     current_user: User = Depends(get_current_user),
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = None
 ):
-    """Get user's product description history"""
-    return await product_description_service.get_user_products(current_user.id, limit)
+    """Get user's product description history, newest first; the ``X-Next-Cursor`` header holds the next page's cursor"""
+    try:
+        results = await product_description_service.get_user_products(current_user.id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_cursor = next_cursor(results, limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
+    return results
 
 @api_router.get("/product/analytics")
 async def get_product_analytics(
@@ -3259,8 +3661,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "X-DB-Queries", "X-DB-Time-Ms"],
 )
 
+# Attributes every Mongo command to the route serving the request
+app.add_middleware(QueryMonitorMiddleware, monitor=query_monitor)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Single-Flight Request Coalescing for THREE11 MOTION TECH
+Concurrent identical LLM prompts share one upstream call and its result
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key.
+
+    The first caller for a key starts the call as its own task; callers that
+    arrive while it is in flight await the same task. The task is shielded,
+    so one caller being cancelled (a client disconnect, a deadline) does not
+    cancel the call for everyone else. Nothing is kept once the call finishes,
+    so this is not a cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``call()`` unless an identical call is already in flight, and return its result"""
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["calls"] += 1
+            task = asyncio.create_task(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda finished: self._finish(key, finished))
+        else:
+            self._stats["coalesced"] += 1
+            logger.debug(f"{self.name}: joined in-flight call")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict:
+        return {"name": self.name, "in_flight": len(self._inflight), **self._stats}
@@ -2,7 +2,8 @@ from typing import List, Dict, Any, Optional
 import uuid
 import logging
 from models import *
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, register_indexes
 from ai_service import ai_service
 
 logger = logging.getLogger(__name__)
@@ -299,5 +300,11 @@ class TemplateLibraryService:
         
         return suggestions
 
+register_indexes("content_templates", [
+    IndexModel([("id", ASCENDING)]),
+    IndexModel([("created_by", ASCENDING), ("usage_count", DESCENDING)]),
+    IndexModel([("category", ASCENDING), ("platform", ASCENDING), ("usage_count", DESCENDING)]),
+])
+
 # Global service instance
 template_library_service = TemplateLibraryService()
\ No newline at end of file
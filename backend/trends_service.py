@@ -9,13 +9,16 @@ import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import requests
-import openai
+from llm_backend import create_openai_client
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 import re
 import hashlib
-from database import get_database
-from models import Platform, ContentCategory
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, register_indexes
+from models import AIProvider, Platform, ContentCategory
+from rate_limiter import rate_limiters, estimate_tokens
+from single_flight import SingleFlight
 
 @dataclass
 class TrendData:
@@ -41,8 +44,9 @@ class TrendPrediction:
 
 class TrendsService:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.openai_client = create_openai_client(os.getenv('OPENAI_API_KEY'))
         self.executor = ThreadPoolExecutor(max_workers=4)
+        self.openai_flights = SingleFlight("trends_openai")
         
         # Cache for trends data
         self.trends_cache = {}
@@ -131,11 +135,7 @@ class TrendsService:
             Focus on realistic, current trends that would be popular on {platform.value} right now.
             """
             
-            response = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._call_openai_for_trends,
-                prompt
-            )
+            response = await self._run_openai(self._call_openai_for_trends, prompt)
             
             # Parse AI response
             trends_data = self._parse_ai_trends_response(response, platform)
@@ -145,6 +145,17 @@ class TrendsService:
             print(f"Error generating AI trends: {e}")
             return []
     
+    async def _run_openai(self, call, prompt: str, max_tokens: int = 2000) -> str:
+        """
+        Run a blocking OpenAI helper in the executor once the OpenAI rate limiter admits it.
+        Concurrent identical prompts to the same helper share one upstream call.
+        """
+        async def call_upstream():
+            await rate_limiters.get(AIProvider.OPENAI).acquire(estimate_tokens(prompt, max_tokens))
+            return await asyncio.get_event_loop().run_in_executor(self.executor, call, prompt)
+        
+        return await self.openai_flights.do((call.__name__, prompt), call_upstream)
+    
     def _call_openai_for_trends(self, prompt: str) -> str:
         """
         Call OpenAI API for trend analysis
@@ -352,11 +363,7 @@ class TrendsService:
             Return only the hashtags as a comma-separated list, each starting with #.
             """
             
-            response = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._call_openai_for_hashtags,
-                prompt
-            )
+            response = await self._run_openai(self._call_openai_for_hashtags, prompt, max_tokens=200)
             
             # Parse hashtags
             new_hashtags = [tag.strip() for tag in response.split(',') if tag.strip().startswith('#')]
@@ -443,11 +450,7 @@ class TrendsService:
             }}
             """
             
-            response = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._call_openai_for_predictions,
-                prompt
-            )
+            response = await self._run_openai(self._call_openai_for_predictions, prompt)
             
             predictions = self._parse_predictions_response(response, platform)
             return predictions
@@ -647,11 +650,7 @@ class TrendsService:
             Return as detailed JSON object.
             """
             
-            response = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._call_openai_for_analysis,
-                prompt
-            )
+            response = await self._run_openai(self._call_openai_for_analysis, prompt, max_tokens=1500)
             
             try:
                 return json.loads(response)
@@ -700,11 +699,7 @@ class TrendsService:
             Return as a simple list of content ideas.
             """
             
-            response = await asyncio.get_event_loop().run_in_executor(
-                self.executor,
-                self._call_openai_for_content_suggestions,
-                prompt
-            )
+            response = await self._run_openai(self._call_openai_for_content_suggestions, prompt, max_tokens=800)
             
             # Parse suggestions
             suggestions = [line.strip() for line in response.split('\n') if line.strip() and not line.strip().startswith('-')]
@@ -753,4 +748,9 @@ class TrendsService:
             
         except Exception as e:
             print(f"Error calculating optimal timing: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+
+register_indexes("trends", [
+    IndexModel([("platform", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING)]),
+])
@@ -1,13 +1,18 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import uuid
 import logging
 from datetime import datetime
 from models import *
 from ai_service import ai_service
-from database import get_database
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from database import get_database, register_indexes
+from pagination import KEYSET_SORT, keyset_query
 
 logger = logging.getLogger(__name__)
 
+# History list rows: leaves the heavy captions and subtitle file in Mongo
+VIDEO_CAPTION_SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in VideoCaptionSummary.model_fields}}
+
 class VideoContentService:
     def __init__(self):
         self.db = None
@@ -36,7 +41,10 @@ class VideoContentService:
         # Generate captions using AI
         captions = []
         
-        for provider in request.ai_providers:
+        providers = ai_service.resolve_providers(
+            request.ai_providers, request.auto_providers, ContentType.VIDEO_CAPTIONS.value, request.latency_sla
+        )
+        for provider in providers:
             try:
                 prompt = self._create_video_caption_prompt(request)
                 
@@ -188,19 +196,30 @@ class VideoContentService:
             pass
         return timestamp
     
-    async def get_user_video_captions(self, user_id: str, limit: int = 20) -> List[VideoCaptionResult]:
-        """Get user's video caption history"""
+    async def get_user_video_captions(self, user_id: str, limit: int = 20, cursor: Optional[str] = None,
+                                      fields: ListFields = ListFields.FULL) -> List[Union[VideoCaptionResult, VideoCaptionSummary]]:
+        """Get user's video caption history, newest first, after ``cursor`` if given
+
+        The summary view reads only the VideoCaptionSummary fields from Mongo.
+        """
         await self.initialize()
         
-        cursor = self.db.video_caption_results.find(
-            {"user_id": user_id}
-        ).sort("created_at", -1).limit(limit)
+        summary = fields == ListFields.SUMMARY
+        docs = self.db.video_caption_results.find(
+            keyset_query({"user_id": user_id}, cursor),
+            VIDEO_CAPTION_SUMMARY_PROJECTION if summary else {"_id": 0}
+        ).sort(KEYSET_SORT).limit(limit)
         
+        model = VideoCaptionSummary if summary else VideoCaptionResult
         results = []
-        async for doc in cursor:
-            results.append(VideoCaptionResult(**doc))
+        async for doc in docs:
+            results.append(model(**doc))
         
         return results
 
+register_indexes("video_caption_results", [
+    IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+])
+
 # Global service instance
 video_content_service = VideoContentService()
\ No newline at end of file
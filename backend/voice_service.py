@@ -9,7 +9,7 @@ import uuid
 from typing import Dict, Any, Optional, List
 import speech_recognition as sr
 from pydub import AudioSegment
-import openai
+from llm_backend import create_openai_client
 import io
 import base64
 from ai_service import AIService
@@ -21,7 +21,7 @@ class VoiceService:
     def __init__(self):
         self.recognizer = sr.Recognizer()
         self.ai_service = AIService()
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.openai_client = create_openai_client(os.getenv('OPENAI_API_KEY'))
         self.executor = ThreadPoolExecutor(max_workers=3)
         
     def _convert_audio_to_wav(self, audio_data: bytes, source_format: str = "webm") -> bytes: